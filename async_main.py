@@ -0,0 +1,42 @@
+from src.aio.runner import run
+from src.utils.config import get_config
+from src.utils.logger import Logger
+from src.utils.metrics import export_metrics
+from src.utils.notification import NotificationService
+
+
+def main():
+    try:
+        # 初始化基础组件
+        config = get_config()
+        logger = Logger()
+        notifier = NotificationService(config, logger)
+        
+        # 在事件循环中运行，配置了多个账号（如只设置 ACCOUNTS 环境变量）时并发运行各账号
+        configs = config.account_configs() if config.get("accounts") else [config]
+        results = run(configs, logger)
+        success = all(result["success"] for result in results)
+        
+        # 处理执行结果
+        end_message = "✅ 执行成功" if success else "❌ 执行失败"
+        logger.end(end_message, not success)
+        
+        if not success:
+            notifier.send_notification(
+                "网易云音乐合伙人 - 执行失败提醒",
+                "程序执行失败，请检查日志\n详细信息: " + "\n".join(
+                    result["message"] for result in results if not result["success"])
+            )
+            
+    except Exception as e:
+        error_message = f"程序异常: {str(e)}"
+        logger = Logger()
+        logger.error(error_message)
+        logger.end("❌ 执行失败", True)
+
+    # 写出本次运行的指标
+    export_metrics()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.weapi import WeapiCodec
+from src.utils.json_codec import JsonCodec, OrjsonCodec, set_json_codec
+
+
+def extra_response(count: int) -> bytes:
+    """额外任务列表的响应体，作品名和歌手名含中文"""
+    data = [
+        {
+            "completed": i % 3 == 0,
+            "work": {
+                "id": 1000000 + i,
+                "name": f"Song {i}" if i % 2 else f"作品{i}（Live）",
+                "authorName": f"歌手{i % 7}",
+                "resourceId": 2000000 + i,
+                "coverUrl": f"https://p1.music.126.net/{i:024d}/{i}.jpg",
+                "duration": 180000 + i
+            }
+        }
+        for i in range(count)
+    ]
+    return json.dumps({"code": 200, "data": data}, ensure_ascii=False).encode("utf-8")
+
+
+def sample_payload(i: int) -> dict:
+    return {
+        "taskId": "1234567",
+        "workId": str(1000000 + i),
+        "score": "3",
+        "tags": "3-A-1",
+        "customTags": "%5B%5D",
+        "comment": "好听",
+        "syncYunCircle": "true",
+        "extraResource": "true",
+        "csrf_token": "0123456789abcdef0123456789abcdef"
+    }
+
+
+def fixed_codec(secret: str) -> WeapiCodec:
+    """密钥固定的 weapi 编解码器，便于比较不同 JSON 后端的加密结果"""
+    codec = WeapiCodec(max_uses=0, max_age=0)
+    codec._secret = secret
+    codec._secret_key = secret.encode("utf-8")
+    return codec
+
+
+def main():
+    number = int(os.environ.get("BENCH_NUMBER", 200))
+    works = int(os.environ.get("BENCH_WORKS", 2000))
+    batch = int(os.environ.get("BENCH_BATCH", 500))
+    body = extra_response(works)
+    payloads = [sample_payload(i) for i in range(batch)]
+    secret = WeapiCodec.generate_secret()
+
+    try:
+        backends = [JsonCodec(), OrjsonCodec()]
+    except ImportError:
+        print("未安装 orjson，只测试标准库")
+        backends = [JsonCodec()]
+
+    results = {}
+    params = []
+    for backend in backends:
+        set_json_codec(backend)
+        assert backend.loads(body) == json.loads(body)
+        codec = fixed_codec(secret)
+        params.append(codec.encrypt_many(payloads))
+        results[f"{backend.name} parse {works} works"] = (
+            timeit.timeit(lambda: backend.loads(body), number=number) / number
+        )
+        results[f"{backend.name} encrypt_many"] = (
+            timeit.timeit(lambda: codec.encrypt_many(payloads), number=max(1, number // 10)) / (max(1, number // 10) * batch)
+        )
+    set_json_codec(None)
+
+    # 不同后端的加密结果必须完全一致
+    assert all(p == params[0] for p in params)
+
+    for name, seconds in results.items():
+        print(f"{name:<28} {seconds * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
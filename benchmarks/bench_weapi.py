@@ -0,0 +1,79 @@
+import base64
+import codecs
+import json
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Crypto.Cipher import AES
+
+from src.core.weapi import IV, MODULUS, PRESET_KEY, PUB_KEY, WeapiCodec
+
+
+def legacy_encrypt(data: dict, secret: str) -> dict:
+    """旧版 Signer 的加密流程：每次都重新计算 RSA 并新建 AES 加密器"""
+    def add_to_16(text):
+        pad = 16 - len(text) % 16
+        return (text + chr(pad) * pad).encode('utf-8')
+
+    def aes_encrypt(text, key):
+        encryptor = AES.new(key.encode('utf-8'), AES.MODE_CBC, IV)
+        return base64.b64encode(encryptor.encrypt(add_to_16(text))).decode('utf-8')
+
+    params = aes_encrypt(aes_encrypt(json.dumps(data), PRESET_KEY.decode('utf-8')), secret)
+    rs = int(codecs.encode(secret[::-1].encode('utf-8'), 'hex_codec'), 16)
+    enc_sec_key = format(pow(rs, int(PUB_KEY, 16), int(MODULUS, 16)), 'x').zfill(256)
+    return {"params": params, "encSecKey": enc_sec_key}
+
+
+def sample_payload(i: int) -> dict:
+    return {
+        "taskId": "1234567",
+        "workId": str(1000000 + i),
+        "score": "3",
+        "tags": "3-A-1",
+        "customTags": "%5B%5D",
+        "comment": "",
+        "syncYunCircle": "true",
+        "extraResource": "true",
+        "csrf_token": "0123456789abcdef0123456789abcdef"
+    }
+
+
+def aes_only(data: dict, secret: bytes) -> bytes:
+    """两轮 AES 的基准开销"""
+    return WeapiCodec.aes_encrypt(WeapiCodec.aes_encrypt(json.dumps(data).encode('utf-8'), PRESET_KEY), secret)
+
+
+def main():
+    number = int(os.environ.get("BENCH_NUMBER", 2000))
+    batch = int(os.environ.get("BENCH_BATCH", 500))
+    payload = sample_payload(0)
+    payloads = [sample_payload(i) for i in range(batch)]
+    rounds = max(1, number // batch)
+    codec = WeapiCodec()
+    secret = WeapiCodec.generate_secret()
+
+    # 校验与旧实现输出一致
+    expected = legacy_encrypt(payload, secret)
+    assert codec.enc_sec_key(secret) == expected["encSecKey"]
+    assert WeapiCodec.aes_encrypt(
+        WeapiCodec.aes_encrypt(json.dumps(payload).encode('utf-8'), PRESET_KEY), secret.encode('utf-8')
+    ).decode('utf-8') == expected["params"]
+
+    results = {
+        "legacy encrypt": timeit.timeit(lambda: legacy_encrypt(payload, secret), number=number) / number,
+        "two AES passes": timeit.timeit(lambda: aes_only(payload, secret.encode('utf-8')), number=number) / number,
+        "codec.encrypt": timeit.timeit(lambda: codec.encrypt(payload), number=number) / number,
+        "codec.encrypt_many": timeit.timeit(lambda: codec.encrypt_many(payloads), number=rounds) / (rounds * batch),
+    }
+
+    baseline = results["legacy encrypt"]
+    for name, seconds in results.items():
+        print(f"{name:<20} {seconds * 1e6:9.1f} us/req  x{baseline / seconds:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import argparse
+
+from src.core.daemon import Daemon
+from src.utils.config import get_config
+from src.utils.logger import Logger
+from src.utils.metrics import export_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻运行，按计划执行每日评分，并在 Cookie 临近过期或失效时刷新")
+    parser.add_argument("--once", action="store_true", help="立即为所有账号执行一次评分后退出")
+    parser.add_argument("--no-refresh", action="store_true", help="不检查和刷新 Cookie")
+    args = parser.parse_args()
+    
+    logger = Logger()
+    try:
+        # 初始化基础组件
+        config = get_config()
+        daemon = Daemon(config, logger, refresh=not args.no_refresh)
+        daemon.install_signal_handlers()
+        
+        if args.once:
+            daemon.run_once()
+        else:
+            logger.info("常驻模式启动")
+            daemon.run()
+            
+    except Exception as e:
+        logger.error(f"程序异常: {str(e)}")
+        logger.end("❌ 执行失败", True)
+        
+    # 写出本次运行的指标
+    export_metrics()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
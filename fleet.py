@@ -0,0 +1,52 @@
+import json
+import os
+
+from src.core.fleet import FleetRunner
+from src.utils.config import get_config
+from src.utils.logger import Logger
+from src.utils.metrics import export_metrics
+from src.utils.notification import NotificationService
+
+
+def main():
+    try:
+        # 初始化基础组件
+        config = get_config()
+        logger = Logger()
+        notifier = NotificationService(config, logger)
+        
+        accounts = config.accounts()
+        workers = int(os.environ.get("FLEET_WORKERS") or config.get("workers") or os.cpu_count() or 1)
+        use_async = bool(os.environ.get("FLEET_ASYNC") or config.get("fleet_async", False))
+        logger.info(f"共 {len(accounts)} 个账号，使用 {workers} 个工作进程")
+        
+        # 分片运行所有账号
+        runner = FleetRunner(workers=workers, use_async=use_async)
+        summary = runner.run(accounts)
+        
+        logger.info(f"执行汇总: {json.dumps({k: v for k, v in summary.items() if k != 'accounts'}, ensure_ascii=False)}")
+        for result in summary["accounts"]:
+            status = "✅" if result["success"] else "❌"
+            logger.info(f"{status} {result['account']}: {result['message']} (基础 {result['daily']}，额外 {result['extra']})")
+            
+        logger.end("✅ 执行成功" if not summary["failed"] else "❌ 部分账号执行失败", bool(summary["failed"]))
+        
+        if summary["failed"]:
+            failed = [f"{r['account']}: {r['message']}" for r in summary["accounts"] if not r["success"]]
+            notifier.send_notification(
+                "网易云音乐合伙人 - 多账号执行失败提醒",
+                f"{summary['failed']}/{summary['total']} 个账号执行失败\n" + "\n".join(failed)
+            )
+            
+    except Exception as e:
+        error_message = f"程序异常: {str(e)}"
+        logger = Logger()
+        logger.error(error_message)
+        logger.end("❌ 执行失败", True)
+
+    # 写出本次运行的指标
+    export_metrics()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,39 +1,59 @@
-import requests
-
 from src.core.bot import MusicPartnerBot
-from src.utils.config import Config
-from src.utils.logger import Logger
+from src.utils.account import account_key
+from src.utils.config import Config, get_config
+from src.utils.logger import Logger, log_context
+from src.utils.metrics import export_metrics
+from src.utils.http import create_session
 from src.utils.notification import NotificationService
 from src.validators.cookie import CookieValidator
 
 
+def run_account(config: Config, logger: Logger, notifier: NotificationService):
+    """验证Cookie并运行单个账号，返回是否执行成功，Cookie失效时返回 None"""
+    # 创建会话并设置Cookie
+    session = create_session({
+        "MUSIC_U": config.get("Cookie_MUSIC_U"),
+        "__csrf": config.get("Cookie___csrf")
+    })
+    
+    # 验证Cookie
+    validator = CookieValidator(session, logger, config.get("validation_ttl"))
+    is_valid, message = validator.validate()
+    
+    if not is_valid:
+        logger.error(message)
+        notifier.send_notification(
+            "网易云音乐合伙人 - Cookie失效提醒", 
+            f"请更新Cookie\n详细信息: {message}"
+        )
+        return None
+    
+    # 运行主程序
+    bot = MusicPartnerBot(config, logger, session)
+    return bot.run()
+
+
 def main():
     try:
         # 初始化基础组件
-        config = Config()
+        config = get_config()
         logger = Logger()
         notifier = NotificationService(config, logger)
         
-        # 创建会话并设置Cookie
-        session = requests.Session()
-        session.cookies.set("MUSIC_U", config.get("Cookie_MUSIC_U"))
-        session.cookies.set("__csrf", config.get("Cookie___csrf"))
-        
-        # 验证Cookie
-        validator = CookieValidator(session, logger)
-        is_valid, message = validator.validate()
+        # 配置了多个账号（如只设置 ACCOUNTS 环境变量）时逐个运行，Cookie 在各账号的配置中
+        if config.get("accounts"):
+            results = []
+            for account in config.account_configs():
+                with log_context(account=account.get("name") or account_key(account.get("Cookie_MUSIC_U"))):
+                    results.append(run_account(account, logger, notifier))
+        else:
+            results = [run_account(config, logger, notifier)]
         
-        if not is_valid:
-            logger.error(message)
-            notifier.send_notification(
-                "网易云音乐合伙人 - Cookie失效提醒", 
-                f"请更新Cookie\n详细信息: {message}"
-            )
+        # 所有账号的Cookie都已失效时不再输出执行结果
+        results = [result for result in results if result is not None]
+        if not results:
             return
-        
-        # 运行主程序
-        bot = MusicPartnerBot(config, logger, session)
-        success = bot.run()
+        success = all(results)
         
         # 处理执行结果
         end_message = "✅ 执行成功" if success else "❌ 执行失败"
@@ -58,5 +78,8 @@ def main():
         except Exception as notify_error:
             logger.error(f"发送异常通知时出错: {str(notify_error)}")
 
+    # 写出本次运行的指标
+    export_metrics()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
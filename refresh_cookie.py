@@ -1,61 +1,81 @@
+import argparse
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+from src.core.refresh_planner import RefreshPlanner
 from src.core.tasks.cookie_refresh import CookieRefreshTask
-from src.utils.config import Config
+from src.utils.config import get_config
 from src.utils.logger import Logger
 from src.utils.notification import NotificationService
 
 
 def main():
+    parser = argparse.ArgumentParser(description="在 Cookie 临近过期或已失效时重新登录并更新 GitHub Secrets")
+    parser.add_argument("--force", action="store_true", help="不检查过期时间，直接刷新")
+    args = parser.parse_args()
+    
+    logger = Logger()
     try:
         # 初始化基础组件
-        config = Config()
-        logger = Logger()
-        notifier = NotificationService(config, logger)
+        config = get_config()
+    except Exception as e:
+        logger.error(f"Cookie刷新程序异常: {str(e)}")
+        return
         
-        if not os.environ.get("NETEASE_PHONE") and config.get("netease_phone"):
-            os.environ["NETEASE_PHONE"] = config.get("netease_phone")
-            
-        if not os.environ.get("NETEASE_PASSWORD") and config.get("netease_password"):
-            os.environ["NETEASE_PASSWORD"] = config.get("netease_password")
-            
-        if not os.environ.get("NETEASE_MD5_PASSWORD") and config.get("netease_md5_password"):
-            os.environ["NETEASE_MD5_PASSWORD"] = config.get("netease_md5_password")
+    notifier = NotificationService(config, logger)
+    
+    # 本次运行的所有通知合并为一封邮件发送
+    with notifier.batch():
+        try:
+            if not os.environ.get("NETEASE_PHONE") and config.get("netease_phone"):
+                os.environ["NETEASE_PHONE"] = config.get("netease_phone")
+                
+            if not os.environ.get("NETEASE_PASSWORD") and config.get("netease_password"):
+                os.environ["NETEASE_PASSWORD"] = config.get("netease_password")
+                
+            if not os.environ.get("NETEASE_MD5_PASSWORD") and config.get("netease_md5_password"):
+                os.environ["NETEASE_MD5_PASSWORD"] = config.get("netease_md5_password")
+                
+            if not os.environ.get("GH_TOKEN") and config.get("gh_token"):
+                os.environ["GH_TOKEN"] = config.get("gh_token")
+                
+            if not os.environ.get("GH_REPO") and config.get("gh_repo"):
+                os.environ["GH_REPO"] = config.get("gh_repo")
             
-        if not os.environ.get("GH_TOKEN") and config.get("gh_token"):
-            os.environ["GH_TOKEN"] = config.get("gh_token")
+            # 没有本地状态时（如 GitHub Actions），用上次保存的过期时间判断
+            planner = RefreshPlanner.from_config(config)
+            if cookie_expires := os.environ.get("COOKIE_EXPIRES"):
+                planner.seed("default", float(cookie_expires))
             
-        if not os.environ.get("GH_REPO") and config.get("gh_repo"):
-            os.environ["GH_REPO"] = config.get("gh_repo")
-        
-        # 初始化并执行刷新任务
-        task = CookieRefreshTask(logger, notifier)
-        success = task.execute()
-        
-        # 处理执行结果
-        if success:
-            logger.info("✅ Cookie刷新成功")
-        else:
-            logger.error("❌ Cookie刷新失败")
+            # 初始化并执行刷新任务
+            task = CookieRefreshTask(logger, notifier, planner)
+            if not args.force:
+                refresh, reason = task.check({
+                    "Cookie_MUSIC_U": config.get("Cookie_MUSIC_U"),
+                    "Cookie___csrf": config.get("Cookie___csrf")
+                })
+                if not refresh:
+                    logger.info(f"无需刷新: {reason}")
+                    return
+                logger.info(f"需要刷新 Cookie: {reason}")
+                
+            success = task.execute()
             
-    except Exception as e:
-        error_message = f"Cookie刷新程序异常: {str(e)}"
-        logger = Logger()
-        logger.error(error_message)
-        
-        try:
-            config = Config()
-            notifier = NotificationService(config, logger)
+            # 处理执行结果
+            if success:
+                logger.info("✅ Cookie刷新成功")
+            else:
+                logger.error("❌ Cookie刷新失败")
+                
+        except Exception as e:
+            error_message = f"Cookie刷新程序异常: {str(e)}"
+            logger.error(error_message)
             notifier.send_notification(
                 "网易云音乐合伙人 - Cookie刷新异常",
                 error_message
             )
-        except Exception as notify_error:
-            logger.error(f"发送异常通知时出错: {str(notify_error)}")
-
 
 if __name__ == "__main__":
     main()
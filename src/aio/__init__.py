@@ -0,0 +1 @@
+# 异步执行模块的初始化文件 
\ No newline at end of file
@@ -0,0 +1,51 @@
+from ..core.bot import MusicPartnerBot
+from ..utils.json_codec import response_json
+from ..utils.logger import log_context
+from .scheduler import AsyncPacedExecutor
+from .tasks import AsyncDailyTask, AsyncExtraTask
+
+
+class AsyncMusicPartnerBot(MusicPartnerBot):
+    """异步版本的音乐合伙人机器人"""
+
+    async def run(self) -> bool:
+        try:
+            with log_context(phase="verify"):
+                await self._verify_user()
+                if self._day_complete():
+                    return True
+            
+            # 获取基础评分任务和额外评分任务
+            with log_context(phase="fetch"):
+                daily_task = AsyncDailyTask(self.session, self.logger, self.config)
+                complete, task_data = await daily_task._get_daily_tasks()
+                extra_task = AsyncExtraTask(self.session, self.logger, self.config)
+                extra_tasks, extra_completed = await extra_task._get_extra_tasks()
+                queue = self._build_queue(daily_task, task_data, complete, extra_tasks, extra_completed)
+            
+            # 合并到同一个队列，由同一个执行器按节奏处理
+            with log_context(phase="score"):
+                executor = AsyncPacedExecutor(extra_task._get_signer(task_data["id"]), self.logger, extra_task._report_listen)
+                self.outcomes = await executor.run(queue)
+                extra_task.record_outcomes(self.outcomes)
+            
+            return self._summarize(queue)
+            
+        except Exception as e:
+            self.logger.error(f"执行失败: {str(e)}")
+            return False
+
+    async def _verify_user(self) -> None:
+        """验证用户信息"""
+        try:
+            self.logger.info("开始验证用户信息...")
+            response = response_json(await self.session.get(url=self.api["user_info"]))
+            
+            profile = response.get("profile")
+            if profile:
+                self.logger.info(f'用户名: {profile["nickname"]}')
+            else:
+                raise RuntimeError("获取用户信息失败")
+                
+        except Exception as e:
+            raise RuntimeError(f"验证用户信息失败: {str(e)}")
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Dict, List, Optional, Sequence
+
+from ..utils.account import account_key
+from ..utils.config import Config
+from ..utils.logger import Logger, log_context
+from .bot import AsyncMusicPartnerBot
+from .session import AsyncHttpClient
+from .validator import AsyncCookieValidator
+
+
+async def run_account(client: AsyncHttpClient, config: Config, logger: Logger) -> Dict:
+    """在事件循环中运行单个账号，返回执行结果和评分统计"""
+    result = {"success": False, "message": "", "daily": 0, "extra": 0}
+    session = client.session({
+        "MUSIC_U": config.get("Cookie_MUSIC_U"),
+        "__csrf": config.get("Cookie___csrf")
+    })
+    
+    validator = AsyncCookieValidator(session, logger, config.get("validation_ttl"))
+    is_valid, message = await validator.validate()
+    if not is_valid:
+        result["message"] = message
+        return result
+        
+    bot = AsyncMusicPartnerBot(config, logger, session)
+    result["success"] = await bot.run()
+    result["message"] = "执行成功" if result["success"] else "执行失败"
+    result.update(bot.stats)
+    return result
+
+
+async def run_accounts(configs: Sequence[Config], logger: Logger, concurrency: int = 200,
+                       client: Optional[AsyncHttpClient] = None) -> List[Dict]:
+    """并发运行多个账号，各账号的等待时间相互重叠"""
+    semaphore = asyncio.Semaphore(concurrency)
+    owns_client = client is None
+    client = client or AsyncHttpClient()
+
+    async def _run(config: Config) -> Dict:
+        name = config.get("name") or account_key(config.get("Cookie_MUSIC_U"))
+        async with semaphore:
+            with log_context(account=name):
+                try:
+                    return await run_account(client, config, logger)
+                except Exception as e:
+                    return {"success": False, "message": f"程序异常: {str(e)}", "daily": 0, "extra": 0}
+
+    try:
+        return list(await asyncio.gather(*(_run(config) for config in configs)))
+    finally:
+        if owns_client:
+            client.close()
+
+
+def run(configs: Sequence[Config], logger: Logger, concurrency: int = 200) -> List[Dict]:
+    """同步入口：启动事件循环并运行所有账号"""
+    return asyncio.run(run_accounts(configs, logger, concurrency))
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from ..core.scheduler import EXTRA, PacedExecutor, WorkItem, WorkQueue
+from ..utils.logger import log_context
+
+
+class AsyncPacedExecutor(PacedExecutor):
+    """异步执行工作队列，预取下一个作品的工作在事件循环中并发进行，其余逻辑与 PacedExecutor 共用"""
+
+    async def _prepare(self, item: WorkItem) -> Dict:
+        """预处理单个作品"""
+        try:
+            with log_context(work=item.work["id"]):
+                if self._needs_report(item):
+                    await self.report(item.work)
+                return self.signer.prepare(item.work, is_extra=item.kind == EXTRA)
+
+        except Exception as e:
+            self._prepare_failed(item, e)
+            raise
+
+    def _prefetch(self, queue: WorkQueue) -> Optional[Tuple[WorkItem, asyncio.Future]]:
+        item = queue.pop()
+        if item is None:
+            return None
+        return item, asyncio.ensure_future(self._prepare(item))
+
+    async def run(self, queue: WorkQueue) -> List[Dict]:
+        """执行队列中的所有作品，返回每个作品的执行结果"""
+        outcomes: List[Dict] = []
+        self.signer.plan(queue.works())
+
+        pending = self._prefetch(queue)
+        try:
+            while pending is not None:
+                item, future = pending
+                pending = None
+                try:
+                    prepared = await future
+                    pending = self._prefetch(queue)
+                    with log_context(work=item.work["id"]):
+                        result = await self.signer.sign(item.work, is_extra=item.kind == EXTRA, prepared=prepared)
+                except Exception as e:
+                    result = e
+
+                if not self._settle(queue, item, result, outcomes):
+                    break
+                if pending is None:
+                    pending = self._prefetch(queue)
+        finally:
+            if pending is not None:
+                pending[1].cancel()
+
+        return outcomes
@@ -0,0 +1,91 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import requests
+
+from ..utils.metrics import SLEEP_SECONDS, get_metrics
+from ..utils.http import build_adapters, create_session
+from ..utils.rate_limiter import LIMITED_HOSTS, RateLimiter, get_rate_limiter
+
+
+class AsyncHttpClient:
+    """异步 HTTP 客户端
+
+    请求在共享线程池中执行，所有账号会话挂载同一组连接池适配器；
+    限流等待通过 asyncio.sleep 完成，不占用线程。
+    """
+
+    def __init__(self, max_workers: int = 32, pool_scale: int = 4,
+                 limiter: Optional[RateLimiter] = None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ncmp-http")
+        self.adapters = build_adapters(rate_limited=False, pool_scale=pool_scale)
+        self.limiter = limiter or get_rate_limiter()
+
+    def session(self, cookies: Optional[Dict[str, str]] = None) -> "AsyncSession":
+        """创建一个拥有独立 Cookie 的会话，连接池在会话间共享"""
+        return AsyncSession(self, create_session(cookies, adapters=self.adapters))
+
+    def close(self) -> None:
+        """关闭线程池和连接池"""
+        self.executor.shutdown(wait=False)
+        for adapter in self.adapters.values():
+            adapter.close()
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AsyncSession:
+    """单个账号的异步会话"""
+
+    def __init__(self, client: AsyncHttpClient, session: requests.Session):
+        self.client = client
+        self.session = session
+
+    @property
+    def cookies(self):
+        return self.session.cookies
+
+    @property
+    def hooks(self):
+        return self.session.hooks
+
+    @property
+    def cache(self):
+        return getattr(self.session, "cache", None)
+
+    async def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送请求，需要限流的主机先在事件循环中等待令牌"""
+        cache = self.cache
+        if cache is not None and method.upper() == "GET":
+            cached = cache.get(url, kwargs.get("params"))
+            if cached is not None:
+                return cached
+                
+        limiter = self.client.limiter
+        if url.startswith(LIMITED_HOSTS):
+            wait = limiter.reserve(url)
+            if wait > 0:
+                get_metrics().inc(SLEEP_SECONDS, wait, reason="host")
+            await asyncio.sleep(wait)
+
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            self.client.executor,
+            functools.partial(self.session.request, method, url, **kwargs)
+        )
+
+        if response.status_code in (429, 503) and url.startswith(LIMITED_HOSTS):
+            limiter.on_throttled(url)
+        return response
+
+    async def get(self, url: str, **kwargs) -> requests.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> requests.Response:
+        return await self.request("POST", url, **kwargs)
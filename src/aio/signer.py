@@ -0,0 +1,46 @@
+import asyncio
+from typing import Dict, Optional
+
+from ..core.signer import Signer
+from ..utils.metrics import SLEEP_SECONDS, get_metrics
+
+
+class AsyncSigner(Signer):
+    """异步评分器，账号等待期间让出事件循环，其余逻辑与 Signer 共用"""
+
+    async def sign(self, work: dict, is_extra: bool = False, prepared: Optional[Dict] = None) -> bool:
+        """为作品评分，遇到频率限制或 5xx 时有限次重试；可传入预先准备好的请求数据"""
+        with self._operation(work) as state:
+            signed = self._already_signed(work)
+            if signed is not None:
+                state["result"] = "skipped"
+                return signed
+                
+            if self._interrupted(work) and self._resolve_interrupted(work, await self._status_request(is_extra)()):
+                state["result"] = "skipped"
+                return True
+                
+            prepared = prepared or self.prepare(work, is_extra)
+            key = self._begin_checkpoint(work)
+            
+            for attempt in range(self.max_retries + 1):
+                wait = self._next_wait()
+                if wait > 0:
+                    get_metrics().inc(SLEEP_SECONDS, wait, reason="pace")
+                await asyncio.sleep(wait)
+                raw = await self.retrier.call_async(*self._request(prepared))
+                cause = self._server_error(raw)
+                if cause:
+                    if self._resolve_interrupted(work, await self._status_request(is_extra)(), cause):
+                        state["result"] = "ok"
+                        return True
+                    delay = self._server_error_backoff(attempt)
+                    get_metrics().inc(SLEEP_SECONDS, delay, reason="retry")
+                    await asyncio.sleep(delay)
+                    continue
+                signed = self._complete(work, prepared, raw, attempt, key)
+                if signed is not None:
+                    state["result"] = "ok"
+                    return signed
+                    
+            raise self._retries_exhausted()
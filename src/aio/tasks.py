@@ -0,0 +1,131 @@
+import time
+from typing import Dict, List, Tuple
+
+from ..core.scheduler import WorkQueue
+from ..core.tasks.daily import DailyTask
+from ..core.tasks.extra import ExtraTask
+from ..utils.json_codec import response_json
+from ..utils.metrics import record_operation
+from .scheduler import AsyncPacedExecutor
+from .signer import AsyncSigner
+
+
+class AsyncDailyTask(DailyTask):
+    """异步每日任务"""
+
+    async def execute(self) -> bool:
+        try:
+            complete, task_data = await self._get_daily_tasks()
+            if not complete:
+                await self._process_tasks(task_data)
+            return True
+        except Exception as e:
+            self.logger.error(f"执行每日任务失败: {str(e)}")
+            return False
+
+    async def _get_daily_tasks(self) -> Tuple[bool, Dict]:
+        """获取每日任务"""
+        response = response_json(await self.session.get(url=self.api["task_data"]))
+        return self._parse_daily_tasks(response)
+
+    async def _process_tasks(self, task_data: Dict) -> int:
+        """处理未完成的任务，返回本次评分数量"""
+        self.logger.info("开始评分...")
+        queue = WorkQueue()
+        queue.add_daily(self._pending_tasks(task_data))
+        
+        signer = AsyncSigner(self.session, task_data["id"], self.logger, self.config)
+        outcomes = await AsyncPacedExecutor(signer, self.logger).run(queue)
+        
+        failed = [o for o in outcomes if not o["success"]]
+        if failed:
+            raise RuntimeError(f"{len(failed)} 个每日任务评分失败: {failed[0]['message']}")
+        return len(outcomes)
+
+
+class AsyncExtraTask(ExtraTask):
+    """异步额外评分任务"""
+
+    async def process_extra_tasks(self, task_id: str) -> int:
+        """处理额外的评分任务，返回本次成功评分数量"""
+        try:
+            extra_tasks, completed_count = await self._get_extra_tasks()
+            
+            if completed_count >= 7:
+                self.logger.info(f"今日已完成 {completed_count} 个额外评分任务，已达到每日上限")
+                return 0
+                
+            if not extra_tasks:
+                self.logger.info(f"额外评定完成数: {completed_count}")
+                return 0
+
+            self.logger.info(f"发现 {len(extra_tasks)} 个待额外评定任务")
+            
+            queue = WorkQueue()
+            queue.add_extra(extra_tasks, completed_count)
+            remaining_tasks = queue.extra_quota
+            
+            executor = AsyncPacedExecutor(self._get_signer(task_id), self.logger, self._report_listen)
+            self.record_outcomes(await executor.run(queue))
+            success_count = queue.extra_done
+            
+            if success_count >= remaining_tasks:
+                self.logger.info(f"已完成 {success_count} 个额外评分任务，总计完成 {completed_count + success_count} 个")
+
+            self.logger.info(f"额外评分任务处理完成，成功评分 {success_count} 首")
+            
+            if success_count < remaining_tasks:
+                self.logger.warning(f"未能完成所有额外评分任务，仅完成 {success_count}/{remaining_tasks} 个")
+                
+            return success_count
+
+        except Exception as e:
+            self.logger.error(f"处理额外评分任务时出错: {str(e)}")
+            raise
+
+    async def _get_extra_tasks(self) -> Tuple[List[Dict], int]:
+        """获取额外评分任务列表"""
+        try:
+            response = response_json(await self.session.get(
+                url=self.api["extra_list"],
+                headers={"Referer": "https://mp.music.163.com/"}
+            ))
+            return self._parse_extra_tasks(response)
+
+        except Exception as e:
+            self.logger.error(f"获取额外任务列表失败: {str(e)}")
+            raise
+
+    def _get_signer(self, task_id: str) -> AsyncSigner:
+        """获取复用的异步评分器"""
+        if self.signer is None or self.signer.task_id != task_id:
+            self.signer = AsyncSigner(self.session, task_id, self.logger, self.config, self.codec, self.limiter,
+                                      self.checkpoint)
+        return self.signer
+
+    async def _report_listen(self, work: Dict) -> None:
+        """上报听歌记录"""
+        if self._is_reported(work):
+            self.logger.info(f"歌曲 {work['name']} 今日已上报听歌记录，跳过")
+            return
+            
+        start, result = time.perf_counter(), "failed"
+        try:
+            data = self._build_report_data(work)
+            params = self.codec.encrypt(data)
+            
+            url = f"{self.api['report_listen']}?csrf_token={data['csrf_token']}"
+            response = response_json(await self.retrier.call_async(url, lambda: self.session.post(
+                url=url,
+                data=params,
+                headers={"Referer": "https://mp.music.163.com/"}
+            )))
+            
+            self._check_report_response(work, response)
+            result = "ok"
+
+        except Exception as e:
+            self.logger.error(f"上报听歌记录失败: {str(e)}")
+            raise
+        finally:
+            record_operation("report", start, result)
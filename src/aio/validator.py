@@ -0,0 +1,50 @@
+import time
+from typing import Tuple
+
+from ..utils.json_codec import response_json
+from ..utils.metrics import record_operation
+from ..validators.cookie import CookieValidator
+
+
+class AsyncCookieValidator(CookieValidator):
+    """异步 Cookie 验证器"""
+
+    async def validate(self) -> Tuple[bool, str]:
+        """验证Cookie是否有效"""
+        start = time.perf_counter()
+        key = self._cache_key()
+        if key is not None and self.cache.is_valid(key):
+            self._watch_auth_failures(key)
+            record_operation("validate", start, "cached")
+            return True, "Cookie有效（验证结果未过期，跳过预检）"
+            
+        is_valid, message = await self._validate()
+        self._store_result(key, is_valid)
+        record_operation("validate", start, "ok" if is_valid else "failed")
+        return is_valid, message
+
+    async def _validate(self) -> Tuple[bool, str]:
+        try:
+            if not self._check_cookie_exists():
+                return False, "Cookie未正确设置"
+
+            if not await self._check_user_info():
+                return False, "Cookie已失效或账号信息不完整"
+
+            if not await self._check_task_access():
+                return False, "当前账号可能没有音乐合伙人权限"
+            
+            return True, "Cookie有效"
+            
+        except Exception as e:
+            return False, f"Cookie验证失败: {str(e)}"
+
+    async def _check_user_info(self) -> bool:
+        """检查用户信息是否有效"""
+        response = response_json(await self.session.get(self.check_urls["user_info"]))
+        return bool(response.get("code") == 200 and response.get("profile"))
+        
+    async def _check_task_access(self) -> bool:
+        """检查是否有任务访问权限"""
+        response = response_json(await self.session.get(self.check_urls["task_data"]))
+        return response.get("code") == 200
@@ -1,9 +1,13 @@
-from typing import Dict
+from typing import Dict, List
 
 import requests
 
+from ..utils.account import account_key
+from ..utils.checkpoint import DONE, get_checkpoint_store
 from ..utils.config import Config
-from ..utils.logger import Logger
+from ..utils.json_codec import response_json
+from ..utils.logger import Logger, log_context
+from .scheduler import DAILY, EXTRA, PacedExecutor, WorkQueue
 from .tasks.daily import DailyTask
 from .tasks.extra import ExtraTask
 
@@ -16,32 +20,92 @@ class MusicPartnerBot:
         self.api = {
             "user_info": "https://music.163.com/api/nuser/account/get",
         }
+        # 本次运行的评分统计
+        self.stats: Dict[str, int] = {"daily": 0, "extra": 0}
+        self.outcomes: List[Dict] = []
+        self.checkpoint = get_checkpoint_store(config)
+        self.account = account_key(session.cookies.get("MUSIC_U"))
 
     def run(self) -> bool:
         try:
-            self._verify_user()
+            with log_context(phase="verify"):
+                self._verify_user()
+                if self._day_complete():
+                    return True
             
-            # 处理基础评分任务
-            daily_task = DailyTask(self.session, self.logger, self.config)
-            complete, task_data = daily_task._get_daily_tasks()
-            if not complete:
-                daily_task._process_tasks(task_data)
+            # 获取基础评分任务和额外评分任务
+            with log_context(phase="fetch"):
+                daily_task = DailyTask(self.session, self.logger, self.config)
+                complete, task_data = daily_task._get_daily_tasks()
+                extra_task = ExtraTask(self.session, self.logger, self.config)
+                extra_tasks, extra_completed = extra_task._get_extra_tasks()
+                queue = self._build_queue(daily_task, task_data, complete, extra_tasks, extra_completed)
             
-            # 处理额外评分任务
-            extra_task = ExtraTask(self.session, self.logger, self.config)
-            extra_task.process_extra_tasks(task_data["id"])
+            # 合并到同一个队列，由同一个执行器按节奏处理，阶段之间没有空等
+            with log_context(phase="score"):
+                executor = PacedExecutor(extra_task._get_signer(task_data["id"]), self.logger, extra_task._report_listen)
+                self.outcomes = executor.run(queue)
+                extra_task.record_outcomes(self.outcomes)
             
-            return True
+            return self._summarize(queue)
             
         except Exception as e:
             self.logger.error(f"执行失败: {str(e)}")
             return False
 
+    def _day_complete(self) -> bool:
+        """检查点显示今日任务已全部完成时，无需再查询任务列表"""
+        if self.checkpoint is not None and self.checkpoint.is_day_complete(self.account):
+            self.logger.info("今日任务已全部完成，跳过")
+            return True
+        return False
+
+    def _build_queue(self, daily_task: DailyTask, task_data: Dict, complete: bool,
+                     extra_tasks: List[Dict], extra_completed: int) -> WorkQueue:
+        """构建合并后的工作队列"""
+        queue = WorkQueue()
+        if not complete:
+            self.logger.info("开始评分...")
+            queue.add_daily(daily_task._pending_tasks(task_data))
+            
+        queue.add_extra(extra_tasks, extra_completed)
+        if queue.extra_quota == 0:
+            self.logger.info(f"今日已完成 {extra_completed} 个额外评分任务，已达到每日上限")
+        elif extra_tasks:
+            self.logger.info(f"发现 {len(extra_tasks)} 个待额外评定任务")
+        return queue
+
+    def _summarize(self, queue: WorkQueue) -> bool:
+        """根据每个作品的执行结果统计评分数量，每日任务全部成功才算执行成功"""
+        self.stats["daily"] = sum(1 for o in self.outcomes if o["kind"] == DAILY and o["success"] and not o["skipped"])
+        self.stats["extra"] = sum(1 for o in self.outcomes if o["kind"] == EXTRA and o["success"] and not o["skipped"])
+        self.logger.info(f"评分完成：每日任务 {self.stats['daily']} 首，额外任务 {self.stats['extra']} 首")
+        
+        if queue.extra_done < queue.extra_quota:
+            self.logger.warning(f"未能完成所有额外评分任务，仅完成 {queue.extra_done}/{queue.extra_quota} 个")
+            
+        failed = [o for o in self.outcomes if o["kind"] == DAILY and not o["success"]]
+        if failed:
+            self.logger.error(f"{len(failed)} 个每日任务评分失败")
+            return False
+            
+        if self.checkpoint is not None and queue.extra_done >= queue.extra_quota and self._daily_signed():
+            self.checkpoint.mark_day_complete(self.account)
+        return True
+
+    def _daily_signed(self) -> bool:
+        """本次处理的每日任务在检查点中都已评分成功，资源状态异常而跳过的作品仍算未完成"""
+        daily = {str(o["work_id"]) for o in self.outcomes if o["kind"] == DAILY}
+        open_works = daily - self.checkpoint.done_works(self.account, "sign", statuses=(DONE,))
+        if open_works:
+            self.logger.info(f"{len(open_works)} 个每日任务尚未评分成功，今日之后的运行仍会检查任务列表")
+        return not open_works
+
     def _verify_user(self) -> None:
         """验证用户信息"""
         try:
             self.logger.info("开始验证用户信息...")
-            response = self.session.get(url=self.api["user_info"]).json()
+            response = response_json(self.session.get(url=self.api["user_info"]))
             
             profile = response.get("profile")
             if profile:
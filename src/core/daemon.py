@@ -0,0 +1,283 @@
+import heapq
+import random
+import signal
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from ..utils.checkpoint import BEIJING
+from ..utils.config import Config
+from ..utils.http import create_session
+from ..utils.logger import Logger, log_context
+from ..utils.metrics import export_metrics
+from ..utils.notification import NotificationService
+from .fleet import _account_name, run_account
+from .refresh_planner import RefreshPlanner
+from .tasks.cookie_refresh import CREDENTIAL_ENV, CookieRefreshTask, env_credentials
+
+# 定时任务的计划函数：给定当前时间，返回下一次运行的基准时间
+Plan = Callable[[datetime], datetime]
+
+
+def parse_time(value: str) -> Tuple[int, int]:
+    """解析 HH:MM 格式的时间"""
+    try:
+        hour, minute = (int(part) for part in value.split(":"))
+    except ValueError:
+        raise ValueError(f"时间格式无效: {value!r}，应为 HH:MM")
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"时间格式无效: {value!r}，应为 HH:MM")
+    return hour, minute
+
+
+def daily_at(hour: int, minute: int, offset: timedelta = timedelta()) -> Plan:
+    """每天在指定时间（北京时间）加上偏移后运行"""
+    def plan(now: datetime) -> datetime:
+        due = now.replace(hour=hour, minute=minute, second=0, microsecond=0) + offset
+        while due <= now:
+            due += timedelta(days=1)
+        return due
+    return plan
+
+
+class Job:
+    """定时任务"""
+
+    def __init__(self, name: str, action: Callable[[], None], plan: Plan, jitter: float = 0.0):
+        self.name = name
+        self.action = action
+        self.plan = plan
+        self.jitter = jitter
+
+    def next_run(self, now: datetime, rng: random.Random) -> datetime:
+        """下一次运行时间，在基准时间后随机延迟 0~jitter 秒"""
+        return self.plan(now) + timedelta(seconds=rng.uniform(0, self.jitter))
+
+
+class JobScheduler:
+    """按时间排序的任务队列"""
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+        self._heap: List[Tuple[datetime, int, Job]] = []
+        self._order = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def add(self, job: Job, now: datetime) -> datetime:
+        """加入任务并返回首次运行时间"""
+        due = job.next_run(now, self.rng)
+        heapq.heappush(self._heap, (due, self._order, job))
+        self._order += 1
+        return due
+
+    def clear(self) -> None:
+        self._heap.clear()
+
+    def next_due(self) -> Optional[datetime]:
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[Job]:
+        """取出所有已到期的任务"""
+        jobs = []
+        while self._heap and self._heap[0][0] <= now:
+            jobs.append(heapq.heappop(self._heap)[2])
+        return jobs
+
+    def upcoming(self) -> List[Tuple[datetime, str]]:
+        return [(due, job.name) for due, _, job in sorted(self._heap)]
+
+
+class Daemon:
+    """常驻运行的调度器
+
+    按配置的时间（北京时间，带随机抖动）为每个账号运行每日评分，
+    每天检查一次各账号的 Cookie，临近过期或评分时发现失效才刷新，刷新得到的 Cookie
+    在配置文件更新前用于该账号的后续运行。账号会话在多次运行之间保持，
+    连接池、响应缓存、限流器和编解码器都无需重建；配置文件修改后自动重新加载。
+    收到 SIGINT/SIGTERM 时等待当前任务完成后退出。
+    """
+
+    # 空闲时检查配置文件和退出信号的间隔（秒）
+    TICK = 60.0
+
+    def __init__(self, config: Config, logger: Logger, notifier: Optional[NotificationService] = None,
+                 refresh: bool = True):
+        self.config = config
+        self.logger = logger
+        self.notifier = notifier or NotificationService(config, logger)
+        self.refresh = refresh
+        self.scheduler = JobScheduler()
+        self.sessions: Dict[str, requests.Session] = {}
+        # 账号名 -> (被替换的配置中的 MUSIC_U, 刷新得到的 Cookie)
+        self.refreshed: Dict[str, Tuple[Optional[str], Dict[str, str]]] = {}
+        self.stop_event = threading.Event()
+
+    @staticmethod
+    def now() -> datetime:
+        return datetime.now(BEIJING)
+
+    def _cookies(self, account: Dict) -> Dict[str, str]:
+        """账号当前使用的 Cookie：刷新过且配置中仍是原 Cookie 时使用刷新得到的值"""
+        replaced, cookies = self.refreshed.get(_account_name(account), (None, None))
+        if cookies is not None and replaced == account.get("Cookie_MUSIC_U"):
+            return cookies
+        return {"Cookie_MUSIC_U": account.get("Cookie_MUSIC_U"), "Cookie___csrf": account.get("Cookie___csrf")}
+
+    def _session(self, account: Dict) -> requests.Session:
+        """获取账号的常驻会话，Cookie 变化时同步更新"""
+        name = _account_name(account)
+        session = self.sessions.get(name)
+        if session is None:
+            session = self.sessions[name] = create_session()
+        cookies = self._cookies(account)
+        session.cookies.set("MUSIC_U", cookies["Cookie_MUSIC_U"])
+        session.cookies.set("__csrf", cookies["Cookie___csrf"])
+        return session
+
+    def _score_job(self, name: str) -> Callable[[], None]:
+        def run() -> None:
+            # 每次运行时读取最新的账号配置
+            account = next((a for a in self.config.accounts() if _account_name(a) == name), None)
+            if account is None:
+                return
+            result = run_account(account, self._session(account))
+            if not result["success"]:
+                self.notifier.send_notification(
+                    "网易云音乐合伙人 - 执行失败提醒",
+                    f"{result['account']}: {result['message']}"
+                )
+                # 失败可能是 Cookie 已失效，不必等到下一次定时检查
+                if self.refresh:
+                    self._refresh_account(account, RefreshPlanner.from_config(self.config))
+        return run
+
+    def _credentials(self, index: int, account: Dict) -> Optional[Dict[str, Optional[str]]]:
+        """账号的登录凭据
+
+        单账号时使用配置或环境变量中的凭据；多账号时顶层凭据无法对应到具体账号，
+        只使用账号分节中配置的凭据，没有时返回 None。
+        """
+        sections = self.config.get("accounts")
+        if not sections:
+            return env_credentials(account)
+        section = sections[index]
+        if not any(section.get(key) for key in CREDENTIAL_ENV):
+            return None
+        return {key: section.get(key) for key in CREDENTIAL_ENV}
+
+    def _refresh_account(self, account: Dict, planner: RefreshPlanner, index: Optional[int] = None) -> None:
+        """账号的 Cookie 临近过期或已失效时刷新"""
+        name = _account_name(account)
+        if index is None:
+            index = next(i for i, a in enumerate(self.config.accounts()) if _account_name(a) == name)
+        with log_context(account=name):
+            # 单账号沿用 refresh_cookie.py 的状态键，两者共享同一份过期记录
+            key = name if self.config.get("accounts") else "default"
+            task = CookieRefreshTask(self.logger, self.notifier, planner, account=key)
+            refresh, reason = task.check(self._cookies(account))
+            if not refresh:
+                self.logger.info(reason)
+                return
+
+            credentials = self._credentials(index, account)
+            if credentials is None:
+                self.logger.warning(f"需要刷新 Cookie（{reason}），但账号未配置登录凭据")
+                return
+            self.logger.info(f"开始刷新 Cookie: {reason}")
+            # GitHub Secrets 中的 MUSIC_U/CSRF 只对应单账号配置
+            if task.execute(credentials, update_secrets=not self.config.get("accounts")) and task.cookies:
+                self.refreshed[name] = (account.get("Cookie_MUSIC_U"), task.cookies)
+                if name in self.sessions:
+                    self._session(account)
+
+    def _refresh_job(self) -> None:
+        """逐个检查账号的 Cookie，临近过期或已失效时刷新"""
+        planner = RefreshPlanner.from_config(self.config)
+        for index, account in enumerate(self.config.accounts()):
+            self._refresh_account(account, planner, index)
+
+    def build_schedule(self) -> None:
+        """按当前配置重建任务计划，账号在 daemon_score_spread 小时内均匀错开"""
+        self.scheduler.clear()
+        now = self.now()
+        jitter = self.config.get("daemon_jitter")
+        hour, minute = parse_time(self.config.get("daemon_score_time"))
+        accounts = self.config.accounts()
+        spread = timedelta(hours=self.config.get("daemon_score_spread"))
+
+        for index, account in enumerate(accounts):
+            name = _account_name(account)
+            offset = spread * index / len(accounts)
+            job = Job(f"评分: {name}", self._score_job(name), daily_at(hour, minute, offset), jitter)
+            self.scheduler.add(job, now)
+
+        if self.refresh:
+            refresh_hour, refresh_minute = parse_time(self.config.get("daemon_refresh_time"))
+            plan = daily_at(refresh_hour, refresh_minute)
+            self.scheduler.add(Job("检查Cookie", self._refresh_job, plan, jitter), now)
+
+        for due, name in self.scheduler.upcoming():
+            self.logger.info(f"计划任务 {name}: {due.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    def _reload_config(self) -> None:
+        try:
+            if self.config.reload_if_changed():
+                self.logger.info("配置文件已更新，重新生成任务计划")
+                self.build_schedule()
+        except Exception as e:
+            self.logger.error(f"重新加载配置失败，继续使用原配置: {str(e)}")
+
+    def _run_job(self, name: str, action: Callable[[], None]) -> None:
+        self.logger.info(f"开始执行任务 {name}")
+        try:
+            action()
+        except Exception as e:
+            self.logger.error(f"任务 {name} 执行异常: {str(e)}")
+            self.notifier.send_notification("网易云音乐合伙人 - 异常提醒", f"{name}: {str(e)}")
+        finally:
+            # 同一窗口内的通知合并发送
+            if self.notifier.outbox is not None and self.notifier.outbox.age() >= self.notifier.window:
+                self.notifier.flush()
+            export_metrics(self.logger)
+
+    def run_once(self) -> None:
+        """立即执行一次所有账号的评分"""
+        with self.notifier.batch():
+            for account in self.config.accounts():
+                name = _account_name(account)
+                self._run_job(f"评分: {name}", self._score_job(name))
+
+    def stop(self, *args) -> None:
+        """请求退出，当前任务完成后生效"""
+        if not self.stop_event.is_set():
+            self.logger.info("收到退出信号，当前任务完成后退出")
+        self.stop_event.set()
+
+    def install_signal_handlers(self) -> None:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self.stop)
+
+    def run(self) -> None:
+        """运行调度循环直到收到退出信号"""
+        self.build_schedule()
+        with self.notifier.batch():
+            while not self.stop_event.is_set():
+                now = self.now()
+                for job in self.scheduler.pop_due(now):
+                    if self.stop_event.is_set():
+                        break
+                    self._run_job(job.name, job.action)
+                    self.scheduler.add(job, self.now())
+
+                self._reload_config()
+                due = self.scheduler.next_due()
+                timeout = self.TICK if due is None else min(self.TICK, (due - self.now()).total_seconds())
+                self.stop_event.wait(max(0.0, timeout))
+
+        for session in self.sessions.values():
+            session.close()
+        self.logger.info("常驻进程已退出")
@@ -0,0 +1,135 @@
+import functools
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from ..utils.account import account_key
+from ..utils.config import Config
+from ..utils.http import create_session
+from ..utils.logger import Logger, log_context
+from ..utils.metrics import get_metrics
+from ..validators.cookie import CookieValidator
+from .bot import MusicPartnerBot
+
+
+def _account_name(account: Dict) -> str:
+    """账号在日志和结果中的名称"""
+    return account.get("name") or account_key(account.get("Cookie_MUSIC_U"))
+
+
+def run_account(account: Dict, session: Optional[requests.Session] = None) -> Dict:
+    """运行单个账号，每个账号拥有独立的会话、配置和日志上下文；可传入复用的会话"""
+    name = _account_name(account)
+    with log_context(account=name):
+        return _run_account(account, name, session)
+
+
+def _run_account(account: Dict, name: str, session: Optional[requests.Session]) -> Dict:
+    result = {"account": name, "success": False, "message": "", "daily": 0, "extra": 0}
+    logger = Logger(name=name)
+    
+    try:
+        config = Config(account)
+        
+        session = session or create_session({
+            "MUSIC_U": config.get("Cookie_MUSIC_U"),
+            "__csrf": config.get("Cookie___csrf")
+        })
+        
+        validator = CookieValidator(session, logger, config.get("validation_ttl"))
+        is_valid, message = validator.validate()
+        if not is_valid:
+            logger.error(message)
+            result["message"] = message
+            return result
+            
+        bot = MusicPartnerBot(config, logger, session)
+        result["success"] = bot.run()
+        result["message"] = "执行成功" if result["success"] else "执行失败"
+        result.update(bot.stats)
+        
+    except Exception as e:
+        result["message"] = f"程序异常: {str(e)}"
+        logger.error(result["message"])
+        
+    return result
+
+
+def run_shard(accounts: Sequence[Dict]) -> List[Dict]:
+    """在一个工作进程中用事件循环并发运行一组账号"""
+    from ..aio.runner import run
+
+    results = run([Config(account) for account in accounts], Logger())
+    for account, result in zip(accounts, results):
+        result["account"] = _account_name(account)
+    return results
+
+
+def _run_isolated(task: Callable, payload) -> Tuple[object, Dict]:
+    """在工作进程中运行任务，并带回本次任务采集的指标"""
+    metrics = get_metrics()
+    metrics.reset()
+    return task(payload), metrics.snapshot()
+
+
+class FleetRunner:
+    """多账号运行器
+
+    账号按工作进程数分片，总耗时随 账号数/工作进程数 增长。
+    use_async 为 True 时每个进程内再用事件循环并发运行自己的分片。
+    """
+
+    def __init__(self, workers: Optional[int] = None, use_processes: bool = True, use_async: bool = False):
+        self.workers = workers
+        self.use_processes = use_processes
+        self.use_async = use_async
+
+    def _executor(self, count: int):
+        workers = min(self.workers or count, count)
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=workers), workers
+        return ThreadPoolExecutor(max_workers=workers), workers
+
+    def run(self, accounts: Sequence[Dict]) -> Dict:
+        """运行所有账号并返回汇总结果"""
+        start = time.monotonic()
+        results: List[Dict] = []
+        
+        if accounts:
+            executor, workers = self._executor(len(accounts))
+            with executor:
+                if self.use_async:
+                    shards = [list(accounts[i::workers]) for i in range(workers)]
+                    for shard_results in self._map(executor, run_shard, shards):
+                        results.extend(shard_results)
+                else:
+                    results = list(self._map(executor, run_account, accounts))
+                    
+        return self.summarize(results, time.monotonic() - start)
+
+    def _map(self, executor, task: Callable, payloads: Sequence) -> List:
+        """分发任务，多进程运行时把各进程的指标合并到当前进程"""
+        if not self.use_processes:
+            return list(executor.map(task, payloads))
+
+        metrics, results = get_metrics(), []
+        for result, snapshot in executor.map(functools.partial(_run_isolated, task), payloads):
+            metrics.merge(snapshot)
+            results.append(result)
+        return results
+
+    @staticmethod
+    def summarize(results: List[Dict], elapsed: float) -> Dict:
+        """汇总各账号的执行结果"""
+        succeeded = sum(1 for r in results if r["success"])
+        return {
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "daily": sum(r["daily"] for r in results),
+            "extra": sum(r["extra"] for r in results),
+            "elapsed": round(elapsed, 3),
+            "accounts": results
+        }
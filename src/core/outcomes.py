@@ -0,0 +1,105 @@
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ..utils.clock import wall_time
+from ..utils.config import Config
+from ..utils.storage import JsonStore, state_path
+from .scheduler import EXTRA
+
+HOUR = 3600.0
+
+# 超过该时间没有新结果的作品不再保留，额外任务列表通常几天内就会更换
+RETENTION = 7 * 24 * HOUR
+
+
+class OutcomeCache:
+    """作品评分结果的持久缓存
+
+    按作品ID记录成功、失败次数和最近一次错误，同一进程内的账号共用。
+    资源状态异常的作品在 ttl 秒内直接跳过，不再浪费一次听歌上报、
+    一次评分请求和一个等待间隔；其余候选按历史成功率排序，尽快凑满额外任务配额。
+    """
+
+    def __init__(self, ttl: float = 24 * HOUR, store: Optional[JsonStore] = None,
+                 clock: Optional[Callable[[], float]] = None):
+        self.ttl = ttl
+        self.store = store or JsonStore("work_outcomes.json")
+        self.clock = clock or wall_time
+
+    def entry(self, work_id) -> Dict:
+        return dict(self.store.get(str(work_id)) or {})
+
+    def is_blocked(self, work_id) -> bool:
+        """作品是否在不可用期内"""
+        until = self.entry(work_id).get("until")
+        return until is not None and until > self.clock()
+
+    def success_rate(self, work_id) -> float:
+        """平滑后的历史成功率，没有记录的作品为 0.5"""
+        entry = self.entry(work_id)
+        ok, failed = entry.get("ok", 0), entry.get("failed", 0)
+        return (ok + 1) / (ok + failed + 2)
+
+    def rank(self, tasks: Iterable[Dict]) -> List[Dict]:
+        """去掉不可用的作品，其余按成功率从高到低排序，成功率相同时保持原顺序"""
+        ranked = [(self.success_rate(task["work"]["id"]), task) for task in tasks
+                  if not self.is_blocked(task["work"]["id"])]
+        ranked.sort(key=lambda pair: -pair[0])
+        return [task for _, task in ranked]
+
+    def record(self, outcomes: Iterable[Dict]) -> None:
+        """记录一批执行结果
+
+        只记录评分接口给出了响应的额外任务结果，每日任务和网络故障、熔断等失败不反映作品质量；
+        在文件锁内基于文件中的最新记录累加，其他进程同时写入的结果不会丢失；
+        整批连同过期记录的清理只写一次文件。
+        """
+        now = self.clock()
+        outcomes = [outcome for outcome in outcomes
+                    if outcome["kind"] == EXTRA and outcome.get("responded", True)]
+        if not outcomes:
+            return
+
+        def apply(data: Dict[str, Dict]) -> None:
+            for outcome in outcomes:
+                key = str(outcome["work_id"])
+                entry = dict(data.get(key) or {})
+                if outcome["success"] and not outcome.get("skipped"):
+                    entry.update(ok=entry.get("ok", 0) + 1, until=None)
+                else:
+                    entry["failed"] = entry.get("failed", 0) + 1
+                    entry["error"] = outcome["message"]
+                    # 资源状态异常的作品对所有账号都不可用，一段时间内不再尝试
+                    if outcome.get("skipped"):
+                        entry["until"] = now + self.ttl
+                entry["at"] = now
+                data[key] = entry
+            self._purge(data, now)
+
+        self.store.modify(apply)
+
+    @staticmethod
+    def _purge(data: Dict[str, Dict], now: float) -> None:
+        """去掉超过保留时间没有新结果的作品"""
+        for key in [key for key, entry in data.items() if entry.get("at", 0) + RETENTION <= now]:
+            del data[key]
+
+
+_caches: Dict[str, OutcomeCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_outcome_cache(config: Config) -> Optional[OutcomeCache]:
+    """获取进程内共享的结果缓存，配置项 outcome_ttl_hours 为 0 时返回 None"""
+    ttl = config.get("outcome_ttl_hours") * HOUR
+    if ttl <= 0:
+        return None
+    path = state_path("work_outcomes.json")
+    cache = _caches.get(path)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(path)
+            if cache is None:
+                cache = _caches[path] = OutcomeCache(ttl, JsonStore("work_outcomes.json", path))
+    cache.ttl = ttl
+    return cache
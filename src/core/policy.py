@@ -0,0 +1,160 @@
+import json
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from ..utils.config import Config
+
+# 评分决策：(评分, 标签)
+Decision = Tuple[str, str]
+Matcher = Callable[[Dict], bool]
+
+# 按字符集粗略判断作品语言，名称和歌手名中出现英文字母即视为英文
+LANGUAGE_PATTERNS = {
+    "english": re.compile("[a-zA-Z]"),
+    "japanese": re.compile("[\u3040-\u30ff]"),
+    "korean": re.compile("[\uac00-\ud7af\u1100-\u11ff]"),
+    "chinese": re.compile("[\u4e00-\u9fff]"),
+}
+
+# 单个策略最多缓存的作品决策数
+MEMO_SIZE = 4096
+
+
+def _text(work: Dict) -> str:
+    return f'{work["name"]}{work["authorName"]}'
+
+
+def _tags(work: Dict) -> List[str]:
+    """作品自带的标签，兼容字符串、字符串列表和带 name 的对象列表"""
+    tags = work.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return [str(tag.get("name", "") if isinstance(tag, dict) else tag).strip() for tag in tags]
+
+
+def _pattern(values) -> "re.Pattern":
+    """把一个或多个关键词编译为一个忽略大小写的正则"""
+    if isinstance(values, str):
+        values = [values]
+    return re.compile("|".join(re.escape(str(v)) for v in values), re.IGNORECASE)
+
+
+def _compile_matcher(rule: Dict) -> Matcher:
+    """把一条规则的匹配条件编译为判断函数，多个条件需同时满足"""
+    matchers: List[Matcher] = []
+
+    if "keyword" in rule:
+        pattern = _pattern(rule["keyword"])
+        matchers.append(lambda work, pattern=pattern: pattern.search(work["name"]) is not None)
+
+    if "author" in rule:
+        pattern = _pattern(rule["author"])
+        matchers.append(lambda work, pattern=pattern: pattern.search(work["authorName"]) is not None)
+
+    if "language" in rule:
+        language = rule["language"]
+        if language not in LANGUAGE_PATTERNS:
+            raise ValueError(f"评分规则的语言无效: {language!r}，可选 {', '.join(LANGUAGE_PATTERNS)}")
+        pattern = LANGUAGE_PATTERNS[language]
+        matchers.append(lambda work, pattern=pattern: pattern.search(_text(work)) is not None)
+
+    if "tag" in rule:
+        wanted = {rule["tag"]} if isinstance(rule["tag"], str) else set(rule["tag"])
+        matchers.append(lambda work: not wanted.isdisjoint(_tags(work)))
+
+    if not matchers:
+        raise ValueError(f"评分规则缺少匹配条件（keyword/author/language/tag）: {rule}")
+    if len(matchers) == 1:
+        return matchers[0]
+    return lambda work: all(matcher(work) for matcher in matchers)
+
+
+class ScoringPolicy:
+    """评分策略
+
+    配置中的规则在创建时编译一次，按顺序匹配，第一条命中的规则决定评分；
+    都不命中时按 score 策略：名称或歌手含英文用高一档的评分。
+    决策按 (作品ID, 名称, 歌手) 缓存，同一进程内配置相同的账号共用。
+    """
+
+    def __init__(self, strategy: Tuple[str, str], rules: Sequence[Dict] = ()):
+        plain, english = strategy
+        self.rules: List[Tuple[Matcher, Decision]] = [
+            (_compile_matcher(rule), self._decision(rule)) for rule in rules
+        ]
+        # 默认策略本身也是一条语言规则
+        self.rules.append((_compile_matcher({"language": "english"}), (english, f"{english}-A-1")))
+        self.default: Decision = (plain, f"{plain}-A-1")
+
+        self._lock = threading.Lock()
+        self._memo: Dict[Tuple, Decision] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _decision(rule: Dict) -> Decision:
+        if "score" not in rule:
+            raise ValueError(f"评分规则缺少 score: {rule}")
+        score = str(rule["score"])
+        if score not in ("1", "2", "3", "4", "5"):
+            raise ValueError(f"评分规则的评分无效: {score!r}")
+        return score, str(rule.get("tags") or f"{score}-A-1")
+
+    @staticmethod
+    def _key(work: Dict) -> Tuple:
+        return work["id"], work["name"], work["authorName"]
+
+    def _evaluate(self, work: Dict) -> Decision:
+        for matcher, decision in self.rules:
+            if matcher(work):
+                return decision
+        return self.default
+
+    def decide(self, work: Dict) -> Decision:
+        """单个作品的评分和标签"""
+        return self.decide_many([work])[0]
+
+    def decide_many(self, works: Iterable[Dict]) -> List[Decision]:
+        """批量决策，只计算尚未缓存的作品"""
+        memo = self._memo
+        decisions: List[Decision] = []
+        fresh: Dict[Tuple, Decision] = {}
+        for work in works:
+            key = self._key(work)
+            decision = memo.get(key) or fresh.get(key)
+            if decision is None:
+                decision = fresh[key] = self._evaluate(work)
+            decisions.append(decision)
+
+        with self._lock:
+            if fresh:
+                if len(memo) + len(fresh) > MEMO_SIZE:
+                    memo.clear()
+                memo.update(fresh)
+            self.misses += len(fresh)
+            self.hits += len(decisions) - len(fresh)
+        return decisions
+
+
+_policies: Dict[str, ScoringPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(config: Config) -> ScoringPolicy:
+    """获取配置对应的评分策略，评分配置相同的账号共用同一个策略及其缓存"""
+    rules = config.get("score_rules") or []
+    signature = json.dumps([config.score_strategy, rules], sort_keys=True, ensure_ascii=False)
+    policy = _policies.get(signature)
+    if policy is None:
+        with _policies_lock:
+            policy = _policies.get(signature)
+            if policy is None:
+                policy = _policies[signature] = ScoringPolicy(config.score_strategy, rules)
+    return policy
+
+
+def clear_policies() -> None:
+    """清空共享的评分策略"""
+    with _policies_lock:
+        _policies.clear()
@@ -0,0 +1,102 @@
+import hashlib
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..utils.clock import wall_time
+from ..utils.storage import JsonStore
+
+DAY = 86400.0
+
+# 未能获取过期时间时，按 MUSIC_U 通常的有效期估算
+DEFAULT_LIFETIME = 15 * DAY
+
+
+class RefreshPlanner:
+    """按 Cookie 过期时间安排刷新
+
+    记录每个账号 Cookie 的签发时间、过期时间、首次和最近一次验证通过以及登录失效的时间。
+    没有签发和过期记录时（如未配置 GH_TOKEN，过期时间无法写回 Secrets），
+    按首次验证通过的时间估算签发时间，不必每次都重新登录。
+    只在临近过期（提前 margin 秒）或出现登录失效后才需要刷新；
+    多个账号的刷新时间按账号名散列错开到 spread 秒的窗口内，避免集中登录。
+    """
+
+    def __init__(self, margin: float = 3 * DAY, spread: float = DAY, store: Optional[JsonStore] = None,
+                 clock: Callable[[], float] = wall_time):
+        self.margin = margin
+        self.spread = spread
+        self.store = store or JsonStore("cookie_state.json")
+        self.clock = clock
+
+    @classmethod
+    def from_config(cls, config) -> "RefreshPlanner":
+        return cls(margin=config.get("refresh_margin_days") * DAY, spread=config.get("refresh_spread_hours") * 3600)
+
+    def state(self, account: str) -> Dict:
+        return dict(self.store.get(account) or {})
+
+    def _update(self, account: str, **fields) -> None:
+        state = self.state(account)
+        state.update(fields)
+        self.store.set(account, state)
+
+    def record_login(self, account: str, expires: Optional[float] = None) -> None:
+        """记录一次成功登录，expires 为 Set-Cookie 中 MUSIC_U 的过期时间"""
+        now = self.clock()
+        self._update(account, issued=now, expires=expires, validated=now, first_valid=now, auth_failed=None)
+
+    def record_valid(self, account: str) -> None:
+        """记录一次验证通过，首次验证通过的时间只记录一次"""
+        now = self.clock()
+        self._update(account, validated=now, first_valid=self.state(account).get("first_valid") or now)
+
+    def record_auth_failure(self, account: str) -> None:
+        """记录登录失效，已记录时保留第一次失效的时间"""
+        if not self.state(account).get("auth_failed"):
+            self._update(account, auth_failed=self.clock())
+
+    def seed(self, account: str, expires: Optional[float]) -> None:
+        """没有本地记录时，用外部保存的过期时间初始化（如 GitHub Actions 中的 COOKIE_EXPIRES）"""
+        if expires and not self.state(account).get("expires"):
+            self._update(account, expires=expires)
+
+    def _offset(self, account: str) -> float:
+        """账号在错开窗口内的固定位置"""
+        digest = hashlib.sha1(account.encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") / 2 ** 32 * self.spread
+
+    def expires_at(self, account: str) -> Optional[float]:
+        """Cookie 的过期时间，没有记录时按签发时间或首次验证通过的时间估算"""
+        state = self.state(account)
+        if state.get("expires"):
+            return float(state["expires"])
+        issued = state.get("issued") or state.get("first_valid")
+        if issued:
+            return float(issued) + DEFAULT_LIFETIME
+        return None
+
+    def due_at(self, account: str) -> Tuple[float, str]:
+        """下一次需要刷新的时间和原因"""
+        state = self.state(account)
+        if state.get("auth_failed"):
+            return float(state["auth_failed"]), "登录状态已失效"
+
+        expires = self.expires_at(account)
+        if expires is None:
+            return self.clock(), "没有 Cookie 的过期记录"
+        return expires - self.margin - self._offset(account), "Cookie 即将过期"
+
+    def should_refresh(self, account: str) -> Tuple[bool, str]:
+        """现在是否需要刷新，以及原因或下一次刷新的时间"""
+        due, reason = self.due_at(account)
+        if due <= self.clock():
+            return True, reason
+        return False, f"Cookie 将于 {time.strftime('%Y-%m-%d %H:%M', time.localtime(due))} 后刷新"
+
+    def plan(self, accounts: Iterable[str]) -> List[Tuple[float, str, str]]:
+        """多个账号的刷新计划，按时间排序：(刷新时间, 账号, 原因)"""
+        schedule = []
+        for account in accounts:
+            due, reason = self.due_at(account)
+            schedule.append((due, account, reason))
+        return sorted(schedule)
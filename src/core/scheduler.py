@@ -0,0 +1,198 @@
+import contextvars
+import heapq
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..utils.logger import Logger, log_context
+from ..utils.retry import CircuitOpenError
+from .signer import SignRejected, Signer
+
+DAILY = "daily"
+EXTRA = "extra"
+
+# 每天最多完成的额外评分任务数
+EXTRA_LIMIT = 7
+
+# 数字越小越先执行
+PRIORITIES = {DAILY: 0, EXTRA: 1}
+
+
+class WorkItem:
+    """队列中的一个待评分作品"""
+
+    __slots__ = ("kind", "task")
+
+    def __init__(self, kind: str, task: Dict):
+        self.kind = kind
+        self.task = task
+
+    @property
+    def work(self) -> Dict:
+        return self.task["work"]
+
+
+class WorkQueue:
+    """合并每日任务和额外任务的工作队列
+
+    同一作品只入队一次，每日任务优先；额外任务按剩余配额出队，
+    已出队但尚未完成的额外任务也计入配额，失败后释放。
+    """
+
+    def __init__(self, extra_limit: int = EXTRA_LIMIT):
+        self.extra_limit = extra_limit
+        self.extra_quota = 0
+        self.extra_done = 0
+        self._extra_in_flight = 0
+        self._heap: List[Tuple[int, int, WorkItem]] = []
+        self._seen = set()
+        self._order = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def _push(self, kind: str, task: Dict) -> bool:
+        work_id = task["work"]["id"]
+        if work_id in self._seen:
+            return False
+        self._seen.add(work_id)
+        heapq.heappush(self._heap, (PRIORITIES[kind], self._order, WorkItem(kind, task)))
+        self._order += 1
+        return True
+
+    def add_daily(self, tasks: Iterable[Dict]) -> int:
+        """加入未完成的每日任务，返回入队数量"""
+        return sum(self._push(DAILY, task) for task in tasks)
+
+    def add_extra(self, tasks: Iterable[Dict], completed_count: int = 0) -> int:
+        """加入额外任务候选，已在每日任务中的作品会被去重，返回入队数量"""
+        self.extra_quota = max(0, self.extra_limit - completed_count)
+        return sum(self._push(EXTRA, task) for task in tasks)
+
+    def works(self) -> List[Dict]:
+        """队列中所有待评分的作品"""
+        return [item.work for _, _, item in self._heap]
+
+    def pop(self) -> Optional[WorkItem]:
+        """取出下一个需要执行的作品，额外任务配额已满时返回 None"""
+        if not self._heap:
+            return None
+        item = self._heap[0][2]
+        if item.kind == EXTRA:
+            if self.extra_done + self._extra_in_flight >= self.extra_quota:
+                return None
+            self._extra_in_flight += 1
+        heapq.heappop(self._heap)
+        return item
+
+    def complete(self, item: WorkItem, success: bool) -> None:
+        """记录作品执行结果"""
+        if item.kind == EXTRA:
+            self._extra_in_flight -= 1
+            if success:
+                self.extra_done += 1
+
+
+def outcome(item: WorkItem, success: bool, message: str = "", skipped: bool = False,
+            responded: bool = True) -> Dict:
+    """单个作品的执行结果，skipped 表示作品资源状态异常，没有出错但也没有评分
+
+    responded 表示评分接口是否给出了响应，网络故障、熔断等失败与作品本身无关
+    """
+    return {
+        "kind": item.kind,
+        "work_id": item.work["id"],
+        "name": item.work["name"],
+        "success": success,
+        "skipped": skipped,
+        "message": message,
+        "responded": responded
+    }
+
+
+class PacedExecutor:
+    """按账号节奏执行工作队列
+
+    当前作品等待评分时，后台预取下一个作品：额外任务先上报听歌记录，
+    然后预先加密评分请求。作品之间只保留一次由限流器控制的等待。
+    接口熔断时剩余作品不再处理，尽快结束本次运行。
+    """
+
+    def __init__(self, signer: Signer, logger: Logger, report: Optional[Callable[[Dict], None]] = None):
+        self.signer = signer
+        self.logger = logger
+        self.report = report
+
+    def _needs_report(self, item: WorkItem) -> bool:
+        """额外任务评分前需要先上报听歌记录，今日已评分的作品不必上报"""
+        return item.kind == EXTRA and not self.signer.is_signed(item.work)
+
+    def _prepare_failed(self, item: WorkItem, error: Exception) -> None:
+        self.logger.error(f"处理{'额外' if item.kind == EXTRA else '每日'}任务失败 - {item.work['name']}: {str(error)}")
+
+    def _prepare(self, item: WorkItem) -> Dict:
+        """预处理单个作品"""
+        try:
+            with log_context(work=item.work["id"]):
+                if self._needs_report(item):
+                    self.report(item.work)
+                return self.signer.prepare(item.work, is_extra=item.kind == EXTRA)
+
+        except Exception as e:
+            self._prepare_failed(item, e)
+            raise
+
+    def _prefetch(self, executor: ThreadPoolExecutor, queue: WorkQueue) -> Optional[Tuple[WorkItem, Future]]:
+        item = queue.pop()
+        if item is None:
+            return None
+        # 预取线程沿用当前的日志上下文
+        return item, executor.submit(contextvars.copy_context().run, self._prepare, item)
+
+    def _settle(self, queue: WorkQueue, item: WorkItem, result, outcomes: List[Dict]) -> bool:
+        """记录作品的执行结果，result 为是否评分成功或执行中的异常；返回是否继续处理剩余作品"""
+        success, skipped, message, stopped = False, False, "", False
+        responded = not isinstance(result, Exception) or isinstance(result, SignRejected)
+        if isinstance(result, CircuitOpenError):
+            message = str(result)
+            self.logger.error(f"接口暂时不可用，停止处理剩余作品: {message}")
+            stopped = True
+        elif isinstance(result, Exception):
+            message = str(result)
+            self.logger.warning(f"处理歌曲 {item.work['name']} 失败，尝试下一个: {message}")
+        else:
+            success, skipped = True, not result
+            if skipped:
+                message = "资源状态异常"
+
+        # 跳过的额外任务不占用配额，由下一个候选补上
+        queue.complete(item, success and not skipped)
+        outcomes.append(outcome(item, success, message, skipped, responded))
+        if success and not skipped and item.kind == EXTRA:
+            self.logger.info(f"成功完成第 {queue.extra_done}/{queue.extra_quota} 个额外评分任务")
+        return not stopped
+
+    def run(self, queue: WorkQueue) -> List[Dict]:
+        """执行队列中的所有作品，返回每个作品的执行结果"""
+        outcomes: List[Dict] = []
+        self.signer.plan(queue.works())
+
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            pending = self._prefetch(prefetcher, queue)
+            while pending is not None:
+                item, future = pending
+                pending = None
+                try:
+                    prepared = future.result()
+                    # 当前作品等待评分期间，后台预取下一个作品
+                    pending = self._prefetch(prefetcher, queue)
+                    with log_context(work=item.work["id"]):
+                        result = self.signer.sign(item.work, is_extra=item.kind == EXTRA, prepared=prepared)
+                except Exception as e:
+                    result = e
+
+                if not self._settle(queue, item, result, outcomes):
+                    break
+                if pending is None:
+                    pending = self._prefetch(prefetcher, queue)
+
+        return outcomes
@@ -1,140 +1,250 @@
-import base64
-import codecs
-import json
-import random
-import re
-import string
 import time
-from typing import Tuple
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 import requests
-from Crypto.Cipher import AES
 
+from ..utils.account import account_key
+from ..utils.checkpoint import DONE, PENDING, SKIPPED, CheckpointStore, get_checkpoint_store
 from ..utils.config import Config
+from ..utils.http import TASK_ENDPOINTS
+from ..utils.json_codec import response_json
 from ..utils.logger import Logger
+from ..utils.metrics import API_RESPONSES, RATE_LIMITED, get_metrics, record_operation
+from ..utils.rate_limiter import RateLimiter, get_rate_limiter
+from ..utils.retry import CircuitOpenError, Retrier, get_circuit_breaker
+from .policy import ScoringPolicy, get_policy
+from .weapi import WeapiCodec, get_codec
+
+
+class SignRejected(RuntimeError):
+    """评分接口返回了业务错误，与网络故障、熔断等不同，说明作品本身可能有问题"""
 
 
 class Signer:
-    def __init__(self, session: requests.Session, task_id: str, logger: Logger, config: Config):
+    def __init__(self, session: requests.Session, task_id: str, logger: Logger, config: Config,
+                 codec: Optional[WeapiCodec] = None, limiter: Optional[RateLimiter] = None,
+                 checkpoint: Optional[CheckpointStore] = None, policy: Optional[ScoringPolicy] = None):
         self.session = session
         self.task_id = task_id
         self.logger = logger
         self.config = config
+        self.codec = codec or get_codec()
+        self.limiter = limiter or get_rate_limiter()
+        self.checkpoint = checkpoint or get_checkpoint_store(config)
+        self.policy = policy or get_policy(config)
+        self.account = account_key(session.cookies.get("MUSIC_U"))
+        self.retrier = Retrier(logger)
+        self.max_retries = config.max_retries
         self.sign_url = "https://interface.music.163.com/weapi/music/partner/work/evaluate"
-        
-        # 加密相关常量
-        self.random_str = self._generate_random_string(16)
-        self.pub_key = "010001"
-        self.modulus = "00e0b509f6259df8642dbc35662901477df22677ec152b5ff68ace615bb7b725152b3ab17a876aea8a5aa76d2e417629ec4ee341f56135fccf695280104e0312ecbda92557c93870114af6c9d05c4f7f0c3685b7a46bee255932575cce10b424d813cfe4875d3e82047b97ddef52741d546b8e289dc6935b3ece0462db0a22b8e7"
-        self.iv = "0102030405060708"
-        self.aes_key = "0CoJUm6Qyw8W8jud"
-        
-        self.name_pattern = re.compile('.*[a-zA-Z].*')
-
-    def _generate_random_string(self, length: int) -> str:
-        """生成指定长度的随机字符串"""
-        return ''.join(random.choice(string.ascii_letters + string.digits) for _ in range(length))
-
-    def _add_to_16(self, text: str) -> bytes:
-        """将字符串补充到16的倍数"""
-        pad = 16 - len(text) % 16
-        text = text + chr(pad) * pad
-        return text.encode('utf-8')
-
-    def _aes_encrypt(self, text: str, key: str) -> str:
-        """AES加密"""
-        encryptor = AES.new(key.encode('utf-8'), AES.MODE_CBC, self.iv.encode('utf-8'))
-        encrypt_text = encryptor.encrypt(self._add_to_16(text))
-        return base64.b64encode(encrypt_text).decode('utf-8')
-
-    def _get_params(self, data: dict) -> str:
-        """获取加密后的参数"""
-        text = json.dumps(data)
-        params = self._aes_encrypt(text, self.aes_key)
-        params = self._aes_encrypt(params, self.random_str)
-        return params
-
-    def _get_enc_sec_key(self) -> str:
-        """获取加密密钥"""
-        text = self.random_str[::-1]
-        rs = int(codecs.encode(text.encode('utf-8'), 'hex_codec'), 16)
-        rs = pow(rs, int(self.pub_key, 16), int(self.modulus, 16))
-        return format(rs, 'x').zfill(256)
 
     def _get_score_and_tag(self, work: dict) -> Tuple[str, str]:
         """根据作品信息获取评分和标签"""
-        # 获取评分策略，默认为4（3-4分）
-        score_strategy = int(self.config.get("score", 3))
+        return self.policy.decide(work)
+
+    def plan(self, works: Iterable[dict]) -> None:
+        """批量计算一组作品的评分，之后逐个评分时直接命中缓存"""
+        self.policy.decide_many(works)
+
+    def _build_data(self, work: dict, is_extra: bool = False) -> Tuple[dict, str]:
+        """构建评分请求数据"""
+        csrf = str(self.session.cookies["__csrf"])
+        score, tag = self._get_score_and_tag(work)
         
-        # 检查名称中是否包含英文
-        has_english = bool(self.name_pattern.match(work["name"] + work["authorName"]))
+        data = {
+            "taskId": self.task_id,
+            "workId": work['id'],
+            "score": score,
+            "tags": tag,
+            "customTags": "%5B%5D",
+            "comment": "",
+            "syncYunCircle": "true",
+            "csrf_token": csrf
+        }
         
-        # 根据策略和名称决定评分
-        if score_strategy == 1:  # 1-2分策略
-            score = "2" if has_english else "1"
-        elif score_strategy == 2:  # 2-3分策略
-            score = "3" if has_english else "2"
-        elif score_strategy == 3:  # 3-4分策略（默认）
-            score = "4" if has_english else "3"
-        else:  # 固定4分
-            score = "4"
+        # 额外任务需要添加标记
+        if is_extra:
+            data["extraResource"] = "true"
             
-        return score, f"{score}-A-1"
+        return data, score
 
-    def sign(self, work: dict, is_extra: bool = False) -> None:
-        """为作品评分"""
-        try:
-            # 使用配置的等待时间
-            delay = self.config.get_wait_time()
-            self.logger.info(f"等待 {delay:.1f} 秒后继续...")
-            time.sleep(delay)
+    def prepare(self, work: dict, is_extra: bool = False) -> Dict:
+        """预先构建并加密评分请求，可在等待期间提前完成"""
+        data, score = self._build_data(work, is_extra)
+        return {"data": data, "score": score, "params": self.codec.encrypt(data)}
 
-            csrf = str(self.session.cookies["__csrf"])
-            score, tag = self._get_score_and_tag(work)
-            
-            data = {
-                "taskId": self.task_id,
-                "workId": work['id'],
-                "score": score,
-                "tags": tag,
-                "customTags": "%5B%5D",
-                "comment": "",
-                "syncYunCircle": "true",
-                "csrf_token": csrf
-            }
-            
-            # 额外任务需要添加标记
-            if is_extra:
-                data["extraResource"] = "true"
-            
-            params = {
-                "params": self._get_params(data),
-                "encSecKey": self._get_enc_sec_key()
-            }
-            
-            self.logger.debug(f"评分请求数据: {data}")
-            
-            response = self.session.post(
-                url=f'{self.sign_url}?csrf_token={csrf}',
-                data=params
-            ).json()
-            
-            self.logger.debug(f"评分响应数据: {response}")
+    def _invalidate_task_cache(self) -> None:
+        """评分成功后任务状态已变化，失效会话中缓存的任务列表"""
+        cache = getattr(self.session, "cache", None)
+        if cache is not None:
+            cache.invalidate(*TASK_ENDPOINTS)
+
+    def _checkpoint_key(self, work: dict) -> Optional[str]:
+        if self.checkpoint is None:
+            return None
+        return self.checkpoint.key(self.account, self.task_id, work["id"], "sign")
+
+    def is_signed(self, work: dict) -> bool:
+        """检查点中记录作品今日是否已评分或已确定跳过"""
+        key = self._checkpoint_key(work)
+        return key is not None and self.checkpoint.is_done(key)
+
+    def _signed_result(self, work: dict) -> bool:
+        """已处理过的作品是否评分成功，资源状态异常而跳过的作品不算"""
+        return self.checkpoint.status(self._checkpoint_key(work)) == DONE
+
+    def _interrupted(self, work: dict) -> bool:
+        """今日已提交过评分但没有记录结果：进程可能在请求发出后中断，服务端是否已评分未知"""
+        key = self._checkpoint_key(work)
+        return key is not None and self.checkpoint.status(key) == PENDING
+
+    def _status_request(self, is_extra: bool) -> Callable:
+        """查询作品所在任务列表的发送函数，先失效缓存以取得服务端的最新状态"""
+        self._invalidate_task_cache()
+        url = TASK_ENDPOINTS[1 if is_extra else 0]
+        return lambda: self.session.get(url, headers={"Referer": "https://mp.music.163.com/"})
+
+    def _resolve_interrupted(self, work: dict, raw: requests.Response, cause: str = "上次提交后中断") -> bool:
+        """按任务列表判断结果未知的评分是否已生效，已生效时记为完成，返回是否已评分"""
+        data = response_json(raw).get("data")
+        tasks = data.get("works", []) if isinstance(data, dict) else data or []
+        completed = any(t["work"]["id"] == work["id"] and t.get("completed") for t in tasks)
+        if completed:
+            self.checkpoint.finish(self._checkpoint_key(work), DONE, 200)
+            self.logger.info(f'{work["name"]}「{work["authorName"]}」{cause}，服务端已记录评分，跳过')
+        else:
+            self.logger.info(f'{work["name"]}「{work["authorName"]}」{cause}，服务端未记录评分，重新提交')
+        return completed
+
+    def _begin_checkpoint(self, work: dict) -> Optional[str]:
+        """登记即将评分的作品，返回幂等键"""
+        key = self._checkpoint_key(work)
+        if key is not None:
+            self.checkpoint.begin(key, self.account, self.task_id, work["id"], "sign")
+        return key
+
+    def _finish_checkpoint(self, key: Optional[str], response: dict) -> None:
+        """记录评分结果，资源状态异常等无需重试的响应记为跳过"""
+        if key is not None:
+            self.checkpoint.finish(key, DONE if response["code"] == 200 else SKIPPED, response["code"])
+
+    def _handle_response(self, work: dict, score: str, response: dict, attempt: int) -> bool:
+        """处理评分响应，返回是否需要重试"""
+        get_metrics().inc(API_RESPONSES, operation="sign", code=response["code"])
+        if response["code"] == 200:
+            self.limiter.on_success(self.sign_url)
+            self._invalidate_task_cache()
+            self.logger.info(f'{work["name"]}「{work["authorName"]}」评分完成：{score}分')
+            return False
             
-            if response["code"] == 200:
-                self.logger.info(f'{work["name"]}「{work["authorName"]}」评分完成：{score}分')
-            else:
-                error_msg = response.get('message') or response.get('msg', '未知错误')
-                if "频繁" in error_msg:
-                    retry_delay = self.config.get_wait_time()
-                    self.logger.info(f"遇到频率限制，等待 {retry_delay:.1f} 秒后重试...")
-                    time.sleep(retry_delay)
-                    self.sign(work, is_extra)
-                elif response["code"] == 405 and "资源状态异常" in error_msg:
-                    self.logger.warning(f'歌曲「{work["name"]}」资源状态异常，跳过')
-                else:
-                    raise RuntimeError(f"评分失败: {error_msg} (响应码: {response.get('code')})")
-                
+        error_msg = response.get('message') or response.get('msg', '未知错误')
+        if "频繁" in error_msg:
+            get_metrics().inc(RATE_LIMITED, operation="sign")
+            self.limiter.on_throttled(self.sign_url)
+            self.logger.info(f"遇到频率限制，稍后重试 ({attempt + 1}/{self.max_retries})...")
+            return True
+        elif response["code"] == 405 and "资源状态异常" in error_msg:
+            self.logger.warning(f'歌曲「{work["name"]}」资源状态异常，跳过')
+            return False
+        else:
+            raise SignRejected(f"评分失败: {error_msg} (响应码: {response.get('code')})")
+
+    def _already_signed(self, work: dict) -> Optional[bool]:
+        """中断后重跑或重试时，已评分的作品不再重复提交；返回之前是否评分成功，未处理过时返回 None"""
+        if not self.is_signed(work):
+            return None
+        self.logger.info(f'{work["name"]}「{work["authorName"]}」今日已评分，跳过')
+        return self._signed_result(work)
+
+    def _next_wait(self) -> float:
+        """每次提交前需要等待的时间，同一账号两次评分之间至少间隔配置的等待时间"""
+        # 接口熔断时不必再等待
+        get_circuit_breaker().check(self.sign_url)
+        wait = self.limiter.reserve_pace(self.account, self.config.get_wait_time())
+        self.logger.info(f"等待 {wait:.1f} 秒后继续...")
+        return wait
+
+    def _request(self, prepared: Dict) -> Tuple[str, Callable]:
+        """评分请求的地址和发送函数，同步和异步会话共用"""
+        self.logger.debug("评分请求数据: %s", prepared["data"])
+        url = f'{self.sign_url}?csrf_token={prepared["data"]["csrf_token"]}'
+        return url, lambda: self.session.post(url=url, data=prepared["params"])
+
+    def _complete(self, work: dict, prepared: Dict, raw: requests.Response, attempt: int,
+                  key: Optional[str]) -> Optional[bool]:
+        """处理一次提交的响应，返回是否评分成功，需要重试时返回 None"""
+        response = response_json(raw)
+        self.logger.debug("评分响应数据: %s", response)
+        if self._handle_response(work, prepared["score"], response, attempt):
+            return None
+        self._finish_checkpoint(key, response)
+        return response["code"] == 200
+
+    @staticmethod
+    def _server_error(raw: requests.Response) -> Optional[str]:
+        """评分接口返回 5xx 时的原因：评分可能已被处理，重发前需要先查询任务状态"""
+        return f"评分接口返回 {raw.status_code}" if raw.status_code >= 500 else None
+
+    def _server_error_backoff(self, attempt: int) -> float:
+        """5xx 且服务端未记录评分时，返回重发前的退避时间
+
+        状态查询与评分接口同一主机，查询成功会清零熔断器的失败计数，这里把 5xx 补记为失败。
+        """
+        get_circuit_breaker().record(self.sign_url, False)
+        return self.retrier.backoff(self.sign_url, attempt)
+
+    def _retries_exhausted(self) -> RuntimeError:
+        return RuntimeError(f"评分失败: 重试 {self.max_retries} 次后仍未成功")
+
+    @contextmanager
+    def _operation(self, work: dict) -> Iterator[Dict]:
+        """记录评分耗时和结果，并统一转换异常"""
+        start, state = time.perf_counter(), {"result": "failed"}
+        try:
+            yield state
+        except CircuitOpenError as e:
+            # 保留异常类型，执行器据此停止处理剩余作品
+            self.logger.error(f'歌曲「{work["name"]}」评分异常：{str(e)}')
+            raise
         except Exception as e:
             self.logger.error(f'歌曲「{work["name"]}」评分异常：{str(e)}')
-            raise RuntimeError(f"评分过程出错: {str(e)}") 
\ No newline at end of file
+            error = SignRejected if isinstance(e, SignRejected) else RuntimeError
+            raise error(f"评分过程出错: {str(e)}")
+        finally:
+            record_operation("sign", start, state["result"])
+
+    def sign(self, work: dict, is_extra: bool = False, prepared: Optional[Dict] = None) -> bool:
+        """为作品评分，遇到频率限制或 5xx 时有限次重试；可传入预先准备好的请求数据
+
+        返回是否评分成功，资源状态异常而跳过时返回 False
+        """
+        with self._operation(work) as state:
+            signed = self._already_signed(work)
+            if signed is not None:
+                state["result"] = "skipped"
+                return signed
+                
+            # 上次提交后中断的作品先查询状态，服务端已评分时不再重复提交
+            if self._interrupted(work) and self._resolve_interrupted(work, self._status_request(is_extra)()):
+                state["result"] = "skipped"
+                return True
+                
+            prepared = prepared or self.prepare(work, is_extra)
+            key = self._begin_checkpoint(work)
+            
+            for attempt in range(self.max_retries + 1):
+                self.limiter.sleep(self._next_wait(), "pace")
+                raw = self.retrier.call(*self._request(prepared))
+                cause = self._server_error(raw)
+                if cause:
+                    if self._resolve_interrupted(work, self._status_request(is_extra)(), cause):
+                        state["result"] = "ok"
+                        return True
+                    self.limiter.sleep(self._server_error_backoff(attempt), "retry")
+                    continue
+                signed = self._complete(work, prepared, raw, attempt, key)
+                if signed is not None:
+                    state["result"] = "ok"
+                    return signed
+                    
+            raise self._retries_exhausted()
@@ -3,26 +3,75 @@ from typing import Dict, Optional, Tuple
 
 from ...utils.auth import AuthService
 from ...utils.github import GitHubService
+from ...utils.http import create_session
 from ...utils.logger import Logger
 from ...utils.notification import NotificationService
+from ...validators.cookie import CookieValidator
+from ..refresh_planner import RefreshPlanner
+
+# 登录凭据的配置项和对应的环境变量
+CREDENTIAL_ENV = {
+    "netease_phone": "NETEASE_PHONE",
+    "netease_password": "NETEASE_PASSWORD",
+    "netease_md5_password": "NETEASE_MD5_PASSWORD"
+}
+
+
+def env_credentials(config: Optional[Dict] = None) -> Dict[str, Optional[str]]:
+    """登录凭据，配置项优先，未配置时读取环境变量"""
+    config = config or {}
+    return {key: config.get(key) or os.environ.get(env) for key, env in CREDENTIAL_ENV.items()}
 
 
 class CookieRefreshTask:
-    def __init__(self, logger: Logger, notifier: Optional[NotificationService] = None):
+    def __init__(self, logger: Logger, notifier: Optional[NotificationService] = None,
+                 planner: Optional[RefreshPlanner] = None, account: str = "default",
+                 github_service: Optional[GitHubService] = None):
         self.logger = logger
         self.notifier = notifier
         self.auth_service = AuthService(logger)
-        self.github_service = GitHubService(logger)
+        # GitHub 客户端在真正需要更新 Secrets 时才创建
+        self.github_service = github_service
+        self.planner = planner or RefreshPlanner()
+        self.account = account
+        # 最近一次登录获取的 Cookie
+        self.cookies: Optional[Dict[str, str]] = None
+
+    def check(self, cookies: Optional[Dict[str, str]] = None) -> Tuple[bool, str]:
+        """判断是否需要刷新：先验证当前的 Cookie，再按过期时间判断，返回 (是否刷新, 原因)"""
+        if cookies and cookies.get("Cookie_MUSIC_U") and cookies.get("Cookie___csrf"):
+            session = create_session({"MUSIC_U": cookies["Cookie_MUSIC_U"], "__csrf": cookies["Cookie___csrf"]})
+            is_valid, message = CookieValidator(session, self.logger).validate()
+            if is_valid:
+                self.planner.record_valid(self.account)
+            else:
+                self.logger.warning(f"当前 Cookie 验证失败: {message}")
+                self.planner.record_auth_failure(self.account)
+        return self.planner.should_refresh(self.account)
+
+    def _github(self) -> Optional[GitHubService]:
+        """获取 GitHub 客户端，未配置 GH_TOKEN 或 GH_REPO 时返回 None"""
+        if self.github_service is None:
+            try:
+                self.github_service = GitHubService(self.logger)
+            except ValueError as e:
+                self.logger.info(f"{str(e)}，跳过更新 GitHub Secrets")
+                return None
+        return self.github_service
         
-    def execute(self) -> bool:
-        """执行Cookie刷新任务"""
+    def execute(self, credentials: Optional[Dict[str, Optional[str]]] = None, update_secrets: bool = True) -> bool:
+        """执行Cookie刷新任务
+
+        credentials 为账号的登录凭据，默认读取环境变量；update_secrets 为 False 时新 Cookie 只在本地使用。
+        """
         try:
             self.logger.info("开始执行Cookie刷新任务")
             
             # 获取登录凭据
-            phone = os.environ.get("NETEASE_PHONE")
-            password = os.environ.get("NETEASE_PASSWORD")
-            md5_password = os.environ.get("NETEASE_MD5_PASSWORD")
+            credentials = env_credentials() if credentials is None else credentials
+            phone = credentials.get("netease_phone")
+            password = credentials.get("netease_password")
+            md5_password = credentials.get("netease_md5_password")
             
             if not phone:
                 self.logger.error("未设置手机号，无法执行自动登录")
@@ -58,14 +107,29 @@ class CookieRefreshTask:
                     )
                 return False
                 
+            self.cookies = cookies
+            self.planner.record_login(self.account, self.auth_service.expires)
+            
+            github = self._github() if update_secrets else None
+            if github is None:
+                if self.notifier:
+                    self.notifier.send_notification(
+                        "网易云音乐合伙人 - Cookie更新成功",
+                        "已成功获取新的Cookie，未更新GitHub Secrets"
+                    )
+                return True
+            
             # 更新GitHub Secrets
             # 这里需要转换Cookie键名，使其与GitHub Actions中使用的名称匹配
             secrets_to_update = {
                 "MUSIC_U": cookies.get("Cookie_MUSIC_U", ""),
-                "CSRF": cookies.get("Cookie___csrf", "")
+                "CSRF": cookies.get("Cookie___csrf", ""),
+                # 过期时间一并保存，没有本地状态的 GitHub Actions 据此判断下次何时刷新；
+                # 未能获取时按签发时间估算
+                "COOKIE_EXPIRES": str(int(self.planner.expires_at(self.account)))
             }
             
-            update_success = self.github_service.update_cookies(secrets_to_update)
+            update_success = github.update_cookies(secrets_to_update)
             
             if update_success:
                 self.logger.info("成功更新GitHub Secrets中的Cookie")
@@ -1,5 +1,7 @@
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
+from ...utils.json_codec import response_json
+from ..scheduler import PacedExecutor, WorkQueue
 from ..signer import Signer
 from .base import BaseTask
 
@@ -23,7 +25,11 @@ class DailyTask(BaseTask):
 
     def _get_daily_tasks(self) -> Tuple[bool, Dict]:
         """获取每日任务"""
-        response = self.session.get(url=self.api["task_data"]).json()
+        response = response_json(self.session.get(url=self.api["task_data"]))
+        return self._parse_daily_tasks(response)
+
+    def _parse_daily_tasks(self, response: Dict) -> Tuple[bool, Dict]:
+        """解析每日任务响应"""
         task_data = response.get("data", {})
         
         count = task_data.get("count", 0)
@@ -34,14 +40,27 @@ class DailyTask(BaseTask):
         self.logger.info(f'今日任务：{"已完成" if complete else "未完成"}{today_task}')
         return complete, task_data
 
-    def _process_tasks(self, task_data: Dict) -> None:
-        """处理未完成的任务"""
-        self.logger.info("开始评分...")
-        signer = Signer(self.session, task_data["id"], self.logger, self.config)
-        
+    def _pending_tasks(self, task_data: Dict) -> List[Dict]:
+        """记录已完成的任务并返回未完成的任务"""
+        pending = []
         for task in task_data.get("works", []):
             work = task["work"]
             if task["completed"]:
                 self.logger.info(f'{work["name"]}「{work["authorName"]}」已有评分：{int(task["score"])}分')
             else:
-                signer.sign(work) 
\ No newline at end of file
+                pending.append(task)
+        return pending
+
+    def _process_tasks(self, task_data: Dict) -> int:
+        """处理未完成的任务，返回本次评分数量"""
+        self.logger.info("开始评分...")
+        queue = WorkQueue()
+        queue.add_daily(self._pending_tasks(task_data))
+        
+        signer = Signer(self.session, task_data["id"], self.logger, self.config)
+        outcomes = PacedExecutor(signer, self.logger).run(queue)
+        
+        failed = [o for o in outcomes if not o["success"]]
+        if failed:
+            raise RuntimeError(f"{len(failed)} 个每日任务评分失败: {failed[0]['message']}")
+        return len(outcomes) 
\ No newline at end of file
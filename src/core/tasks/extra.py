@@ -1,9 +1,16 @@
-import json
-import random
 import time
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
+from src.core.outcomes import get_outcome_cache
+from src.core.scheduler import PacedExecutor, WorkQueue
 from src.core.signer import Signer
+from src.core.weapi import get_codec
+from src.utils.account import account_key
+from src.utils.checkpoint import DONE, get_checkpoint_store
+from src.utils.json_codec import response_json
+from src.utils.metrics import API_RESPONSES, RATE_LIMITED, get_metrics, record_operation
+from src.utils.rate_limiter import get_rate_limiter
+from src.utils.retry import Retrier
 
 
 class ExtraTask:
@@ -15,55 +22,49 @@ class ExtraTask:
             "extra_list": "https://interface.music.163.com/api/music/partner/extra/wait/evaluate/work/list",
             "report_listen": "https://interface.music.163.com/weapi/partner/resource/interact/report"
         }
-        self.signer = Signer(session, "", logger, config)  # task_id 为空字符串，因为上报听歌不需要
-
-    def process_extra_tasks(self, task_id: str) -> None:
-        """处理额外的评分任务"""
+        self.codec = get_codec()
+        self.limiter = get_rate_limiter()
+        self.retrier = Retrier(logger)
+        self.signer: Optional[Signer] = None
+        self.checkpoint = get_checkpoint_store(config)
+        self.outcome_cache = get_outcome_cache(config)
+        self.account = account_key(session.cookies.get("MUSIC_U"))
+
+    def process_extra_tasks(self, task_id: str) -> int:
+        """处理额外的评分任务，返回本次成功评分数量"""
         try:
             extra_tasks, completed_count = self._get_extra_tasks()
             
             # 如果已经完成7个任务，直接返回
             if completed_count >= 7:
                 self.logger.info(f"今日已完成 {completed_count} 个额外评分任务，已达到每日上限")
-                return
+                return 0
                 
             if not extra_tasks:
                 self.logger.info(f"额外评定完成数: {completed_count}")
-                return
+                return 0
 
             self.logger.info(f"发现 {len(extra_tasks)} 个待额外评定任务")
             
-            # 记录本次成功评分的数量
-            success_count = 0
             # 每天最多完成7个额外任务
-            remaining_tasks = 7 - completed_count
+            queue = WorkQueue()
+            queue.add_extra(extra_tasks, completed_count)
+            remaining_tasks = queue.extra_quota
+            
+            # 当前作品等待评分时，后台上报下一个作品的听歌记录并准备评分数据
+            executor = PacedExecutor(self._get_signer(task_id), self.logger, self._report_listen)
+            self.record_outcomes(executor.run(queue))
+            success_count = queue.extra_done
             
-            for task in extra_tasks:
-                if success_count >= remaining_tasks:
-                    self.logger.info(f"已完成 {success_count} 个额外评分任务，总计完成 {completed_count + success_count} 个")
-                    break
-                    
-                try:
-                    work_name = task['work']['name']
-                    self._process_single_task(task, task_id)
-                    # 只有在没有抛出异常时才增加成功计数
-                    success_count += 1
-                    self.logger.info(f"成功完成第 {success_count}/{remaining_tasks} 个额外评分任务")
-                    
-                    # 添加随机等待时间
-                    if success_count < remaining_tasks:  # 最后一个任务不需要等待
-                        delay = self.config.get_wait_time()
-                        self.logger.info(f"等待 {delay:.1f} 秒后继续...")
-                        time.sleep(delay)
-                        
-                except Exception as e:
-                    self.logger.warning(f"处理歌曲 {task['work']['name']} 失败，尝试下一个: {str(e)}")
-                    continue
+            if success_count >= remaining_tasks:
+                self.logger.info(f"已完成 {success_count} 个额外评分任务，总计完成 {completed_count + success_count} 个")
 
             self.logger.info(f"额外评分任务处理完成，成功评分 {success_count} 首")
             
             if success_count < remaining_tasks:
                 self.logger.warning(f"未能完成所有额外评分任务，仅完成 {success_count}/{remaining_tasks} 个")
+                
+            return success_count
 
         except Exception as e:
             self.logger.error(f"处理额外评分任务时出错: {str(e)}")
@@ -72,71 +73,116 @@ class ExtraTask:
     def _get_extra_tasks(self) -> Tuple[List[Dict], int]:
         """获取额外评分任务列表"""
         try:
-            response = self.session.get(
+            response = response_json(self.session.get(
                 url=self.api["extra_list"],
                 headers={"Referer": "https://mp.music.163.com/"}
-            ).json()
-
-            if response["code"] != 200:
-                raise RuntimeError(f"获取额外任务失败: {response.get('message', '未知错误')}")
-
-            extra_tasks = response["data"]
-            completed_tasks = [t for t in extra_tasks if t['completed']]
-            uncompleted_tasks = [t for t in extra_tasks if not t['completed']]
-            
-            # 获取所有未完成的任务，而不是只取前7个
-            return uncompleted_tasks, len(completed_tasks)
+            ))
+            return self._parse_extra_tasks(response)
 
         except Exception as e:
             self.logger.error(f"获取额外任务列表失败: {str(e)}")
             raise
 
-    def _process_single_task(self, task: Dict, task_id: str) -> None:
-        """处理单个额外评分任务"""
-        work = task['work']
+    def _parse_extra_tasks(self, response: Dict) -> Tuple[List[Dict], int]:
+        """解析额外评分任务列表响应"""
+        if response["code"] != 200:
+            raise RuntimeError(f"获取额外任务失败: {response.get('message', '未知错误')}")
+
+        extra_tasks = response["data"]
+        completed_tasks = [t for t in extra_tasks if t['completed']]
+        uncompleted_tasks = [t for t in extra_tasks if not t['completed']]
+        
+        # 获取所有未完成的任务，而不是只取前7个
+        return self._rank(uncompleted_tasks), len(completed_tasks)
+
+    def _rank(self, tasks: List[Dict]) -> List[Dict]:
+        """跳过近期资源状态异常的作品，其余按历史成功率排序"""
+        if self.outcome_cache is None:
+            return tasks
+        ranked = self.outcome_cache.rank(tasks)
+        if len(ranked) < len(tasks):
+            self.logger.info(f"跳过 {len(tasks) - len(ranked)} 个近期资源状态异常的作品")
+        return ranked
+
+    def record_outcomes(self, outcomes: List[Dict]) -> None:
+        """保存本次运行各作品的评分结果，供之后的运行和其他账号排序候选"""
+        if self.outcome_cache is None:
+            return
         try:
-            # 1. 上报听歌记录
-            self._report_listen(work)
-            
-            # 2. 评分
-            signer = Signer(self.session, task_id, self.logger, self.config)
-            signer.sign(work, is_extra=True)
+            self.outcome_cache.record(outcomes)
+        except OSError as e:
+            self.logger.warning(f"保存作品评分结果失败: {str(e)}")
+
+    def _get_signer(self, task_id: str) -> Signer:
+        """获取复用的评分器，所有作品共用同一个编解码器"""
+        if self.signer is None or self.signer.task_id != task_id:
+            self.signer = Signer(self.session, task_id, self.logger, self.config, self.codec, self.limiter,
+                                 self.checkpoint)
+        return self.signer
+
+    def _build_report_data(self, work: Dict) -> Dict:
+        """构建听歌上报数据"""
+        return {
+            "workId": work['id'],
+            "resourceId": work['resourceId'],
+            "bizResourceId": "",
+            "interactType": "PLAY_END",
+            "csrf_token": self.session.cookies["__csrf"]
+        }
 
-        except Exception as e:
-            self.logger.error(f"处理额外任务失败 - {work['name']}: {str(e)}")
-            raise
+    def _report_key(self, work: Dict) -> Optional[str]:
+        if self.checkpoint is None:
+            return None
+        return self.checkpoint.key(self.account, "", work["id"], "report")
+
+    def _is_reported(self, work: Dict) -> bool:
+        """检查点中记录作品今日是否已上报听歌"""
+        key = self._report_key(work)
+        return key is not None and self.checkpoint.is_done(key)
+
+    def _record_report(self, work: Dict, code: int) -> None:
+        key = self._report_key(work)
+        if key is not None:
+            self.checkpoint.begin(key, self.account, "", work["id"], "report")
+            self.checkpoint.finish(key, DONE, code)
+
+    def _check_report_response(self, work: Dict, response: Dict) -> None:
+        """检查听歌上报响应"""
+        get_metrics().inc(API_RESPONSES, operation="report", code=response["code"])
+        if response["code"] != 200:
+            if "频繁" in str(response.get('message', '')):
+                get_metrics().inc(RATE_LIMITED, operation="report")
+                self.limiter.on_throttled(self.api["report_listen"])
+            raise RuntimeError(f"上报听歌记录失败: {response.get('message', '未知错误')}")
+        self.limiter.on_success(self.api["report_listen"])
+        self._record_report(work, response["code"])
+        self.logger.info(f"歌曲 {work['name']} 听歌记录上报成功")
 
     def _report_listen(self, work: Dict) -> None:
         """上报听歌记录"""
-        try:
-            csrf = self.session.cookies["__csrf"]
+        if self._is_reported(work):
+            self.logger.info(f"歌曲 {work['name']} 今日已上报听歌记录，跳过")
+            return
             
-            # 准备加密数据
-            data = {
-                "workId": work['id'],
-                "resourceId": work['resourceId'],
-                "bizResourceId": "",
-                "interactType": "PLAY_END",
-                "csrf_token": csrf
-            }
+        start, result = time.perf_counter(), "failed"
+        try:
+            data = self._build_report_data(work)
             
             # 使用相同的加密方式
-            params = {
-                "params": self.signer._get_params(data),
-                "encSecKey": self.signer._get_enc_sec_key()
-            }
+            params = self.codec.encrypt(data)
             
-            response = self.session.post(
-                url=f"{self.api['report_listen']}?csrf_token={csrf}",
+            url = f"{self.api['report_listen']}?csrf_token={data['csrf_token']}"
+            response = response_json(self.retrier.call(url, lambda: self.session.post(
+                url=url,
                 data=params,
                 headers={"Referer": "https://mp.music.163.com/"}
-            ).json()
-
-            if response["code"] != 200:
-                raise RuntimeError(f"上报听歌记录失败: {response.get('message', '未知错误')}")
-            else:
-                self.logger.info(f"歌曲 {work['name']} 听歌记录上报成功")
+            )))
+            
+            self._check_report_response(work, response)
+            result = "ok"
 
         except Exception as e:
             self.logger.error(f"上报听歌记录失败: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+        finally:
+            record_operation("report", start, result)
\ No newline at end of file
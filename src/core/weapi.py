@@ -0,0 +1,165 @@
+import base64
+import random
+import string
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..utils.clock import get_clock
+from ..utils.json_codec import dumps_bytes, get_json_codec
+from ..utils.metrics import ENCRYPT_SECONDS, ENCRYPTIONS, get_metrics
+
+# weapi 加密相关常量
+PUB_KEY = "010001"
+MODULUS = "00e0b509f6259df8642dbc35662901477df22677ec152b5ff68ace615bb7b725152b3ab17a876aea8a5aa76d2e417629ec4ee341f56135fccf695280104e0312ecbda92557c93870114af6c9d05c4f7f0c3685b7a46bee255932575cce10b424d813cfe4875d3e82047b97ddef52741d546b8e289dc6935b3ece0462db0a22b8e7"
+IV = b"0102030405060708"
+PRESET_KEY = b"0CoJUm6Qyw8W8jud"
+SECRET_CHARS = string.ascii_letters + string.digits
+SECRET_LENGTH = 16
+
+# Crypto 加载较慢，推迟到第一次加密时导入，Cookie 失效提前退出的运行不必加载
+_AES = None
+
+
+def _aes():
+    global _AES
+    if _AES is None:
+        from Crypto.Cipher import AES
+        _AES = AES
+    return _AES
+
+
+class WeapiCodec:
+    """weapi 加密编解码器
+
+    随机密钥按轮换策略复用，encSecKey 按密钥缓存，
+    RSA 运算只在密钥轮换时进行一次，每次请求只剩两轮 AES。
+    """
+
+    def __init__(self, pub_key: str = PUB_KEY, modulus: str = MODULUS,
+                 max_uses: int = 500, max_age: float = 600.0, cache_size: int = 64):
+        self.pub_key = int(pub_key, 16)
+        self.modulus = int(modulus, 16)
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.cache_size = cache_size
+
+        self._lock = threading.Lock()
+        self._enc_sec_keys: Dict[str, str] = {}
+        self._secret: Optional[str] = None
+        self._secret_key: bytes = b""
+        self._secret_uses = 0
+        self._secret_born = 0.0
+
+    @staticmethod
+    def generate_secret(length: int = SECRET_LENGTH) -> str:
+        """生成指定长度的随机密钥"""
+        return ''.join(random.choice(SECRET_CHARS) for _ in range(length))
+
+    @staticmethod
+    def _pad(data: bytes) -> bytes:
+        """PKCS7 填充到16的倍数"""
+        pad = 16 - len(data) % 16
+        return data + bytes((pad,)) * pad
+
+    @classmethod
+    def aes_encrypt(cls, data: bytes, key: bytes) -> bytes:
+        """AES-CBC 加密并返回 base64 编码结果"""
+        aes = _AES or _aes()
+        encryptor = aes.new(key, aes.MODE_CBC, IV)
+        return base64.b64encode(encryptor.encrypt(cls._pad(data)))
+
+    def enc_sec_key(self, secret: str) -> str:
+        """获取密钥对应的 encSecKey，结果按密钥缓存"""
+        enc_sec_key = self._enc_sec_keys.get(secret)
+        if enc_sec_key is None:
+            rs = int.from_bytes(secret[::-1].encode('utf-8'), 'big')
+            enc_sec_key = format(pow(rs, self.pub_key, self.modulus), 'x').zfill(256)
+            with self._lock:
+                if len(self._enc_sec_keys) >= self.cache_size:
+                    self._enc_sec_keys.pop(next(iter(self._enc_sec_keys)))
+                self._enc_sec_keys[secret] = enc_sec_key
+        return enc_sec_key
+
+    def _checkout(self, uses: int = 1) -> Tuple[bytes, str]:
+        """取出当前密钥，达到使用次数或存活时间上限时轮换"""
+        with self._lock:
+            now = get_clock().monotonic()
+            if (self._secret is None
+                    or (self.max_uses and self._secret_uses >= self.max_uses)
+                    or (self.max_age and now - self._secret_born >= self.max_age)):
+                self._secret = self.generate_secret()
+                self._secret_key = self._secret.encode('utf-8')
+                self._secret_uses = 0
+                self._secret_born = now
+            self._secret_uses += uses
+            secret, secret_key = self._secret, self._secret_key
+        return secret_key, self.enc_sec_key(secret)
+
+    def rotate(self) -> None:
+        """强制在下一次加密时更换密钥"""
+        with self._lock:
+            self._secret = None
+
+    def _encrypt_bytes(self, data: bytes) -> Dict[str, str]:
+        start = time.thread_time()
+        secret_key, enc_sec_key = self._checkout()
+        params = self.aes_encrypt(self.aes_encrypt(data, PRESET_KEY), secret_key)
+        self._record(start, 1)
+        return {"params": params.decode('utf-8'), "encSecKey": enc_sec_key}
+
+    def encrypt_text(self, text: str) -> Dict[str, str]:
+        """加密已序列化的请求文本"""
+        return self._encrypt_bytes(text.encode('utf-8'))
+
+    def encrypt(self, payload: dict) -> Dict[str, str]:
+        """加密单个请求数据"""
+        return self._encrypt_bytes(dumps_bytes(payload))
+
+    def encrypt_many(self, payloads: Iterable[dict]) -> List[Dict[str, str]]:
+        """批量加密请求数据，整批共用一个密钥"""
+        payloads = list(payloads)
+        if not payloads:
+            return []
+
+        start = time.thread_time()
+        secret_key, enc_sec_key = self._checkout(len(payloads))
+        aes_encrypt = self.aes_encrypt
+        dumps = get_json_codec().dumps_bytes
+        encrypted = [
+            {
+                "params": aes_encrypt(aes_encrypt(dumps(payload), PRESET_KEY), secret_key).decode('utf-8'),
+                "encSecKey": enc_sec_key
+            }
+            for payload in payloads
+        ]
+        self._record(start, len(payloads))
+        return encrypted
+
+    @staticmethod
+    def _record(start: float, count: int) -> None:
+        """记录加密占用的 CPU 时间"""
+        metrics = get_metrics()
+        metrics.inc(ENCRYPT_SECONDS, time.thread_time() - start)
+        metrics.inc(ENCRYPTIONS, count)
+
+
+_default_codec: Optional[WeapiCodec] = None
+_default_lock = threading.Lock()
+
+
+def get_codec() -> WeapiCodec:
+    """获取进程内共享的编解码器"""
+    global _default_codec
+    if _default_codec is None:
+        with _default_lock:
+            if _default_codec is None:
+                _default_codec = WeapiCodec()
+    return _default_codec
+
+
+def set_codec(codec: Optional[WeapiCodec]) -> None:
+    """替换进程内共享的编解码器，传入 None 时恢复默认"""
+    global _default_codec
+    with _default_lock:
+        _default_codec = codec
@@ -0,0 +1 @@
+# 模拟服务模块的初始化文件 
\ No newline at end of file
@@ -0,0 +1,120 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from ..core.fleet import run_account
+from ..utils.metrics import get_metrics
+from ..utils.rate_limiter import RateLimiter, get_rate_limiter, set_rate_limiter
+from .server import EVALUATE_PATH, MockPartnerApi, MockServer
+
+
+def mock_accounts(count: int, wait_time: float = 0.0) -> List[Dict]:
+    """生成模拟账号配置，关闭检查点以便重复压测"""
+    return [
+        {
+            "name": f"mock-{index:03d}",
+            "Cookie_MUSIC_U": f"mock-music-u-{index}",
+            "Cookie___csrf": f"mock-csrf-{index}",
+            "wait_time_min": wait_time,
+            "wait_time_max": wait_time,
+            "checkpoint": False
+        }
+        for index in range(1, count + 1)
+    ]
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent))]
+
+
+def _timed_run(account: Dict) -> Dict:
+    start = time.perf_counter()
+    result = run_account(account)
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def run_load(accounts: int = 10, workers: int = 4, wait_time: float = 0.0,
+             api: Optional[MockPartnerApi] = None, limiter: Optional[RateLimiter] = None) -> Dict:
+    """启动模拟服务，用 workers 个线程让 accounts 个模拟账号走完整的机器人流程，返回压测报告"""
+    api = api or MockPartnerApi()
+    previous = get_rate_limiter()
+    set_rate_limiter(limiter or RateLimiter())
+    get_metrics().reset()
+
+    try:
+        with MockServer(api):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_timed_run, mock_accounts(accounts, wait_time)))
+            elapsed = time.perf_counter() - start
+    finally:
+        set_rate_limiter(previous)
+
+    durations = [r["elapsed"] for r in results]
+    server = api.snapshot()
+    signed = server.get(EVALUATE_PATH, {}).get("ok", 0)
+    return {
+        "accounts": accounts,
+        "workers": workers,
+        "succeeded": sum(1 for r in results if r["success"]),
+        "elapsed": elapsed,
+        "accounts_per_second": accounts / elapsed if elapsed else 0.0,
+        "signs_per_second": signed / elapsed if elapsed else 0.0,
+        "account_latency": {
+            "p50": _percentile(durations, 0.5),
+            "p95": _percentile(durations, 0.95),
+            "max": max(durations, default=0.0)
+        },
+        "server": server,
+        "metrics": get_metrics().summary(),
+        "results": results
+    }
+
+
+def format_report(report: Dict) -> str:
+    """压测报告的文本形式"""
+    latency = report["account_latency"]
+    spent = report["metrics"]["time"]
+    lines = [
+        f"账号数: {report['accounts']}  并发: {report['workers']}  成功: {report['succeeded']}",
+        f"总耗时: {report['elapsed']:.2f} 秒",
+        f"吞吐量: {report['accounts_per_second']:.2f} 账号/秒, {report['signs_per_second']:.2f} 评分/秒",
+        f"单账号耗时: p50 {latency['p50']:.2f} 秒, p95 {latency['p95']:.2f} 秒, 最大 {latency['max']:.2f} 秒",
+        f"时间分布: 请求 {spent['http_seconds']:.2f} 秒, 等待 {sum(spent['sleep_seconds'].values()):.2f} 秒, "
+        f"加密 CPU {spent['encrypt_cpu_seconds']:.3f} 秒",
+        "服务端统计:"
+    ]
+    for path, counts in sorted(report["server"].items()):
+        lines.append(f"  {path}: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="对本地模拟接口运行多账号压测")
+    parser.add_argument("--accounts", type=int, default=10, help="模拟账号数")
+    parser.add_argument("--workers", type=int, default=4, help="并发线程数")
+    parser.add_argument("--wait", type=float, default=0.0, help="同一账号两次评分的间隔（秒）")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的响应延迟（秒）")
+    parser.add_argument("--throttle", type=float, default=0.0, help="注入“频繁”响应的概率")
+    parser.add_argument("--abnormal", type=float, default=0.0, help="注入 405 资源状态异常的概率")
+    parser.add_argument("--host-rate", type=float, default=2.0, help="限流器的初始主机速率（请求/秒）")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true", help="输出每个账号的运行日志")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    api = MockPartnerApi(latency=args.latency, throttle_rate=args.throttle,
+                         abnormal_rate=args.abnormal, seed=args.seed)
+    report = run_load(args.accounts, args.workers, args.wait, api, RateLimiter(host_rate=args.host_rate))
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+import base64
+import hashlib
+import io
+import json
+import random
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from Crypto.Cipher import AES
+from Crypto.PublicKey import RSA
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from ..core.weapi import IV, PRESET_KEY, WeapiCodec, get_codec, set_codec
+from ..utils.http import set_routes
+
+# 模拟服务接管的主机
+MOCK_HOSTS = (
+    "https://music.163.com",
+    "https://interface.music.163.com",
+    "https://ncma-web.vercel.app",
+)
+
+ACCOUNT_PATH = "/api/nuser/account/get"
+DAILY_PATH = "/api/music/partner/daily/task/get"
+EXTRA_PATH = "/api/music/partner/extra/wait/evaluate/work/list"
+EVALUATE_PATH = "/weapi/music/partner/work/evaluate"
+REPORT_PATH = "/weapi/partner/resource/interact/report"
+LOGIN_PATH = "/login/cellphone"
+WEAPI_LOGIN_PATH = "/weapi/login/cellphone"
+
+# 无需登录即可访问的接口
+PUBLIC_PATHS = (LOGIN_PATH, WEAPI_LOGIN_PATH)
+
+# 响应头的值为列表时逐个发送，用于多个 Set-Cookie
+Reply = Tuple[int, Dict, Dict[str, Union[str, List[str]]]]
+
+
+def _unpad(data: bytes) -> bytes:
+    return data[:-data[-1]]
+
+
+def _aes_decrypt(data: bytes, key: bytes) -> bytes:
+    return _unpad(AES.new(key, AES.MODE_CBC, IV).decrypt(base64.b64decode(data)))
+
+
+class MockAccount:
+    """模拟账号的任务状态"""
+
+    def __init__(self, music_u: str, index: int, daily_count: int, extra_count: int):
+        self.music_u = music_u
+        self.nickname = f"mock-{index}"
+        self.task_id = f"task-{index}"
+        base = index * 1000
+        self.daily = [self._work(base + i, "每日") for i in range(daily_count)]
+        self.extra = [self._work(base + 500 + i, "额外") for i in range(extra_count)]
+        self.daily_ids = {w["id"] for w in self.daily}
+        self.extra_ids = {w["id"] for w in self.extra}
+        self.scores: Dict[int, int] = {}
+        self.reported = set()
+
+    @staticmethod
+    def _work(work_id: int, kind: str) -> Dict:
+        # 一半作品名包含英文，覆盖不同的评分分支
+        name = f"Song {work_id}" if work_id % 2 else f"{kind}作品{work_id}"
+        return {"id": work_id, "name": name, "authorName": f"歌手{work_id % 7}", "resourceId": work_id + 10 ** 6}
+
+
+class MockPartnerApi:
+    """音乐合伙人接口的本地模拟
+
+    实现账号、每日任务、额外任务、weapi 评分与听歌上报以及登录代理接口，
+    weapi 参数使用自带的 RSA 密钥对解密。可配置响应延迟，
+    以及按概率注入“频繁”限流和 405 资源状态异常，abnormal_works 中的作品总是返回资源状态异常。
+    """
+
+    def __init__(self, daily_count: int = 5, extra_count: int = 12, latency: float = 0.0,
+                 throttle_rate: float = 0.0, abnormal_rate: float = 0.0, abnormal_works: Iterable[int] = (),
+                 seed: Optional[int] = None, key_bits: int = 1024):
+        self.daily_count = daily_count
+        self.extra_count = extra_count
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.abnormal_rate = abnormal_rate
+        self.abnormal_works = set(abnormal_works)
+        self.random = random.Random(seed)
+        self.key = RSA.generate(key_bits)
+
+        self._lock = threading.Lock()
+        # encSecKey -> 密钥，客户端按轮换策略复用密钥，RSA 解密只需做一次
+        self._secrets: Dict[str, bytes] = {}
+        self.accounts: Dict[str, MockAccount] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.routes = {
+            ("GET", ACCOUNT_PATH): self._account,
+            ("GET", DAILY_PATH): self._daily,
+            ("GET", EXTRA_PATH): self._extra,
+            ("POST", EVALUATE_PATH): self._evaluate,
+            ("POST", REPORT_PATH): self._report,
+            ("GET", LOGIN_PATH): self._login,
+            ("POST", WEAPI_LOGIN_PATH): self._weapi_login,
+        }
+
+    def codec(self) -> WeapiCodec:
+        """使用本服务公钥的编解码器"""
+        return WeapiCodec(format(self.key.e, "x"), format(self.key.n, "x"))
+
+    def decrypt(self, form: Dict[str, str]) -> Dict:
+        """解密 weapi 请求参数"""
+        secret = self._secrets.get(form["encSecKey"])
+        if secret is None:
+            rs = pow(int(form["encSecKey"], 16), self.key.d, self.key.n)
+            secret = self._secrets[form["encSecKey"]] = rs.to_bytes((rs.bit_length() + 7) // 8, "big")[::-1]
+        return json.loads(_aes_decrypt(_aes_decrypt(form["params"].encode(), secret), PRESET_KEY))
+
+    def account(self, music_u: str) -> MockAccount:
+        """获取账号，不存在时自动创建"""
+        with self._lock:
+            account = self.accounts.get(music_u)
+            if account is None:
+                account = MockAccount(music_u, len(self.accounts) + 1, self.daily_count, self.extra_count)
+                self.accounts[music_u] = account
+            return account
+
+    def _count(self, path: str, outcome: str) -> None:
+        with self._lock:
+            counts = self.stats.setdefault(path, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    def _inject(self, path: str) -> Optional[Dict]:
+        """按概率注入限流响应"""
+        if self.throttle_rate and self.random.random() < self.throttle_rate:
+            self._count(path, "throttled")
+            return {"code": 400, "message": "操作过于频繁，请稍后再试"}
+        return None
+
+    def handle(self, method: str, path: str, query: Dict[str, str], form: Dict[str, str],
+               cookies: Dict[str, str]) -> Reply:
+        """处理一个请求，返回 (状态码, 响应体, 额外响应头)"""
+        if self.latency:
+            time.sleep(self.latency)
+        handler = self.routes.get((method, path))
+        if handler is None:
+            self._count(path, "not_found")
+            return 404, {"code": 404, "message": "not found"}, {}
+
+        if path not in PUBLIC_PATHS and not cookies.get("MUSIC_U"):
+            self._count(path, "unauthorized")
+            return 200, {"code": 301, "message": "需要登录"}, {}
+
+        try:
+            reply = handler(query, form, cookies)
+        except (KeyError, ValueError) as e:
+            self._count(path, "bad_request")
+            return 400, {"code": 400, "message": f"参数错误: {e}"}, {}
+
+        if reply[1].get("code") == 200:
+            self._count(path, "ok")
+        return reply
+
+    def _account(self, query, form, cookies) -> Reply:
+        account = self.account(cookies["MUSIC_U"])
+        return 200, {"code": 200, "account": {"id": account.task_id}, "profile": {"nickname": account.nickname}}, {}
+
+    def _daily(self, query, form, cookies) -> Reply:
+        account = self.account(cookies["MUSIC_U"])
+        with self._lock:
+            works = [
+                {"completed": w["id"] in account.scores, "score": account.scores.get(w["id"], 0), "work": w}
+                for w in account.daily
+            ]
+        data = {
+            "id": account.task_id,
+            "count": len(works),
+            "completedCount": sum(1 for w in works if w["completed"]),
+            "works": works
+        }
+        return 200, {"code": 200, "data": data}, {}
+
+    def _extra(self, query, form, cookies) -> Reply:
+        account = self.account(cookies["MUSIC_U"])
+        with self._lock:
+            data = [{"completed": w["id"] in account.scores, "work": w} for w in account.extra]
+        return 200, {"code": 200, "data": data}, {}
+
+    def _check_csrf(self, query, data, cookies) -> Optional[Dict]:
+        if query.get("csrf_token") != cookies.get("__csrf") or data.get("csrf_token") != cookies.get("__csrf"):
+            return {"code": 301, "message": "csrf 校验失败"}
+        return None
+
+    def _evaluate(self, query, form, cookies) -> Reply:
+        data = self.decrypt(form)
+        error = self._check_csrf(query, data, cookies) or self._inject(EVALUATE_PATH)
+        if error:
+            return 200, error, {}
+
+        account = self.account(cookies["MUSIC_U"])
+        work_id = int(data["workId"])
+        if data["taskId"] != account.task_id or work_id not in account.daily_ids | account.extra_ids:
+            return 200, {"code": 404, "message": "任务不存在"}, {}
+        if work_id in self.abnormal_works or (self.abnormal_rate and self.random.random() < self.abnormal_rate):
+            self._count(EVALUATE_PATH, "abnormal")
+            return 200, {"code": 405, "message": "资源状态异常"}, {}
+
+        with self._lock:
+            if work_id in account.scores:
+                return 200, {"code": 400, "message": "已经评价过了"}, {}
+            if work_id in account.extra_ids and data.get("extraResource") == "true" and work_id not in account.reported:
+                return 200, {"code": 400, "message": "请先收听作品"}, {}
+            account.scores[work_id] = int(data["score"])
+        return 200, {"code": 200, "data": True}, {}
+
+    def _report(self, query, form, cookies) -> Reply:
+        data = self.decrypt(form)
+        error = self._check_csrf(query, data, cookies) or self._inject(REPORT_PATH)
+        if error:
+            return 200, error, {}
+
+        account = self.account(cookies["MUSIC_U"])
+        with self._lock:
+            account.reported.add(int(data["workId"]))
+        return 200, {"code": 200, "data": True}, {}
+
+    def _issue_cookies(self, phone: str) -> Tuple[str, str]:
+        """为手机号签发固定的 MUSIC_U 和 __csrf"""
+        music_u = hashlib.sha1(f"mock:{phone}".encode()).hexdigest()
+        csrf = hashlib.md5(music_u.encode()).hexdigest()
+        self.account(music_u)
+        return music_u, csrf
+
+    def _login(self, query, form, cookies) -> Reply:
+        phone = query["phone"]
+        if not (query.get("password") or query.get("md5_password")):
+            return 200, {"code": 400, "message": "缺少密码"}, {}
+
+        music_u, csrf = self._issue_cookies(phone)
+        cookie = f"MUSIC_U={music_u}; Max-Age=1296000; Path=/; __csrf={csrf}; Max-Age=1296010; Path=/"
+        return 200, {"code": 200, "cookie": cookie}, {"Set-Cookie": cookie}
+
+    def _weapi_login(self, query, form, cookies) -> Reply:
+        """网易云自身的 weapi 手机号登录，密码为 MD5 摘要，Cookie 通过多个 Set-Cookie 头返回"""
+        data = self.decrypt(form)
+        password = data.get("password", "")
+        if len(password) != 32 or not data.get("phone"):
+            return 200, {"code": 400, "message": "参数错误"}, {}
+
+        music_u, csrf = self._issue_cookies(data["phone"])
+        return 200, {"code": 200, "account": {"id": self.account(music_u).task_id}}, {"Set-Cookie": [
+            f"MUSIC_U={music_u}; Max-Age=1296000; Path=/; HTTPOnly",
+            f"__csrf={csrf}; Max-Age=1296010; Path=/",
+        ]}
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """各接口的请求结果统计"""
+        with self._lock:
+            return {path: dict(counts) for path, counts in self.stats.items()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    api: MockPartnerApi
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self, method: str) -> None:
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        cookies = {name: morsel.value for name, morsel in SimpleCookie(self.headers.get("Cookie", "")).items()}
+
+        status, payload, headers = self.api.handle(
+            method, parts.path, dict(parse_qsl(parts.query)), dict(parse_qsl(body)), cookies
+        )
+
+        content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            for item in value if isinstance(value, list) else [value]:
+                self.send_header(name, item)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+
+class MockTransport(HTTPAdapter):
+    """不经过网络、直接在进程内调用模拟接口的传输层，供模拟运行使用"""
+
+    def __init__(self, api: MockPartnerApi, **kwargs):
+        self.api = api
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        body = request.body or ""
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        cookies = {name: morsel.value for name, morsel in SimpleCookie(request.headers.get("Cookie", "")).items()}
+
+        status, payload, headers = self.api.handle(
+            request.method, parts.path, dict(parse_qsl(parts.query)), dict(parse_qsl(body)), cookies
+        )
+
+        # 以 (名称, 值) 列表传入，同名的多个响应头（如 Set-Cookie）逐个保留
+        raw_headers = [("Content-Type", "application/json;charset=UTF-8")]
+        for name, value in headers.items():
+            for item in value if isinstance(value, list) else [value]:
+                raw_headers.append((name, item))
+        content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        raw = HTTPResponse(body=io.BytesIO(content), headers=raw_headers, status=status,
+                           preload_content=False, decode_content=False)
+        return self.build_response(request, raw)
+
+
+class MockServer:
+    """在本地端口上运行模拟接口
+
+    作为上下文管理器使用时，会把网易云和登录代理的主机路由到本服务，
+    并把共享编解码器替换为使用本服务公钥的版本，退出时恢复。
+    """
+
+    def __init__(self, api: Optional[MockPartnerApi] = None, host: str = "127.0.0.1", port: int = 0):
+        self.api = api or MockPartnerApi()
+        handler = type("MockHandler", (_Handler,), {"api": self.api})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+        self._codec: Optional[WeapiCodec] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def routes(self) -> Dict[str, str]:
+        """把真实主机映射到本服务的路由表"""
+        return {host: self.url for host in MOCK_HOSTS}
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def install(self) -> None:
+        """把请求路由到本服务并使用匹配的编解码器"""
+        self._codec = get_codec()
+        set_routes(self.routes())
+        set_codec(self.api.codec())
+
+    def uninstall(self) -> None:
+        set_routes(None)
+        set_codec(self._codec)
+
+    def __enter__(self) -> "MockServer":
+        self.start()
+        self.install()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.uninstall()
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本地模拟音乐合伙人接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8163)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的响应延迟（秒）")
+    parser.add_argument("--throttle", type=float, default=0.0, help="注入“频繁”响应的概率")
+    parser.add_argument("--abnormal", type=float, default=0.0, help="注入 405 资源状态异常的概率")
+    args = parser.parse_args(argv)
+
+    api = MockPartnerApi(latency=args.latency, throttle_rate=args.throttle, abnormal_rate=args.abnormal)
+    server = MockServer(api, args.host, args.port)
+    print(f"模拟服务已启动: {server.url}")
+    print(f"公钥: {format(api.key.e, 'x')}  模数: {format(api.key.n, 'x')}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
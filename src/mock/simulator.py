@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import random
+import selectors
+import time
+from concurrent.futures import Executor, Future
+from typing import Dict, List, Optional
+
+from ..aio.runner import run_account
+from ..aio.session import AsyncHttpClient, AsyncSession
+from ..core.weapi import get_codec, set_codec
+from ..utils.clock import VirtualClock, get_clock, set_clock
+from ..utils.config import Config
+from ..utils.http import ClientAdapter, create_session
+from ..utils.logger import Logger, log_context
+from ..utils.metrics import get_metrics
+from ..utils.rate_limiter import RateLimiter, get_rate_limiter, set_rate_limiter
+from ..utils.retry import CircuitBreaker, get_circuit_breaker, set_circuit_breaker
+from .loadgen import _percentile, mock_accounts
+from .server import EVALUATE_PATH, MockPartnerApi, MockTransport
+
+DAY = 86400.0
+
+
+class VirtualSelector(selectors.BaseSelector):
+    """虚拟时间的选择器
+
+    所有请求都在进程内完成，事件循环没有真正需要等待的 I/O：
+    没有就绪事件时直接把虚拟时钟推进到下一个定时器，而不是阻塞。
+    """
+
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self._selector = selectors.DefaultSelector()
+
+    def register(self, fileobj, events, data=None):
+        return self._selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj):
+        return self._selector.unregister(fileobj)
+
+    def modify(self, fileobj, events, data=None):
+        return self._selector.modify(fileobj, events, data)
+
+    def select(self, timeout=None):
+        ready = self._selector.select(0)
+        if not ready and timeout:
+            self.clock.advance(timeout)
+        return ready
+
+    def get_map(self):
+        return self._selector.get_map()
+
+    def close(self):
+        self._selector.close()
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """以虚拟时钟计时的事件循环，asyncio.sleep 不占用真实时间"""
+
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        super().__init__(VirtualSelector(clock))
+
+    def time(self) -> float:
+        return self.clock.monotonic()
+
+
+class InlineExecutor(Executor):
+    """在调用线程中立即执行的执行器，模拟运行中请求不需要线程池"""
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+class MockAdapter(ClientAdapter, MockTransport):
+    """带超时、熔断和指标记录的进程内模拟传输层"""
+
+
+class SimulatedSession(AsyncSession):
+    """模拟账号的会话，每个请求在虚拟时间中耗时 latency 秒"""
+
+    async def request(self, method: str, url: str, **kwargs):
+        response = await super().request(method, url, **kwargs)
+        if self.client.latency:
+            await asyncio.sleep(self.client.latency)
+        return response
+
+
+class SimulatedHttpClient(AsyncHttpClient):
+    """直接调用模拟接口的异步客户端"""
+
+    def __init__(self, api: MockPartnerApi, limiter: RateLimiter, latency: float = 0.0):
+        self.executor = InlineExecutor()
+        adapter = MockAdapter(api=api)
+        self.adapters = {"https://": adapter, "http://": adapter}
+        self.limiter = limiter
+        self.latency = latency
+
+    def session(self, cookies: Optional[Dict[str, str]] = None) -> SimulatedSession:
+        session = create_session(cookies, adapters=self.adapters)
+        # 请求不经过网络，不必每次从环境变量查找代理设置
+        session.trust_env = False
+        return SimulatedSession(self, session)
+
+
+class FleetSimulator:
+    """离散事件的多账号模拟
+
+    在虚拟时间中用 concurrency 个并发槽位运行真实的异步评分流程，
+    请求由进程内的模拟接口处理，账号之间的等待、限流和重试退避都只推进虚拟时钟。
+    几千个账号按真实节奏（每次评分间隔 15~20 秒）需要数小时的运行，几秒内即可模拟完成，
+    用于估算每个并发槽位能承载的账号数，以及在每日任务重置前能否全部完成。
+    """
+
+    def __init__(self, accounts: int = 1000, concurrency: int = 200, wait_time: tuple = (15.0, 20.0),
+                 latency: float = 0.05, api: Optional[MockPartnerApi] = None, host_rate: float = 2.0,
+                 seed: int = 0):
+        self.accounts = accounts
+        self.concurrency = concurrency
+        self.wait_time = wait_time
+        self.latency = latency
+        self.api = api or MockPartnerApi(seed=seed)
+        self.host_rate = host_rate
+        self.seed = seed
+        self.clock = VirtualClock()
+        self.logger = Logger(name="simulator")
+        self.logger.logger.setLevel(logging.WARNING)
+
+    def configs(self) -> List[Config]:
+        """模拟账号的配置，每个账号的等待时间使用独立的固定种子"""
+        configs = []
+        for index, account in enumerate(mock_accounts(self.accounts)):
+            account.update(wait_time_min=self.wait_time[0], wait_time_max=self.wait_time[1],
+                           outcome_ttl_hours=0)
+            configs.append(Config(account, rng=random.Random(self.seed * 1_000_003 + index)))
+        return configs
+
+    async def _run(self, client: SimulatedHttpClient) -> List[Dict]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _one(config: Config) -> Dict:
+            async with semaphore:
+                started = self.clock.monotonic()
+                with log_context(account=config.get("name")):
+                    try:
+                        result = await run_account(client, config, self.logger)
+                    except Exception as e:
+                        result = {"success": False, "message": f"程序异常: {str(e)}", "daily": 0, "extra": 0}
+                result.update(started=started, finished=self.clock.monotonic())
+                return result
+
+        return list(await asyncio.gather(*(_one(config) for config in self.configs())))
+
+    def run(self) -> Dict:
+        """运行模拟并返回报告，运行期间替换共享的时钟、限流器、熔断器和编解码器"""
+        previous = get_clock(), get_rate_limiter(), get_circuit_breaker(), get_codec()
+        limiter = RateLimiter(host_rate=self.host_rate, clock=self.clock.monotonic, sleep=self.clock.sleep)
+        set_clock(self.clock)
+        set_rate_limiter(limiter)
+        set_circuit_breaker(CircuitBreaker(clock=self.clock.monotonic))
+        set_codec(self.api.codec())
+        get_metrics().reset()
+
+        loop = VirtualEventLoop(self.clock)
+        start = time.perf_counter()
+        try:
+            results = loop.run_until_complete(self._run(SimulatedHttpClient(self.api, limiter, self.latency)))
+        finally:
+            loop.close()
+            set_clock(previous[0])
+            set_rate_limiter(previous[1])
+            set_circuit_breaker(previous[2])
+            set_codec(previous[3])
+        return self.report(results, time.perf_counter() - start)
+
+    def report(self, results: List[Dict], elapsed: float) -> Dict:
+        durations = [r["finished"] - r["started"] for r in results]
+        makespan = max((r["finished"] for r in results), default=0.0)
+        mean = sum(durations) / len(durations) if durations else 0.0
+        server = self.api.snapshot()
+        return {
+            "accounts": self.accounts,
+            "concurrency": self.concurrency,
+            "succeeded": sum(1 for r in results if r["success"]),
+            "signed": server.get(EVALUATE_PATH, {}).get("ok", 0),
+            # 虚拟时间：全部账号完成所需时间和单账号耗时
+            "makespan": makespan,
+            "account_seconds": {
+                "mean": mean,
+                "p50": _percentile(durations, 0.5),
+                "p95": _percentile(durations, 0.95),
+                "max": max(durations, default=0.0)
+            },
+            # 每个并发槽位一天内可以依次运行的账号数
+            "accounts_per_slot_per_day": DAY / mean if mean else 0.0,
+            "fits_in_day": makespan <= DAY,
+            "real_seconds": elapsed,
+            "speedup": makespan / elapsed if elapsed else 0.0,
+            "server": server,
+            "results": results
+        }
+
+
+def simulate(accounts: int = 1000, concurrency: int = 200, **kwargs) -> Dict:
+    """运行一次多账号模拟，参数见 FleetSimulator"""
+    return FleetSimulator(accounts, concurrency, **kwargs).run()
+
+
+def format_report(report: Dict) -> str:
+    """模拟报告的文本形式"""
+    seconds = report["account_seconds"]
+    lines = [
+        f"账号数: {report['accounts']}  并发: {report['concurrency']}  成功: {report['succeeded']}  "
+        f"评分: {report['signed']}",
+        f"虚拟耗时: {report['makespan'] / 3600:.2f} 小时（{'能' if report['fits_in_day'] else '不能'}在一天内完成）",
+        f"单账号耗时: 平均 {seconds['mean']:.0f} 秒, p50 {seconds['p50']:.0f} 秒, p95 {seconds['p95']:.0f} 秒",
+        f"每个并发槽位每天可运行 {report['accounts_per_slot_per_day']:.0f} 个账号",
+        f"实际耗时: {report['real_seconds']:.2f} 秒（加速 {report['speedup']:.0f} 倍）",
+        "服务端统计:"
+    ]
+    for path, counts in sorted(report["server"].items()):
+        lines.append(f"  {path}: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="在虚拟时间中模拟多账号运行，用于容量规划")
+    parser.add_argument("--accounts", type=int, default=1000, help="模拟账号数")
+    parser.add_argument("--concurrency", type=int, default=200, help="同时运行的账号数")
+    parser.add_argument("--wait-min", type=float, default=15.0, help="评分间隔下限（秒）")
+    parser.add_argument("--wait-max", type=float, default=20.0, help="评分间隔上限（秒）")
+    parser.add_argument("--latency", type=float, default=0.05, help="每个请求的响应延迟（秒）")
+    parser.add_argument("--daily", type=int, default=5, help="每个账号的每日任务数")
+    parser.add_argument("--extra", type=int, default=12, help="每个账号的额外任务数")
+    parser.add_argument("--throttle", type=float, default=0.0, help="注入“频繁”响应的概率")
+    parser.add_argument("--abnormal", type=float, default=0.0, help="注入 405 资源状态异常的概率")
+    parser.add_argument("--host-rate", type=float, default=2.0, help="限流器的初始主机速率（请求/秒）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    api = MockPartnerApi(daily_count=args.daily, extra_count=args.extra, throttle_rate=args.throttle,
+                         abnormal_rate=args.abnormal, seed=args.seed)
+    report = simulate(args.accounts, args.concurrency, wait_time=(args.wait_min, args.wait_max),
+                      latency=args.latency, api=api, host_rate=args.host_rate, seed=args.seed)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
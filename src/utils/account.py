@@ -0,0 +1,6 @@
+import hashlib
+
+
+def account_key(music_u: str) -> str:
+    """根据 MUSIC_U 生成账号标识，避免在内存结构和日志中保存原始 Cookie"""
+    return hashlib.sha1(str(music_u or "").encode('utf-8')).hexdigest()[:12]
@@ -1,13 +1,69 @@
+import hashlib
+import os
 import requests
 import re
+from email.utils import parsedate_to_datetime
 from typing import Dict, Tuple, Optional
+from requests.cookies import remove_cookie_by_name
+from ..core.weapi import WeapiCodec, get_codec
+from ..utils.http import get_shared_session
+from ..utils.clock import wall_time
+from ..utils.json_codec import response_json
 from ..utils.logger import Logger
+from ..utils.retry import Retrier
+
+# 登录方式：native 直接请求网易云 weapi 接口，proxy 通过登录代理，auto 先 native 失败后改用 proxy
+NATIVE = "native"
+PROXY = "proxy"
+AUTO = "auto"
+
+# Set-Cookie 中不属于 Cookie 名的属性
+COOKIE_ATTRIBUTES = ("max-age", "expires", "path", "domain", "secure", "httponly", "samesite")
+
+
+def parse_cookie_expiry(cookie_str: str, name: str = "MUSIC_U") -> Optional[float]:
+    """从 Set-Cookie 字符串中解析指定 Cookie 的过期时间戳，Max-Age 优先于 Expires"""
+    # 多个 Set-Cookie 头合并时以逗号分隔，Expires 日期中的逗号后面不是 名称=值，不会被拆开
+    parts = [part for chunk in re.split(r",\s*(?=[^;,=\s]+=)", cookie_str) for part in chunk.split(";")]
+    current, max_age, expires = False, None, None
+    for part in parts:
+        key, _, value = part.strip().partition("=")
+        attribute = key.lower()
+        if not key:
+            continue
+        if attribute not in COOKIE_ATTRIBUTES:
+            if current:
+                break
+            current = key == name
+        elif current and attribute == "max-age":
+            try:
+                max_age = int(value)
+            except ValueError:
+                pass
+        elif current and attribute == "expires":
+            try:
+                expires = parsedate_to_datetime(value.strip()).timestamp()
+            except (TypeError, ValueError):
+                pass
+    if max_age is not None:
+        return wall_time() + max_age
+    return expires
 
 
 class AuthService:
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, session: Optional[requests.Session] = None,
+                 codec: Optional[WeapiCodec] = None, backend: Optional[str] = None):
         self.logger = logger
+        self.session = session or get_shared_session()
+        self.codec = codec
+        self.retrier = Retrier(logger)
+        self.backend = (backend or os.environ.get("NETEASE_LOGIN_BACKEND") or AUTO).lower()
+        if self.backend not in (NATIVE, PROXY, AUTO):
+            raise ValueError(f"登录方式无效: {self.backend}，可选 {NATIVE}/{PROXY}/{AUTO}")
+        self.native_login_api = "https://music.163.com/weapi/login/cellphone"
         self.login_api = "https://ncma-web.vercel.app/login/cellphone"
+        # 最近一次登录获取的 MUSIC_U 过期时间戳，无法获取时为 None
+        self.expires: Optional[float] = None
         
     def login(self, phone: str, password: str = None, md5_password: str = None) -> Tuple[bool, Optional[Dict[str, str]]]:
         """
@@ -21,24 +77,77 @@ class AuthService:
         Returns:
             (成功状态, Cookie字典)
         """
+        self.logger.info(f"尝试登录账号: {phone[:3]}****{phone[-4:]}")
+        if not md5_password and not password:
+            self.logger.error("未提供密码，无法登录")
+            return False, None
+            
+        if self.backend != PROXY:
+            success, cookies = self._login_native(phone, password, md5_password)
+            if success or self.backend == NATIVE:
+                return success, cookies
+            self.logger.warning("直接登录失败，改用登录代理")
+            
+        return self._login_proxy(phone, password, md5_password)
+
+    def _login_native(self, phone: str, password: Optional[str],
+                      md5_password: Optional[str]) -> Tuple[bool, Optional[Dict[str, str]]]:
+        """构建 weapi 登录请求直接登录，Cookie 从响应的 Cookie 中读取"""
         try:
-            self.logger.info(f"尝试登录账号: {phone[:3]}****{phone[-4:]}")
+            payload = {
+                "phone": phone,
+                "countrycode": "86",
+                "password": md5_password or hashlib.md5(password.encode("utf-8")).hexdigest(),
+                "rememberLogin": "true",
+                "csrf_token": ""
+            }
+            data = (self.codec or get_codec()).encrypt(payload)
+            response = self.retrier.call(self.native_login_api, lambda: self.session.post(
+                self.native_login_api,
+                data=data,
+                headers={"Referer": "https://music.163.com"},
+                cookies={"os": "pc"}
+            ))
+            # 登录 Cookie 不留在共享会话中
+            for name in ("MUSIC_U", "__csrf"):
+                remove_cookie_by_name(self.session.cookies, name)
+                
+            response_data = response_json(response)
+            if response_data.get("code") != 200:
+                self.logger.error(f"直接登录失败: {response_data.get('message') or response_data.get('msg', '未知错误')} "
+                                  f"(响应码: {response_data.get('code')})")
+                return False, None
+                
+            music_u = response.cookies.get("MUSIC_U")
+            csrf = response.cookies.get("__csrf")
+            if not music_u or not csrf:
+                self.logger.error("直接登录的响应中没有 MUSIC_U 或 __csrf")
+                return False, None
+                
+            self.expires = self._cookie_expiry(response, response_data)
+            self.logger.info("登录成功并获取Cookie")
+            return True, {"Cookie_MUSIC_U": music_u, "Cookie___csrf": csrf}
             
+        except Exception as e:
+            self.logger.error(f"直接登录时发生异常: {str(e)}")
+            return False, None
+
+    def _login_proxy(self, phone: str, password: Optional[str],
+                     md5_password: Optional[str]) -> Tuple[bool, Optional[Dict[str, str]]]:
+        """通过登录代理登录"""
+        try:
             # 构建参数，优先使用md5_password
             params = {"phone": phone}
             
             if md5_password:
                 params["md5_password"] = md5_password
                 self.logger.debug("使用MD5加密密码登录")
-            elif password:
+            else:
                 params["password"] = password
                 self.logger.debug("使用明文密码登录")
-            else:
-                self.logger.error("未提供密码，无法登录")
-                return False, None
             
             # 发送登录请求
-            response = requests.get(self.login_api, params=params)
+            response = self.session.get(self.login_api, params=params)
             
             # 检查响应状态
             if response.status_code != 200:
@@ -46,7 +155,7 @@ class AuthService:
                 return False, None
             
             # 解析响应数据
-            response_data = response.json()
+            response_data = response_json(response)
             if response_data.get("code") != 200:
                 self.logger.error(f"登录失败: {response_data.get('message', '未知错误')}")
                 return False, None
@@ -99,11 +208,26 @@ class AuthService:
                 "Cookie___csrf": csrf
             }
             
+            self.expires = self._cookie_expiry(response, response_data)
             self.logger.info("登录成功并获取Cookie")
-            self.logger.debug(f"成功获取MUSIC_U: {music_u[:10]}... 和 __csrf: {csrf}")
+            self.logger.debug("成功获取MUSIC_U: %s... 和 __csrf: %s", music_u[:10], csrf)
             
             return True, cookie_dict
             
         except Exception as e:
             self.logger.error(f"登录过程发生异常: {str(e)}")
             return False, None
+
+    @staticmethod
+    def _cookie_expiry(response: requests.Response, response_data: Dict) -> Optional[float]:
+        """从登录响应中获取 MUSIC_U 的过期时间"""
+        for cookie in response.cookies:
+            if cookie.name == "MUSIC_U" and cookie.expires:
+                return float(cookie.expires)
+                
+        cookie_str = response_data.get("cookie")
+        for source in (cookie_str if isinstance(cookie_str, str) else "", response.headers.get("Set-Cookie", "")):
+            expires = parse_cookie_expiry(source) if source else None
+            if expires:
+                return expires
+        return None
@@ -0,0 +1,132 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Set, Tuple
+
+from .storage import state_path
+
+# 任务按北京时间每日重置
+BEIJING = timezone(timedelta(hours=8))
+
+DONE = "done"
+PENDING = "pending"
+SKIPPED = "skipped"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS actions (
+    idempotency_key TEXT PRIMARY KEY,
+    account TEXT NOT NULL,
+    day TEXT NOT NULL,
+    action TEXT NOT NULL,
+    work_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    code INTEGER,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_actions_account_day ON actions (account, day, action);
+"""
+
+
+def today() -> str:
+    """当前的任务日期（北京时间）"""
+    return datetime.now(BEIJING).strftime("%Y-%m-%d")
+
+
+class CheckpointStore:
+    """基于 SQLite 的运行检查点
+
+    按账号和日期记录每个作品的上报与评分状态。每条记录以
+    (账号, 日期, 任务ID, 作品ID, 动作) 的摘要作为幂等键，
+    中断后重新运行时跳过已完成的作品，重试路径也不会重复评分。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or state_path("checkpoint.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def key(account: str, task_id: Any, work_id: Any, action: str, day: Optional[str] = None) -> str:
+        """生成幂等键"""
+        raw = f"{account}\0{day or today()}\0{task_id}\0{work_id}\0{action}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def begin(self, key: str, account: str, task_id: Any, work_id: Any, action: str) -> bool:
+        """登记即将执行的动作，已完成时返回 False"""
+        self._execute(
+            "INSERT OR IGNORE INTO actions VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)",
+            (key, account, today(), action, str(work_id), str(task_id), PENDING, time.time())
+        )
+        return not self.is_done(key)
+
+    def finish(self, key: str, status: str, code: Optional[int] = None) -> None:
+        """记录动作结果和响应码"""
+        self._execute(
+            "UPDATE actions SET status = ?, code = ?, updated = ? WHERE idempotency_key = ?",
+            (status, code, time.time(), key)
+        )
+
+    def status(self, key: str) -> Optional[str]:
+        row = self._execute("SELECT status FROM actions WHERE idempotency_key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def is_done(self, key: str) -> bool:
+        """动作是否已经完成（成功或已确定跳过）"""
+        return self.status(key) in (DONE, SKIPPED)
+
+    def done_works(self, account: str, action: str, day: Optional[str] = None,
+                   statuses: Tuple[str, ...] = (DONE, SKIPPED)) -> Set[str]:
+        """某账号当天指定动作处于给定状态（默认为已完成或已跳过）的作品ID"""
+        placeholders = ", ".join("?" * len(statuses))
+        rows = self._execute(
+            f"SELECT work_id FROM actions WHERE account = ? AND day = ? AND action = ? AND status IN ({placeholders})",
+            (account, day or today(), action, *statuses)
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def mark_day_complete(self, account: str) -> None:
+        """记录账号当天的任务已全部完成"""
+        key = self.key(account, "", "", "day")
+        self.begin(key, account, "", "", "day")
+        self.finish(key, DONE)
+
+    def is_day_complete(self, account: str) -> bool:
+        """账号当天的任务是否已全部完成"""
+        return self.is_done(self.key(account, "", "", "day"))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_store: Optional[CheckpointStore] = None
+_default_lock = threading.Lock()
+
+
+def get_checkpoint_store(config=None) -> Optional[CheckpointStore]:
+    """获取进程内共享的检查点存储，配置项 checkpoint 为 false 时返回 None"""
+    global _default_store
+    if config is not None and not config.get("checkpoint", True):
+        return None
+    if _default_store is None:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = CheckpointStore()
+    return _default_store
+
+
+def set_checkpoint_store(store: Optional[CheckpointStore]) -> None:
+    """替换进程内共享的检查点存储，传入 None 时下次使用时重新创建"""
+    global _default_store
+    with _default_lock:
+        _default_store = store
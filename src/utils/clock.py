@@ -0,0 +1,85 @@
+import threading
+import time
+from typing import Optional
+
+
+class Clock:
+    """系统时钟，time 为墙上时间，monotonic 用于计算间隔"""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """虚拟时钟
+
+    sleep 立即返回并把时间向前推进，用于模拟运行和测试：
+    需要等待几分钟的评分流程可以在几毫秒内走完，且每次运行的时间线完全相同。
+    """
+
+    def __init__(self, start: float = 0.0, epoch: float = 1_700_000_000.0):
+        self.epoch = epoch
+        self._now = start
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        return self.epoch + self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        """把时间向前推进指定秒数"""
+        if seconds > 0:
+            with self._lock:
+                self._now += seconds
+
+
+_default_clock: Optional[Clock] = None
+_default_lock = threading.Lock()
+
+
+def get_clock() -> Clock:
+    """获取进程内共享的时钟"""
+    global _default_clock
+    if _default_clock is None:
+        with _default_lock:
+            if _default_clock is None:
+                _default_clock = Clock()
+    return _default_clock
+
+
+def set_clock(clock: Optional[Clock]) -> None:
+    """替换进程内共享的时钟，传入 None 时恢复系统时钟"""
+    global _default_clock
+    with _default_lock:
+        _default_clock = clock
+
+
+# 以下函数在每次调用时才查找共享时钟，作为默认的 clock/sleep 参数：
+# 在 set_clock 之前创建的限流器、重试器等对象也会使用替换后的时钟
+
+
+def wall_time() -> float:
+    """共享时钟的墙上时间"""
+    return get_clock().time()
+
+
+def monotonic() -> float:
+    """共享时钟的单调时间"""
+    return get_clock().monotonic()
+
+
+def sleep(seconds: float) -> None:
+    """按共享时钟等待"""
+    get_clock().sleep(seconds)
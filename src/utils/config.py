@@ -1,28 +1,108 @@
 import json
 import os
 import random
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+CONFIG_PATH = "config/setting.json"
+
+# 配置项的类型和默认值，加载时统一转换
+SCHEMA: Dict[str, Tuple[type, Any]] = {
+    "wait_time_min": (float, 15.0),
+    "wait_time_max": (float, 20.0),
+    "score": (int, 3),
+    "max_retries": (int, 3),
+    "smtp_server": (str, "smtp.gmail.com"),
+    "smtp_port": (int, 465),
+    "notify_window": (float, 0.0),
+    "checkpoint": (bool, True),
+    # Cookie 验证结果的有效期（秒），为 0 时每次运行都预检
+    "validation_ttl": (float, 0.0),
+    # Cookie 在过期前多少天刷新，多个账号的刷新在多少小时内错开
+    "refresh_margin_days": (float, 3.0),
+    "refresh_spread_hours": (float, 24.0),
+    # 资源状态异常的作品在多少小时内不再尝试，为 0 时不记录作品评分结果
+    "outcome_ttl_hours": (float, 24.0),
+    # 常驻模式的调度配置，时间为北京时间
+    "daemon_score_time": (str, "09:00"),
+    "daemon_score_spread": (float, 0.0),
+    "daemon_refresh_time": (str, "22:00"),
+    "daemon_jitter": (float, 600.0),
+}
+
+# 评分策略 -> (名称不含英文时的评分, 含英文时的评分)
+SCORE_STRATEGIES = {
+    1: ("1", "2"),  # 1-2分策略
+    2: ("2", "3"),  # 2-3分策略
+    3: ("3", "4"),  # 3-4分策略（默认）
+}
+FIXED_SCORE = ("4", "4")  # 固定4分
+
+
+def _coerce(key: str, value: Any, kind: type) -> Any:
+    """把配置值转换为声明的类型"""
+    try:
+        if kind is bool and isinstance(value, str):
+            return value.strip().lower() not in ("0", "false", "no", "off", "")
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"配置项 {key} 的值无效: {value!r}")
 
 
 class Config:
-    def __init__(self):
-        self.config_data: Dict = self._load_config()
+    """运行配置
+
+    加载时只解析和校验一次：配置项按 SCHEMA 转换类型，
+    等待时间范围和评分策略预先计算好。从文件加载的配置可以在
+    文件修改后通过 reload_if_changed 原地重新加载，持有同一实例的组件都会看到新配置。
+    """
+
+    def __init__(self, config_data: Optional[Dict] = None, path: str = CONFIG_PATH,
+                 rng: Optional[random.Random] = None):
+        # 等待时间的随机源，模拟运行时传入固定种子以复现同一时间线
+        self.rng = rng or random.Random()
+        self.path: Optional[str] = None
+        self._mtime: Optional[int] = None
+        if config_data is None:
+            config_data = self._load_config(path)
+        self._apply(dict(config_data))
+
+    def _apply(self, config: Dict) -> None:
+        """校验配置并预先计算派生值"""
+        self._validate_config(config)
+        for key, (kind, _) in SCHEMA.items():
+            config[key] = _coerce(key, config[key], kind)
+            
+        wait_min, wait_max = config["wait_time_min"], config["wait_time_max"]
+        if wait_min < 0 or wait_max < wait_min:
+            raise ValueError(f"等待时间范围无效: {wait_min} ~ {wait_max}")
+            
+        self.wait_time_min: float = wait_min
+        self.wait_time_max: float = wait_max
+        self.score_strategy: Tuple[str, str] = SCORE_STRATEGIES.get(config["score"], FIXED_SCORE)
+        self.max_retries: int = config["max_retries"]
+        self.config_data: Dict = config
     
-    def _load_config(self) -> Dict:
+    def _load_config(self, path: str) -> Dict:
         if self._check_env_variables():
             return self._load_from_env()
-        return self._load_from_file()
+        return self._load_from_file(path)
     
     def _check_env_variables(self) -> bool:
+        """设置了 ACCOUNTS，或同时设置了 MUSIC_U 和 CSRF 时从环境变量加载"""
+        if os.getenv("ACCOUNTS"):
+            return True
         required_vars = ["MUSIC_U", "CSRF"]
         return all(os.getenv(var) for var in required_vars)
     
     def _load_from_env(self) -> Dict:
         config = {}
         
-        # 必需的环境变量
-        config["Cookie_MUSIC_U"] = os.getenv("MUSIC_U")
-        config["Cookie___csrf"] = os.getenv("CSRF")
+        # 单账号的 Cookie，设置了 ACCOUNTS 时可以省略
+        if music_u := os.getenv("MUSIC_U"):
+            config["Cookie_MUSIC_U"] = music_u
+        if csrf := os.getenv("CSRF"):
+            config["Cookie___csrf"] = csrf
         
         # 可选的环境变量
         if notify_email := os.getenv("NOTIFY_EMAIL"):
@@ -39,6 +119,8 @@ class Config:
             config["wait_time_max"] = float(wait_max)
         if score := os.getenv("SCORE"):
             config["score"] = int(score)
+        if score_rules := os.getenv("SCORE_RULES"):
+            config["score_rules"] = json.loads(score_rules)
             
         # 自动登录相关配置
         if phone := os.getenv("NETEASE_PHONE"):
@@ -54,18 +136,23 @@ class Config:
         if gh_repo := os.getenv("GH_REPO"):
             config["gh_repo"] = gh_repo
             
+        # 多账号配置，JSON 数组格式
+        if accounts := os.getenv("ACCOUNTS"):
+            config["accounts"] = json.loads(accounts)
+            
         config.setdefault("wait_time_min", 15)
         config.setdefault("wait_time_max", 20)
         config.setdefault("score", 3)  # 默认使用3-4分策略
         
         return config
     
-    def _load_from_file(self) -> Dict:
+    def _load_from_file(self, config_path: str = CONFIG_PATH) -> Dict:
         try:
-            config_path = "config/setting.json"
             if not os.path.exists(config_path):
                 raise FileNotFoundError(f"配置文件 {config_path} 不存在")
                 
+            self.path = config_path
+            self._mtime = os.stat(config_path).st_mtime_ns
             with open(config_path, "r", encoding="utf-8") as file:
                 config = json.loads(file.read())
                 
@@ -77,16 +164,65 @@ class Config:
             
     def _validate_config(self, config: Dict) -> None:
         required_keys = ["Cookie_MUSIC_U", "Cookie___csrf"]
-        for key in required_keys:
-            if not config.get(key):
-                raise ValueError(f"配置文件中缺少必要的配置项: {key}")
+        accounts = config.get("accounts")
+        if isinstance(accounts, dict):
+            # 以账号名为键的分节写法
+            accounts = config["accounts"] = [
+                {"name": name, **(section or {})} for name, section in accounts.items()
+            ]
+        if accounts is not None:
+            if not isinstance(accounts, list) or not accounts:
+                raise ValueError("配置项 accounts 必须是非空列表")
+            for index, account in enumerate(accounts):
+                for key in required_keys:
+                    if not account.get(key):
+                        raise ValueError(f"第 {index + 1} 个账号缺少必要的配置项: {key}")
+        else:
+            for key in required_keys:
+                if not config.get(key):
+                    raise ValueError(f"配置文件中缺少必要的配置项: {key}")
+        
+        score_rules = config.get("score_rules")
+        if score_rules is not None and not (
+                isinstance(score_rules, list) and all(isinstance(rule, dict) for rule in score_rules)):
+            raise ValueError("配置项 score_rules 必须是规则对象的列表")
         
         # 设置默认值
-        config.setdefault("wait_time_min", 15)
-        config.setdefault("wait_time_max", 20)
-        config.setdefault("smtp_server", "smtp.gmail.com")
-        config.setdefault("smtp_port", 465)
-        config.setdefault("score", 3)
+        for key, (_, default) in SCHEMA.items():
+            config.setdefault(key, default)
+
+    def reload_if_changed(self) -> bool:
+        """配置文件的修改时间变化时原地重新加载，返回是否已重新加载
+
+        新文件校验失败时保留原配置并抛出异常，文件再次修改后会重新尝试。
+        """
+        if self.path is None:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+            
+        self._mtime = mtime
+        with open(self.path, "r", encoding="utf-8") as file:
+            config = json.loads(file.read())
+        self._apply(config)
+        return True
+
+    def account_configs(self) -> List["Config"]:
+        """每个账号解析好的配置"""
+        return [Config(account) for account in self.accounts()]
+
+    def accounts(self) -> List[Dict]:
+        """获取所有账号的配置，账号配置覆盖顶层的公共配置"""
+        accounts = self.config_data.get("accounts")
+        if not accounts:
+            return [dict(self.config_data)]
+            
+        base = {k: v for k, v in self.config_data.items() if k != "accounts"}
+        return [{**base, **account} for account in accounts]
 
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置项"""
@@ -94,6 +230,18 @@ class Config:
 
     def get_wait_time(self) -> float:
         """获取随机等待时间"""
-        min_time = float(self.get("wait_time_min", 15))
-        max_time = float(self.get("wait_time_max", 20))
-        return random.uniform(min_time, max_time)
\ No newline at end of file
+        return self.rng.uniform(self.wait_time_min, self.wait_time_max)
+
+
+_shared_config: Optional[Config] = None
+_shared_lock = threading.Lock()
+
+
+def get_config() -> Config:
+    """获取进程内共享的配置，首次调用时加载"""
+    global _shared_config
+    if _shared_config is None:
+        with _shared_lock:
+            if _shared_config is None:
+                _shared_config = Config()
+    return _shared_config
\ No newline at end of file
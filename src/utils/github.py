@@ -1,22 +1,56 @@
 import base64
+import hashlib
 import json
+import hmac
 import os
-from typing import Dict, Optional
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-import nacl.encoding
-import nacl.public
 import requests
 
+from ..utils.http import get_shared_session
+from ..utils.json_codec import response_json
 from ..utils.logger import Logger
+from ..utils.metrics import record_operation
+from ..utils.retry import Retrier
+from ..utils.storage import JsonStore
+
+if TYPE_CHECKING:
+    from nacl.public import SealedBox
+
+# 本地摘要存储中保存本机随机盐的键，不含 "/"，不会与 "仓库/secret 名" 冲突
+SALT_KEY = "salt"
+
+
+def _sealed_box(public_key: bytes) -> "SealedBox":
+    """用仓库公钥创建加密盒，nacl 只在真正需要加密时才导入"""
+    from nacl.public import PublicKey, SealedBox
+    return SealedBox(PublicKey(public_key))
 
 
 class GitHubService:
-    def __init__(self, logger: Logger):
+    _salt_lock = threading.Lock()
+
+    def __init__(self, logger: Logger, session: Optional[requests.Session] = None,
+                 store: Optional[JsonStore] = None):
         self.logger = logger
+        self.session = session or get_shared_session()
+        self.store = store or JsonStore("github_secrets.json")
+        self.retrier = Retrier(logger)
         self.api_base = "https://api.github.com"
         self.token = os.environ.get("GH_TOKEN")
-        self.repo_owner = os.environ.get("GH_REPO").split("/")[0]
-        self.repo_name = os.environ.get("GH_REPO", "").split("/")[-1]
+        # 仓库公钥缓存: repo -> (key_id, SealedBox)，只在本客户端（同一个 Token）内复用
+        self._public_keys: Dict[str, Tuple[str, "SealedBox"]] = {}
+        self._keys_lock = threading.Lock()
+        
+        # GH_REPO 支持以逗号分隔的多个仓库
+        self.repos = [repo.strip() for repo in os.environ.get("GH_REPO", "").split(",") if repo.strip()]
+        first_repo = self.repos[0] if self.repos else ""
+        self.repo_owner = first_repo.split("/")[0]
+        self.repo_name = first_repo.split("/")[-1]
         
         if not self.token:
             raise ValueError("GitHub Token未设置，无法更新Secrets")
@@ -28,21 +62,45 @@ class GitHubService:
             "Authorization": f"token {self.token}",
             "Accept": "application/vnd.github.v3+json"
         }
+
+    @property
+    def repo(self) -> str:
+        return f"{self.repo_owner}/{self.repo_name}"
         
-    def get_public_key(self) -> Optional[Dict]:
+    def get_public_key(self, repo: Optional[str] = None) -> Optional[Dict]:
         """获取仓库的公钥，用于加密secrets"""
         try:
-            url = f"{self.api_base}/repos/{self.repo_owner}/{self.repo_name}/actions/secrets/public-key"
-            response = requests.get(url, headers=self.headers)
+            url = f"{self.api_base}/repos/{repo or self.repo}/actions/secrets/public-key"
+            response = self.session.get(url, headers=self.headers)
             
             if response.status_code != 200:
                 self.logger.error(f"获取公钥失败: {response.status_code} - {response.text}")
                 return None
                 
-            return response.json()
+            return response_json(response)
         except Exception as e:
             self.logger.error(f"获取公钥时出错: {str(e)}")
             return None
+
+    def _get_sealed_box(self, repo: str) -> Optional[Tuple[str, "SealedBox"]]:
+        """获取仓库公钥对应的加密盒，按仓库缓存"""
+        cached = self._public_keys.get(repo)
+        if cached:
+            return cached
+            
+        key_data = self.get_public_key(repo)
+        if not key_data:
+            return None
+            
+        box = _sealed_box(base64.b64decode(key_data["key"]))
+        with self._keys_lock:
+            self._public_keys[repo] = (key_data["key_id"], box)
+        return key_data["key_id"], box
+
+    def _invalidate_public_key(self, repo: str) -> None:
+        """公钥可能已轮换，丢弃缓存"""
+        with self._keys_lock:
+            self._public_keys.pop(repo, None)
     
     def encrypt_secret(self, public_key: str, public_key_id: str, secret_value: str) -> Dict:
         """使用仓库的公钥加密secret值"""
@@ -51,7 +109,7 @@ class GitHubService:
             public_key_bytes = base64.b64decode(public_key)
             
             # 创建加密盒
-            box = nacl.public.SealedBox(nacl.public.PublicKey(public_key_bytes))
+            box = _sealed_box(public_key_bytes)
             
             # 加密值
             encrypted = box.encrypt(secret_value.encode("utf-8"))
@@ -64,51 +122,110 @@ class GitHubService:
         except Exception as e:
             self.logger.error(f"加密secret时出错: {str(e)}")
             raise
+
+    def _salt(self) -> bytes:
+        """本机的随机盐，首次使用时生成并保存"""
+        with self._salt_lock:
+            salt = self.store.get(SALT_KEY)
+            if salt is None:
+                salt = secrets.token_hex(32)
+                self.store.set(SALT_KEY, salt)
+        return bytes.fromhex(salt)
+
+    def _secret_hash(self, repo: str, secret_name: str, secret_value: str) -> str:
+        """secret 值的加盐摘要（HMAC-SHA256），只在本地保存摘要而不保存原值
+
+        盐按安装随机生成，COOKIE_EXPIRES 这类取值范围很小的 secret 也无法从摘要反推原值。
+        """
+        message = f"{repo}\0{secret_name}\0{secret_value}".encode("utf-8")
+        return hmac.new(self._salt(), message, hashlib.sha256).hexdigest()
+
+    def _is_unchanged(self, repo: str, secret_name: str, secret_value: str) -> bool:
+        """secret 的值与上次成功更新时相同"""
+        return self.store.get(f"{repo}/{secret_name}") == self._secret_hash(repo, secret_name, secret_value)
     
-    def update_secret(self, secret_name: str, secret_value: str) -> bool:
-        """更新GitHub仓库中的secret"""
+    def update_secret(self, secret_name: str, secret_value: str, repo: Optional[str] = None,
+                      force: bool = False) -> bool:
+        """更新GitHub仓库中的secret，值未变化时跳过"""
+        start = time.perf_counter()
+        success = self._update_secret(secret_name, secret_value, repo or self.repo, force)
+        record_operation("update_secret", start, "ok" if success else "failed")
+        return success
+
+    def _update_secret(self, secret_name: str, secret_value: str, repo: str, force: bool) -> bool:
+        store_key = f"{repo}/{secret_name}"
+        secret_hash = self._secret_hash(repo, secret_name, secret_value)
+        
         try:
-            # 获取公钥
-            key_data = self.get_public_key()
-            if not key_data:
+            if not force and self.store.get(store_key) == secret_hash:
+                self.logger.info(f"secret '{secret_name}' 未变化，跳过更新 ({repo})")
+                return True
+                
+            # 获取缓存的公钥
+            sealed = self._get_sealed_box(repo)
+            if not sealed:
                 return False
+            key_id, box = sealed
                 
             # 加密secret值
-            encrypted_data = self.encrypt_secret(
-                key_data["key"],
-                key_data["key_id"],
-                secret_value
-            )
+            encrypted = box.encrypt(secret_value.encode("utf-8"))
             
             # 更新secret
-            url = f"{self.api_base}/repos/{self.repo_owner}/{self.repo_name}/actions/secrets/{secret_name}"
+            url = f"{self.api_base}/repos/{repo}/actions/secrets/{secret_name}"
             payload = {
-                "encrypted_value": encrypted_data["encrypted_value"],
-                "key_id": encrypted_data["key_id"]
+                "encrypted_value": base64.b64encode(encrypted).decode("utf-8"),
+                "key_id": key_id
             }
             
-            response = requests.put(url, headers=self.headers, json=payload)
+            # 更新 secret 是幂等的 PUT，可以安全重试
+            response = self.retrier.call(url, lambda: self.session.put(url, headers=self.headers, json=payload))
             
             if response.status_code not in (201, 204):
+                self._invalidate_public_key(repo)
                 self.logger.error(f"更新secret '{secret_name}'失败: {response.status_code} - {response.text}")
                 return False
                 
-            self.logger.info(f"成功更新secret: {secret_name}")
+            self.store.set(store_key, secret_hash)
+            self.logger.info(f"成功更新secret: {secret_name} ({repo})")
             return True
             
         except Exception as e:
             self.logger.error(f"更新secret '{secret_name}'时出错: {str(e)}")
             return False
     
-    def update_cookies(self, cookies: Dict[str, str]) -> bool:
-        """更新Cookie相关的secrets"""
+    def update_cookies(self, cookies: Dict[str, str], repo: Optional[str] = None) -> bool:
+        """更新Cookie相关的secrets，同一仓库的多个secret并发更新"""
         try:
-            results = []
-            for key, value in cookies.items():
-                result = self.update_secret(key, value)
-                results.append(result)
+            if repo is None and len(self.repos) > 1:
+                return all(self.update_cookies_for_repos(cookies).values())
+                
+            repo = repo or self.repo
+            
+            # 有需要更新的 secret 时才获取公钥，先取一次，后续并发请求直接使用缓存
+            changed = [name for name, value in cookies.items() if not self._is_unchanged(repo, name, value)]
+            if changed and not self._get_sealed_box(repo):
+                return False
+                
+            with ThreadPoolExecutor(max_workers=max(1, len(cookies))) as executor:
+                results = list(executor.map(
+                    lambda item: self.update_secret(item[0], item[1], repo),
+                    cookies.items()
+                ))
                 
             return all(results)
         except Exception as e:
             self.logger.error(f"更新Cookies时出错: {str(e)}")
             return False
+
+    def update_cookies_for_repos(self, cookies: Dict[str, str], repos: Optional[List[str]] = None,
+                                 max_workers: int = 4) -> Dict[str, bool]:
+        """批量更新多个仓库的secrets，使用有界线程池并发执行"""
+        repos = repos or self.repos
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(repos)))) as executor:
+            results = executor.map(lambda repo: self.update_cookies(cookies, repo), repos)
+            summary = dict(zip(repos, results))
+            
+        failed = [repo for repo, ok in summary.items() if not ok]
+        if failed:
+            self.logger.error(f"以下仓库更新secrets失败: {', '.join(failed)}")
+        return summary
@@ -0,0 +1,257 @@
+import functools
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .clock import get_clock
+from .json_codec import response_json
+from .metrics import HTTP_RESPONSES, HTTP_SECONDS, RATE_LIMITED, endpoint, get_metrics
+from .rate_limiter import LIMITED_HOSTS, RateLimiter, get_rate_limiter
+from .retry import CircuitBreaker, Retrier, get_circuit_breaker
+
+Timeout = Union[float, Tuple[float, float]]
+
+# 所有会话共用的请求头
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "zh-CN,zh;q=0.9",
+    "Connection": "keep-alive",
+}
+
+# 各主机的连接池大小
+POOL_SIZES = {
+    "https://music.163.com": 10,
+    "https://interface.music.163.com": 20,
+    "https://api.github.com": 8,
+    "https://ncma-web.vercel.app": 2,
+}
+
+# 各接口的默认超时 (连接, 读取)，按最长前缀匹配
+TIMEOUTS: Dict[str, Timeout] = {
+    "https://music.163.com": (3.05, 10),
+    "https://interface.music.163.com": (3.05, 10),
+    "https://interface.music.163.com/weapi/": (3.05, 15),
+    "https://api.github.com": (3.05, 15),
+    "https://ncma-web.vercel.app": (5, 30),
+}
+DEFAULT_TIMEOUT: Timeout = (3.05, 15)
+
+# 可缓存的 GET 接口及其有效期（秒），同一会话内的重复查询直接复用响应
+CACHE_TTLS: Dict[str, float] = {
+    "https://music.163.com/api/nuser/account/get": 300,
+    "https://interface.music.163.com/api/music/partner/daily/task/get": 60,
+    "https://interface.music.163.com/api/music/partner/extra/wait/evaluate/work/list": 60,
+}
+
+# 评分成功后任务状态发生变化，需要失效的缓存
+TASK_ENDPOINTS = (
+    "https://interface.music.163.com/api/music/partner/daily/task/get",
+    "https://interface.music.163.com/api/music/partner/extra/wait/evaluate/work/list",
+)
+
+# 主机路由覆盖，用于把请求转发到本地模拟服务
+_routes: Dict[str, str] = {}
+
+
+def set_routes(routes: Optional[Dict[str, str]]) -> None:
+    """设置主机路由覆盖，如 {"https://music.163.com": "http://127.0.0.1:8000"}，传入 None 时清除"""
+    global _routes
+    _routes = dict(routes or {})
+
+
+def route_url(url: str) -> str:
+    """按路由覆盖改写请求地址"""
+    for host, target in _routes.items():
+        if url.startswith(host):
+            return target + url[len(host):]
+    return url
+
+
+def timeout_for(url: str) -> Timeout:
+    """按最长前缀匹配接口的默认超时"""
+    best, timeout = -1, DEFAULT_TIMEOUT
+    for prefix, value in TIMEOUTS.items():
+        if url.startswith(prefix) and len(prefix) > best:
+            best, timeout = len(prefix), value
+    return timeout
+
+
+class ClientAdapter(HTTPAdapter):
+    """连接池适配器
+
+    未显式指定超时的请求使用接口默认超时；挂载了限流器时，
+    发送前先从主机令牌桶获取许可。设置了路由覆盖时，
+    超时、限流和熔断仍按原主机处理，只改写实际连接的地址。
+    主机熔断期间请求直接失败；网络错误和 5xx 计入熔断器。
+    每个请求的耗时和状态码按接口记录到指标注册表。
+    """
+
+    def __init__(self, limiter: Optional[RateLimiter] = None, breaker: Optional[CircuitBreaker] = None,
+                 **kwargs):
+        self.limiter = limiter
+        self.breaker = breaker
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = timeout_for(request.url)
+        breaker = self.breaker or get_circuit_breaker()
+        breaker.before(request.url)
+        if self.limiter is not None:
+            self.limiter.acquire(request.url)
+        url = request.url
+        if _routes:
+            request.url = route_url(url)
+
+        metrics = get_metrics()
+        name = endpoint(url)
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception as e:
+            metrics.inc(HTTP_RESPONSES, endpoint=name, status="error")
+            if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+                breaker.record(url, False)
+            else:
+                # 半开状态下的探测请求必须归还名额，否则熔断器一直停在探测中
+                breaker.release(url)
+            raise
+        finally:
+            metrics.observe(HTTP_SECONDS, time.perf_counter() - start, endpoint=name, method=request.method)
+        metrics.inc(HTTP_RESPONSES, endpoint=name, status=response.status_code)
+        breaker.record(url, response.status_code < 500)
+
+        if response.status_code in (429, 503):
+            metrics.inc(RATE_LIMITED, operation="http")
+            if self.limiter is not None:
+                self.limiter.on_throttled(url)
+        return response
+
+
+class ResponseCache:
+    """按接口设置有效期的响应缓存，只缓存业务码为 200 的 GET 响应"""
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None):
+        self.ttls = CACHE_TTLS if ttls is None else ttls
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, requests.Response]] = {}
+
+    def _ttl(self, url: str) -> float:
+        return self.ttls.get(url.split("?", 1)[0], 0)
+
+    @staticmethod
+    def _key(url: str, params=None) -> str:
+        if params:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(sorted(dict(params).items()))}"
+        return url
+
+    def get(self, url: str, params=None) -> Optional[requests.Response]:
+        """获取未过期的缓存响应"""
+        if not self._ttl(url):
+            return None
+        key = self._key(url, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= get_clock().monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def put(self, url: str, response: requests.Response, params=None) -> None:
+        """缓存响应"""
+        ttl = self._ttl(url)
+        if not ttl or response.status_code != 200:
+            return
+        try:
+            if response_json(response).get("code") != 200:
+                return
+        except ValueError:
+            return
+        with self._lock:
+            self._entries[self._key(url, params)] = (get_clock().monotonic() + ttl, response)
+
+    def invalidate(self, *prefixes: str) -> None:
+        """失效指定前缀的缓存，不传参数时清空全部缓存"""
+        with self._lock:
+            if not prefixes:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k.startswith(prefixes)]:
+                del self._entries[key]
+
+
+class CachingSession(requests.Session):
+    """带响应缓存的会话，验证器、机器人和任务共享同一会话时复用查询结果
+
+    GET 请求按接口的重试策略自动重试，其他方法由调用方决定是否重试。
+    """
+
+    def __init__(self, cache: Optional[ResponseCache] = None, retrier: Optional[Retrier] = None):
+        super().__init__()
+        self.cache = cache or ResponseCache()
+        self.retrier = retrier or Retrier()
+
+    def request(self, method, url, *args, **kwargs):
+        if method.upper() != "GET":
+            return super().request(method, url, *args, **kwargs)
+
+        params = kwargs.get("params")
+        cached = self.cache.get(url, params)
+        if cached is not None:
+            return cached
+
+        send = functools.partial(super().request, method, url, *args, **kwargs)
+        response = self.retrier.call(url, send)
+        self.cache.put(url, response, params)
+        return response
+
+
+def build_adapters(rate_limited: bool = True, limiter: Optional[RateLimiter] = None,
+                   pool_scale: int = 1) -> Dict[str, HTTPAdapter]:
+    """按主机构建连接池适配器，可在多个会话间共享以复用连接"""
+    limiter = (limiter or get_rate_limiter()) if rate_limited else None
+    adapters: Dict[str, HTTPAdapter] = {
+        "https://": ClientAdapter(pool_maxsize=10 * pool_scale),
+        "http://": ClientAdapter(pool_maxsize=10 * pool_scale),
+    }
+    for host, size in POOL_SIZES.items():
+        adapters[host] = ClientAdapter(
+            limiter=limiter if host in LIMITED_HOSTS else None,
+            pool_connections=1,
+            pool_maxsize=size * pool_scale
+        )
+    return adapters
+
+
+def create_session(cookies: Optional[Dict[str, str]] = None,
+                   adapters: Optional[Dict[str, HTTPAdapter]] = None,
+                   rate_limited: bool = True) -> requests.Session:
+    """创建配置好连接池、超时、请求头和响应缓存的会话"""
+    session = CachingSession()
+    session.headers.update(DEFAULT_HEADERS)
+    for prefix, adapter in (adapters or build_adapters(rate_limited)).items():
+        session.mount(prefix, adapter)
+    for name, value in (cookies or {}).items():
+        session.cookies.set(name, value)
+    return session
+
+
+_shared_session: Optional[requests.Session] = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_session() -> requests.Session:
+    """获取进程内共享的无 Cookie 会话，供登录和 GitHub 等服务复用连接"""
+    global _shared_session
+    if _shared_session is None:
+        with _shared_lock:
+            if _shared_session is None:
+                _shared_session = create_session()
+    return _shared_session
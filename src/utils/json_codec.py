@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+from typing import Any, Optional, Union
+
+import requests
+
+class JsonCodec:
+    """标准库实现的 JSON 编解码器
+
+    序列化保持 json.dumps 的默认格式（", " 和 ": " 分隔、非 ASCII 字符转义），
+    weapi 请求的明文与原先逐字节相同。
+    """
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj)
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return self.dumps(obj).encode("utf-8")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """orjson 实现的 JSON 编解码器，只用于解析
+
+    orjson 只能输出紧凑且不转义非 ASCII 字符的格式，序列化仍使用标准库，
+    两种后端对任何数据都生成相同的字节。
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._loads = orjson.loads
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+
+def create_json_codec(backend: Optional[str] = None) -> JsonCodec:
+    """创建编解码器，默认在安装了 orjson 时使用 orjson，可通过环境变量 NCMP_JSON=json 强制使用标准库"""
+    backend = (backend or os.environ.get("NCMP_JSON") or "auto").lower()
+    if backend == JsonCodec.name:
+        return JsonCodec()
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        if backend == OrjsonCodec.name:
+            raise RuntimeError("未安装 orjson，无法使用 orjson 编解码器")
+        return JsonCodec()
+
+
+_default_codec: Optional[JsonCodec] = None
+_default_lock = threading.Lock()
+
+
+def get_json_codec() -> JsonCodec:
+    """获取进程内共享的 JSON 编解码器"""
+    global _default_codec
+    if _default_codec is None:
+        with _default_lock:
+            if _default_codec is None:
+                _default_codec = create_json_codec()
+    return _default_codec
+
+
+def set_json_codec(codec: Optional[JsonCodec]) -> None:
+    """替换进程内共享的 JSON 编解码器，传入 None 时恢复默认"""
+    global _default_codec
+    with _default_lock:
+        _default_codec = codec
+
+
+def dumps(obj: Any) -> str:
+    return get_json_codec().dumps(obj)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    return get_json_codec().dumps_bytes(obj)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return get_json_codec().loads(data)
+
+
+def response_json(response: requests.Response) -> Any:
+    """解析响应体，代替 Response.json()，解析失败时抛出 ValueError"""
+    return get_json_codec().loads(response.content)
@@ -1,31 +1,178 @@
+import atexit
+import contextvars
+import json
 import logging
-from typing import Optional
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Iterator, Optional
+
+# 日志上下文：账号、阶段和当前作品，按协程/线程上下文隔离
+CONTEXT_FIELDS = ("account", "phase", "work")
+_context = {field: contextvars.ContextVar(f"ncmp_log_{field}", default=None) for field in CONTEXT_FIELDS}
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+_configure_lock = threading.Lock()
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """在代码块内为日志附加上下文字段，如 account、phase、work"""
+    tokens = [(_context[key], _context[key].set(value)) for key, value in fields.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """在产生日志的线程中把上下文字段写入日志记录"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for field, var in _context.items():
+            setattr(record, field, var.get())
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+# 入队时需要立即格式化的参数类型：这些对象可能在后台线程输出前被调用方修改
+MUTABLE_ARGS = (dict, list, set, bytearray)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """把日志记录放入队列，消息格式化推迟到后台线程真正输出时进行
+
+    参数中有字典、列表等可变对象时在入队时格式化，输出的是调用日志时的状态。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        # 只有一个字典参数时 args 就是调用方的字典本身
+        args = record.args
+        if isinstance(args, dict) or any(isinstance(arg, MUTABLE_ARGS) for arg in args or ()):
+            record.msg, record.args = record.getMessage(), None
+        return record
+
+
+def _env_level(default: Optional[int]) -> Optional[int]:
+    """环境变量 NCMP_LOG_LEVEL 指定的日志级别，未设置时返回 default，无法识别时记录警告并使用 INFO"""
+    name = os.environ.get("NCMP_LOG_LEVEL", "").strip().upper()
+    if not name:
+        return default
+    level = logging.getLevelName(name)
+    if isinstance(level, int):
+        return level
+    logging.getLogger(__name__).warning(f"无法识别的日志级别 NCMP_LOG_LEVEL={name}，使用 INFO")
+    return logging.INFO
+
+
+def configure_logging(level: Optional[int] = logging.INFO, json_format: Optional[bool] = None) -> None:
+    """配置日志输出，进程内只生效一次
+
+    日志经队列交给后台线程写出，调用方不会阻塞在输出上。
+    默认级别为 INFO，请求和响应数据等调试日志不会产生；环境变量 NCMP_LOG_LEVEL 可覆盖日志级别，NCMP_LOG_FORMAT=json 时输出 JSON。
+    已有其他日志配置时保持不变。
+    """
+    global _listener, _handler
+    root = logging.getLogger()
+    if _listener is not None or root.handlers:
+        return
+
+    with _configure_lock:
+        if _listener is not None or root.handlers:
+            return
+
+        if json_format is None:
+            json_format = os.environ.get("NCMP_LOG_FORMAT", "").lower() == "json"
+
+        output = logging.StreamHandler()
+        output.setFormatter(JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT, DATE_FORMAT))
+
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        _handler = DeferredQueueHandler(records)
+        _handler.addFilter(ContextFilter())
+        root.addHandler(_handler)
+        # 先挂上队列再解析级别，级别无效时的警告同样进入队列
+        root.setLevel(_env_level(level))
+
+        _listener = QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def _restart_in_child() -> None:
+    """fork 出的子进程没有后台线程，换用新队列并重新启动监听"""
+    global _listener, _configure_lock
+    _configure_lock = threading.Lock()
+    if _listener is None or _handler is None:
+        return
+    _handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_in_child)
+
+
+def shutdown_logging() -> None:
+    """写出队列中剩余的日志并停止后台线程"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
 
 
 class Logger:
-    def __init__(self, log_level: Optional[int] = logging.DEBUG):
-        # 配置日志格式
-        logging.basicConfig(
-            level=log_level,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        self.logger = logging.getLogger(__name__)
+    def __init__(self, log_level: Optional[int] = logging.INFO, name: Optional[str] = None):
+        # 配置日志格式，只在第一次创建时生效
+        configure_logging(log_level)
+        self.logger = logging.getLogger(f"{__name__}.{name}" if name else __name__)
+        self.prefix = f"[{name}] " if name else ""
 
-    def debug(self, message: str) -> None:
-        self.logger.debug(message)
+    # 附加参数按 % 格式延迟到输出时才拼接，被级别过滤掉的日志不会格式化
+    def debug(self, message: str, *args: Any) -> None:
+        self.logger.debug(self.prefix + message, *args)
 
-    def warning(self, message: str) -> None:
-        self.logger.warning(message)
+    def warning(self, message: str, *args: Any) -> None:
+        self.logger.warning(self.prefix + message, *args)
 
-    def info(self, message: str) -> None:
-        self.logger.info(message)
+    def info(self, message: str, *args: Any) -> None:
+        self.logger.info(self.prefix + message, *args)
 
-    def error(self, message: str) -> None:
-        self.logger.error(message)
+    def error(self, message: str, *args: Any) -> None:
+        self.logger.error(self.prefix + message, *args)
 
     def end(self, message: str, is_error: bool = False) -> None:
         if is_error:
             self.error(message)
         else:
-            self.info(message) 
\ No newline at end of file
+            self.info(message)
\ No newline at end of file
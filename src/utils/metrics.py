@@ -0,0 +1,328 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from .storage import state_dir
+
+# 指标名称，导出时统一加上命名空间前缀
+HTTP_SECONDS = "http_request_duration_seconds"
+HTTP_RESPONSES = "http_responses_total"
+OPERATION_SECONDS = "operation_duration_seconds"
+OPERATIONS = "operations_total"
+API_RESPONSES = "api_responses_total"
+RATE_LIMITED = "rate_limited_total"
+SLEEP_SECONDS = "sleep_seconds_total"
+ENCRYPT_SECONDS = "encrypt_cpu_seconds_total"
+ENCRYPTIONS = "encryptions_total"
+RETRIES = "retries_total"
+CIRCUIT_REJECTED = "circuit_rejected_total"
+
+HELP = {
+    HTTP_SECONDS: "HTTP 请求耗时",
+    HTTP_RESPONSES: "按 HTTP 状态码统计的响应数",
+    OPERATION_SECONDS: "评分、上报、验证和更新 Secret 等操作的耗时",
+    OPERATIONS: "按结果统计的操作数",
+    API_RESPONSES: "按业务响应码统计的接口响应数",
+    RATE_LIMITED: "遇到限流的次数",
+    SLEEP_SECONDS: "主动等待的总时间",
+    ENCRYPT_SECONDS: "weapi 加密占用的 CPU 时间",
+    ENCRYPTIONS: "weapi 加密的请求数",
+    RETRIES: "按失败类型统计的重试次数",
+    CIRCUIT_REJECTED: "熔断期间直接拒绝的请求数",
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def endpoint(url: str) -> str:
+    """请求地址对应的接口名，去掉查询参数"""
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """固定分桶的直方图"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # 最后一个桶对应 +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按分桶上界估算分位数，落在最后一个桶时返回 None"""
+        if not self.count:
+            return 0.0
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def merge(self, data: Dict) -> None:
+        for i, count in enumerate(data["counts"]):
+            self.counts[i] += count
+        self.sum += data["sum"]
+        self.count += data["count"]
+
+    def to_dict(self) -> Dict:
+        return {"counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+
+class MetricsRegistry:
+    """进程内的指标注册表
+
+    计数器和直方图按 (名称, 标签) 聚合，线程安全。可导出为 Prometheus
+    文本文件格式和 JSON 运行摘要，多进程运行时用 snapshot/merge 汇总。
+    """
+
+    def __init__(self, namespace: str = "ncmp"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        """增加计数器"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """记录一次直方图观测值"""
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """记录代码块耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter_values(self, name: str) -> Dict[Labels, float]:
+        with self._lock:
+            return dict(self._counters.get(name, {}))
+
+    def histograms(self, name: str) -> Dict[Labels, Histogram]:
+        with self._lock:
+            return dict(self._histograms.get(name, {}))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict:
+        """导出可序列化的全部指标"""
+        with self._lock:
+            return {
+                "counters": {
+                    name: [[list(map(list, labels)), value] for labels, value in series.items()]
+                    for name, series in self._counters.items()
+                },
+                "histograms": {
+                    name: [[list(map(list, labels)), h.to_dict()] for labels, h in series.items()]
+                    for name, series in self._histograms.items()
+                }
+            }
+
+    def merge(self, snapshot: Dict) -> None:
+        """合并其他进程导出的指标"""
+        with self._lock:
+            for name, series in snapshot.get("counters", {}).items():
+                target = self._counters.setdefault(name, {})
+                for labels, value in series:
+                    key = tuple(map(tuple, labels))
+                    target[key] = target.get(key, 0.0) + value
+            for name, series in snapshot.get("histograms", {}).items():
+                target = self._histograms.setdefault(name, {})
+                for labels, data in series:
+                    key = tuple(map(tuple, labels))
+                    target.setdefault(key, Histogram()).merge(data)
+
+    def to_prometheus(self) -> str:
+        """Prometheus 文本格式"""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full = f"{self.namespace}_{name}"
+                lines += [f"# HELP {full} {HELP.get(name, name)}", f"# TYPE {full} counter"]
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{full}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                full = f"{self.namespace}_{name}"
+                lines += [f"# HELP {full} {HELP.get(name, name)}", f"# TYPE {full} histogram"]
+                for labels, h in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(h.buckets + (float("inf"),), h.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        lines.append(f"{full}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {h.sum:.6f}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _by_label(series: Dict[Labels, float], label: str) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for labels, value in series.items():
+            key = dict(labels).get(label, "")
+            totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    @staticmethod
+    def _describe(histograms: Dict[Labels, Histogram], label: str) -> Dict[str, Dict]:
+        merged: Dict[str, Histogram] = {}
+        for labels, h in histograms.items():
+            merged.setdefault(dict(labels).get(label, ""), Histogram(h.buckets)).merge(h.to_dict())
+        return {
+            key: {
+                "count": h.count,
+                "total": round(h.sum, 6),
+                "mean": round(h.sum / h.count, 6) if h.count else 0.0,
+                "p50": h.quantile(0.5),
+                "p95": h.quantile(0.95)
+            }
+            for key, h in sorted(merged.items())
+        }
+
+    def summary(self) -> Dict:
+        """运行摘要：耗时在服务端延迟、主动等待和本地 CPU 之间的分布"""
+        http = self.histograms(HTTP_SECONDS)
+        sleeps = self._by_label(self.counter_values(SLEEP_SECONDS), "reason")
+        endpoints = self._describe(http, "endpoint")
+        for labels, value in self.counter_values(HTTP_RESPONSES).items():
+            labels = dict(labels)
+            statuses = endpoints.setdefault(labels["endpoint"], {}).setdefault("statuses", {})
+            statuses[labels["status"]] = int(value)
+
+        api_codes: Dict[str, Dict[str, int]] = {}
+        for labels, value in self.counter_values(API_RESPONSES).items():
+            labels = dict(labels)
+            api_codes.setdefault(labels["operation"], {})[labels["code"]] = int(value)
+
+        operations = self._describe(self.histograms(OPERATION_SECONDS), "operation")
+        for labels, value in self.counter_values(OPERATIONS).items():
+            labels = dict(labels)
+            results = operations.setdefault(labels["operation"], {}).setdefault("results", {})
+            results[labels["result"]] = int(value)
+
+        return {
+            "generated": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "time": {
+                "http_seconds": round(sum(h.sum for h in http.values()), 6),
+                "sleep_seconds": {k: round(v, 6) for k, v in sorted(sleeps.items())},
+                "encrypt_cpu_seconds": round(sum(self.counter_values(ENCRYPT_SECONDS).values()), 6),
+                "encryptions": int(sum(self.counter_values(ENCRYPTIONS).values()))
+            },
+            "endpoints": endpoints,
+            "operations": operations,
+            "api_codes": api_codes,
+            "rate_limited": {k: int(v) for k, v in self._by_label(self.counter_values(RATE_LIMITED), "operation").items()}
+        }
+
+    def write_textfile(self, path: str) -> None:
+        """原子写入 Prometheus 文本文件，供 node_exporter textfile 采集"""
+        self._write(path, self.to_prometheus())
+
+    def write_summary(self, path: str) -> None:
+        """写入 JSON 运行摘要"""
+        self._write(path, json.dumps(self.summary(), ensure_ascii=False, indent=2))
+
+    @staticmethod
+    def _write(path: str, content: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            file.write(content)
+        os.replace(tmp, path)
+
+
+_default_registry: Optional[MetricsRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """获取进程内共享的指标注册表"""
+    global _default_registry
+    if _default_registry is None:
+        with _default_lock:
+            if _default_registry is None:
+                _default_registry = MetricsRegistry()
+    return _default_registry
+
+
+def record_operation(operation: str, start: float, result: str) -> None:
+    """记录一次操作的耗时和结果，start 为 time.perf_counter() 的起始值"""
+    metrics = get_metrics()
+    metrics.observe(OPERATION_SECONDS, time.perf_counter() - start, operation=operation)
+    metrics.inc(OPERATIONS, operation=operation, result=result)
+
+
+def metrics_dir() -> str:
+    """指标输出目录，默认为状态目录，可通过环境变量 NCMP_METRICS_DIR 指定"""
+    directory = os.environ.get("NCMP_METRICS_DIR") or state_dir()
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def export_metrics(logger=None, registry: Optional[MetricsRegistry] = None) -> Optional[Tuple[str, str]]:
+    """写出 Prometheus 文本文件和 JSON 运行摘要，返回两个文件路径，写入失败时返回 None"""
+    registry = registry or get_metrics()
+    try:
+        directory = metrics_dir()
+        textfile = os.path.join(directory, "ncmp.prom")
+        summary = os.path.join(directory, "run_summary.json")
+        registry.write_textfile(textfile)
+        registry.write_summary(summary)
+    except OSError as e:
+        if logger is not None:
+            logger.warning(f"写入指标失败: {str(e)}")
+        return None
+
+    if logger is not None:
+        logger.info(f"指标已写入: {textfile}, {summary}")
+    return textfile, summary
@@ -1,79 +1,262 @@
-import smtplib
-import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 
+from .clock import get_clock
 from .config import Config
 from .logger import Logger
+from .storage import JsonStore
+
+# smtplib、ssl 和 email 只在真正发送邮件时才导入，不发通知的运行不必加载
+if TYPE_CHECKING:
+    from email.mime.multipart import MIMEMultipart
+    from smtplib import SMTP
+
+SSL = "ssl"
+TLS = "tls"
+SMTP_TLS_PORT = 587
+
+
+class SmtpMailer:
+    """SMTP 发送器
+
+    一批邮件共用一个已登录的连接；记住每个服务器上次成功的连接方式，
+    下次直接使用，失败时才尝试另一种。
+    """
+
+    # 服务器 -> 上次成功的连接方式
+    _transports: Dict[str, str] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, server: str, ssl_port: int, user: str, password: str, logger: Logger,
+                 store: Optional[JsonStore] = None):
+        self.server = server
+        self.ssl_port = ssl_port
+        self.user = user
+        self.password = password
+        self.logger = logger
+        self.store = store or JsonStore("smtp_transports.json")
+
+    def _order(self) -> List[str]:
+        """按上次成功的连接方式排序"""
+        remembered = self._transports.get(self.server) or self.store.get(self.server)
+        return [TLS, SSL] if remembered == TLS else [SSL, TLS]
+
+    def _remember(self, transport: str) -> None:
+        with self._lock:
+            if self._transports.get(self.server) == transport:
+                return
+            self._transports[self.server] = transport
+        self.store.set(self.server, transport)
+
+    def _open(self, transport: str) -> "SMTP":
+        import smtplib
+        import ssl
+
+        if transport == SSL:
+            self.logger.debug("尝试使用 SSL 连接到 %s:%s", self.server, self.ssl_port)
+            connection = smtplib.SMTP_SSL(self.server, self.ssl_port, context=ssl.create_default_context())
+        else:
+            self.logger.debug("尝试使用 TLS 连接到 %s:%s", self.server, SMTP_TLS_PORT)
+            connection = smtplib.SMTP(self.server, SMTP_TLS_PORT)
+            connection.ehlo()
+            connection.starttls()
+            connection.ehlo()
+
+        try:
+            connection.login(self.user, self.password)
+        except Exception:
+            connection.close()
+            raise
+        return connection
+
+    def connect(self) -> Tuple["SMTP", str]:
+        """建立已登录的连接，返回连接和所用的连接方式"""
+        error: Optional[Exception] = None
+        for transport in self._order():
+            try:
+                connection = self._open(transport)
+                self._remember(transport)
+                return connection, transport
+            except Exception as e:
+                self.logger.debug("%s 连接或登录失败: %s", transport.upper(), e)
+                error = e
+        raise RuntimeError(f"无法连接到 SMTP 服务器 {self.server}: {str(error)}")
+
+    def _forget(self) -> None:
+        """忘记记住的连接方式，下次按默认顺序尝试"""
+        with self._lock:
+            self._transports.pop(self.server, None)
+        self.store.delete(self.server)
+
+    def _send_all(self, connection: "SMTP", messages: List["MIMEMultipart"]) -> int:
+        """发送邮件并关闭连接，返回成功发送的封数；发送失败时异常的 sent 属性为已发送的封数"""
+        sent = 0
+        try:
+            for msg in messages:
+                connection.send_message(msg)
+                sent += 1
+        except Exception as e:
+            e.sent = sent
+            raise
+        finally:
+            try:
+                connection.quit()
+            except Exception as e:
+                # 邮件已发送，关闭连接时的错误可以忽略
+                self.logger.debug("关闭 SMTP 连接时出错: %s", e)
+        return sent
+
+    def send(self, messages: List["MIMEMultipart"]) -> str:
+        """用同一个连接发送一批邮件，返回所用的连接方式
+
+        连接成功但发送失败时忘记该连接方式，改用另一种方式重发未发送的邮件一次。
+        """
+        connection, transport = self.connect()
+        try:
+            self._send_all(connection, messages)
+            return transport
+        except Exception as e:
+            self.logger.debug("%s 发送失败，改用另一种连接方式: %s", transport.upper(), e)
+            self._forget()
+            remaining = messages[getattr(e, "sent", 0):]
+
+        other = TLS if transport == SSL else SSL
+        try:
+            self._send_all(self._open(other), remaining)
+        except Exception as e:
+            raise RuntimeError(f"无法通过 SMTP 服务器 {self.server} 发送邮件: {str(e)}")
+        self._remember(other)
+        return other
+
+
+class Outbox:
+    """待发送的通知，按运行或时间窗口合并成一封摘要邮件"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items: List[Tuple[str, str]] = []
+        self._first = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, subject: str, content: str) -> None:
+        """加入一条通知，完全相同的通知只保留一条"""
+        with self._lock:
+            if (subject, content) in self._items:
+                return
+            if not self._items:
+                self._first = get_clock().monotonic()
+            self._items.append((subject, content))
+
+    def age(self) -> float:
+        """最早一条未发送通知的等待时间"""
+        with self._lock:
+            return get_clock().monotonic() - self._first if self._items else 0.0
+
+    def drain(self) -> List[Tuple[str, str]]:
+        """取出所有待发送的通知"""
+        with self._lock:
+            items, self._items = self._items, []
+            return items
+
+    @staticmethod
+    def digest(items: List[Tuple[str, str]]) -> Tuple[str, str]:
+        """把多条通知合并为一封邮件的标题和正文"""
+        if len(items) == 1:
+            return items[0]
+        subject = f"网易云音乐合伙人 - {len(items)} 条通知"
+        content = "\n\n".join(f"【{s}】\n{c}" for s, c in items)
+        return subject, content
 
 
 class NotificationService:
-    def __init__(self, config: 'Config', logger: Logger):
+    def __init__(self, config: 'Config', logger: Logger, mailer: Optional[SmtpMailer] = None):
         self.config = config
         self.logger = logger
-        
-    def send_notification(self, subject: str, content: str) -> bool:
-        """发送通知邮件"""
+        self.mailer = mailer
+        # 合并窗口（秒），为 0 时只在批次结束时发送
+        self.window = float(config.get("notify_window", 0) or 0)
+        self.outbox: Optional[Outbox] = None
+
+    def _credentials(self) -> Optional[Tuple[str, str]]:
         notify_email = self.config.get("notify_email")
         if not notify_email:
             self.logger.info("未配置通知邮箱，跳过通知发送")
-            return False
-            
+            return None
+
         email_password = self.config.get("email_password")
         if not email_password:
             self.logger.warning("未配置邮箱密码，无法发送通知")
+            return None
+        return notify_email, email_password
+
+    def _get_mailer(self, notify_email: str, email_password: str) -> SmtpMailer:
+        if self.mailer is None:
+            self.mailer = SmtpMailer(
+                self.config.get("smtp_server", "smtp.gmail.com"),
+                int(self.config.get("smtp_port", 465)),
+                notify_email,
+                email_password,
+                self.logger
+            )
+        return self.mailer
+
+    @contextmanager
+    def batch(self) -> Iterator["NotificationService"]:
+        """批次内的通知先放入发件箱，结束时合并为一封邮件发送"""
+        if self.outbox is not None:
+            yield self
+            return
+
+        self.outbox = Outbox()
+        try:
+            yield self
+        finally:
+            self.flush()
+            self.outbox = None
+
+    def flush(self) -> bool:
+        """立即发送发件箱中的通知"""
+        if self.outbox is None or not len(self.outbox):
+            return True
+        return self._deliver(*Outbox.digest(self.outbox.drain()))
+
+    def send_notification(self, subject: str, content: str) -> bool:
+        """发送通知邮件，在批次内时放入发件箱等待合并发送"""
+        if self._credentials() is None:
+            return False
+
+        if self.outbox is None:
+            return self._deliver(subject, content)
+
+        self.outbox.add(subject, content)
+        if self.window and self.outbox.age() >= self.window:
+            return self.flush()
+        return True
+
+    def _deliver(self, subject: str, content: str) -> bool:
+        credentials = self._credentials()
+        if credentials is None:
             return False
-            
-        smtp_server = self.config.get("smtp_server", "smtp.gmail.com")
-        smtp_ssl_port = int(self.config.get("smtp_port", 465)) 
-        smtp_tls_port = 587 
+        notify_email, email_password = credentials
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
 
         # 创建邮件
         msg = MIMEMultipart()
         msg['From'] = notify_email
         msg['To'] = notify_email
         msg['Subject'] = subject
-        
+
         body = MIMEText(content, 'plain', 'utf-8')
         msg.attach(body)
-        
-        email_sent_successfully = False
 
-        # 尝试使用 SSL 连接发送邮件
         try:
-            self.logger.debug(f"尝试使用 SSL 连接到 {smtp_server}:{smtp_ssl_port}")
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(smtp_server, smtp_ssl_port, context=context) as server:
-                server.login(notify_email, email_password)
-                server.send_message(msg)
-
-                email_sent_successfully = True 
-                self.logger.info(f"通知邮件通过 SSL 发送成功: {subject}")
-        except Exception as ssl_error:
-            if not email_sent_successfully:
-                self.logger.debug(f"SSL 连接或发送失败，将尝试使用 TLS: {str(ssl_error)}")
-            else:
-                self.logger.warning(f"SSL 连接在邮件发送后出现错误 (可能在关闭连接时): {str(ssl_error)}. 由于邮件已发送，不再尝试 TLS。")
-
-        # 如果 SSL 尝试没有成功发送邮件，则尝试 TLS
-        if not email_sent_successfully:
-            try:
-                self.logger.debug(f"尝试使用 TLS 连接到 {smtp_server}:{smtp_tls_port}")
-                with smtplib.SMTP(smtp_server, smtp_tls_port) as server: 
-                    server.ehlo()
-                    server.starttls()
-                    server.ehlo()
-                    server.login(notify_email, email_password)
-                    server.send_message(msg)
-
-                    email_sent_successfully = True 
-                    self.logger.info(f"通知邮件通过 TLS 发送成功: {subject}")
-
-            except Exception as tls_error:
-                if not email_sent_successfully:
-                    self.logger.error(f"尝试使用 TLS 连接或发送失败: {str(tls_error)}")
-                else:
-                    self.logger.warning(f"TLS 连接在邮件发送后出现错误 (可能在关闭连接时): {str(tls_error)}.")
-
-        return email_sent_successfully
\ No newline at end of file
+            transport = self._get_mailer(notify_email, email_password).send([msg])
+            self.logger.info(f"通知邮件通过 {transport.upper()} 发送成功: {subject}")
+            return True
+        except Exception as e:
+            self.logger.error(f"发送通知邮件失败: {str(e)}")
+            return False
@@ -0,0 +1,152 @@
+import threading
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from .clock import monotonic, sleep as clock_sleep
+from .metrics import SLEEP_SECONDS, get_metrics
+
+# 需要经过限流器的接口主机
+LIMITED_HOSTS = ("https://interface.music.163.com",)
+
+
+class TokenBucket:
+    """线程安全的令牌桶
+
+    允许透支：reserve 总是立即扣除令牌，并返回调用方需要等待的秒数，
+    这样并发的调用方会自然排队而不会同时被放行。
+    """
+
+    def __init__(self, rate: float, capacity: float, tokens: Optional[float] = None,
+                 clock: Callable[[], float] = monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity if tokens is None else tokens
+        self.clock = clock
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, cost: float = 1.0) -> float:
+        """预占令牌并返回需要等待的秒数"""
+        with self._lock:
+            self._refill(self.clock())
+            self.tokens -= cost
+            return max(0.0, -self.tokens / self.rate)
+
+    def set_rate(self, rate: float) -> None:
+        """调整令牌生成速率"""
+        with self._lock:
+            self._refill(self.clock())
+            self.rate = rate
+
+
+class RateLimiter:
+    """自适应限流器
+
+    每个主机一个令牌桶，速率按 AIMD 调整：请求成功时线性增加，
+    遇到“频繁”等限流响应时成倍降低。每个账号另有一个容量为 0、
+    以秒计价的令牌桶，用来保证同一账号两次评分之间的等待时间。
+    未指定 clock 和 sleep 时使用共享时钟，模拟运行时等待不占用真实时间。
+    """
+
+    def __init__(self, host_rate: float = 2.0, host_burst: float = 4.0,
+                 min_rate: float = 0.2, max_rate: float = 10.0,
+                 increase: float = 0.1, decrease: float = 0.5,
+                 clock: Optional[Callable[[], float]] = None,
+                 sleep: Optional[Callable[[float], None]] = None):
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.clock = clock or monotonic
+        self._sleep = sleep or clock_sleep
+
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, TokenBucket] = {}
+        self._accounts: Dict[str, TokenBucket] = {}
+
+    def _host_bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc or url
+        bucket = self._hosts.get(host)
+        if bucket is None:
+            with self._lock:
+                bucket = self._hosts.setdefault(
+                    host, TokenBucket(self.host_rate, self.host_burst, clock=self.clock)
+                )
+        return bucket
+
+    def _account_bucket(self, account: str) -> TokenBucket:
+        bucket = self._accounts.get(account)
+        if bucket is None:
+            with self._lock:
+                bucket = self._accounts.setdefault(
+                    account, TokenBucket(1.0, 0.0, tokens=0.0, clock=self.clock)
+                )
+        return bucket
+
+    def sleep(self, seconds: float, reason: str = "limiter") -> None:
+        """等待指定秒数，并按原因记录等待时间"""
+        if seconds > 0:
+            get_metrics().inc(SLEEP_SECONDS, seconds, reason=reason)
+            self._sleep(seconds)
+
+    def reserve(self, url: str) -> float:
+        """为主机预占一个请求许可，返回需要等待的秒数"""
+        return self._host_bucket(url).reserve()
+
+    def acquire(self, url: str) -> float:
+        """阻塞直到主机允许发送请求"""
+        wait = self.reserve(url)
+        self.sleep(wait, "host")
+        return wait
+
+    def reserve_pace(self, account: str, interval: float) -> float:
+        """为账号预占一段间隔，返回距上一次预占满 interval 秒还需等待的时间"""
+        return self._account_bucket(account).reserve(interval)
+
+    def pace(self, account: str, interval: float) -> float:
+        """阻塞直到账号满足间隔要求"""
+        wait = self.reserve_pace(account, interval)
+        self.sleep(wait, "pace")
+        return wait
+
+    def rate(self, url: str) -> float:
+        """当前主机速率"""
+        return self._host_bucket(url).rate
+
+    def on_success(self, url: str) -> None:
+        """请求成功，线性提高主机速率"""
+        bucket = self._host_bucket(url)
+        if bucket.rate < self.max_rate:
+            bucket.set_rate(min(self.max_rate, bucket.rate + self.increase))
+
+    def on_throttled(self, url: str) -> None:
+        """遇到限流，成倍降低主机速率"""
+        bucket = self._host_bucket(url)
+        bucket.set_rate(max(self.min_rate, bucket.rate * self.decrease))
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """获取进程内共享的限流器"""
+    global _default_limiter
+    if _default_limiter is None:
+        with _default_lock:
+            if _default_limiter is None:
+                _default_limiter = RateLimiter()
+    return _default_limiter
+
+
+def set_rate_limiter(limiter: Optional[RateLimiter]) -> None:
+    """替换进程内共享的限流器，传入 None 时恢复默认"""
+    global _default_limiter
+    with _default_lock:
+        _default_limiter = limiter
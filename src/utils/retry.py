@@ -0,0 +1,287 @@
+import random
+import threading
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError
+
+from .clock import monotonic, sleep as clock_sleep
+from .json_codec import response_json
+from .logger import Logger
+from .metrics import CIRCUIT_REJECTED, RETRIES, SLEEP_SECONDS, endpoint, get_metrics
+
+# 失败分类
+TRANSIENT = "transient"        # 网络错误、超时和 5xx，稍后重试可能成功
+RATE_LIMITED = "rate_limited"  # 429 或业务消息含“频繁”，需要放慢
+AUTH = "auth"                  # 登录状态失效，重试无用
+PERMANENT = "permanent"        # 参数错误、资源状态异常等，重试无用
+
+# 表示登录状态失效的 HTTP 状态码和业务响应码
+AUTH_FAILURE_CODES = (301, 401)
+
+
+class CircuitOpenError(RuntimeError):
+    """主机的熔断器处于打开状态，请求未发送"""
+
+
+def sent_before_failure(error: Exception) -> bool:
+    """请求是否可能已发出：只有建立连接失败（含连接超时、DNS 解析失败）时确定没有发出"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    # urllib3 的 NewConnectionError 和 NameResolutionError 都是 ConnectTimeoutError 的子类
+    return not isinstance(reason, ConnectTimeoutError)
+
+
+class RetryPolicy:
+    """单个接口的重试策略
+
+    只重试 retry_on 中的失败类型，等待时间为带完全抖动的指数退避：
+    第 n 次重试等待 0 ~ min(cap, base * 2^n) 秒，限流时基数乘以 throttle_factor。
+    所有重试的等待时间合计不超过 budget 秒，超出预算时立即放弃。
+    非幂等接口（idempotent=False）只重试请求发出前的连接失败；读取超时、连接中途断开和 5xx
+    时请求可能已被服务端处理，是否重发由调用方在确认结果后决定，避免重复处理。
+    """
+
+    def __init__(self, attempts: int = 3, base: float = 0.5, cap: float = 8.0, budget: float = 20.0,
+                 retry_on: Tuple[str, ...] = (TRANSIENT, RATE_LIMITED), throttle_factor: float = 4.0,
+                 idempotent: bool = True):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self.budget = budget
+        self.retry_on = retry_on
+        self.throttle_factor = throttle_factor
+        self.idempotent = idempotent
+
+    def classify_error(self, error: Exception) -> str:
+        """请求异常的分类"""
+        if isinstance(error, CircuitOpenError):
+            return PERMANENT
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return TRANSIENT if self.idempotent or not sent_before_failure(error) else PERMANENT
+        return PERMANENT
+
+    def classify_response(self, response: requests.Response) -> Optional[str]:
+        """响应的分类，成功时返回 None"""
+        status = response.status_code
+        if status == 429:
+            return RATE_LIMITED
+        if status >= 500:
+            return TRANSIENT if self.idempotent else PERMANENT
+        if status in AUTH_FAILURE_CODES or status == 403:
+            return AUTH
+        if status >= 400:
+            return PERMANENT
+
+        try:
+            data = response_json(response)
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        if data.get("code") in AUTH_FAILURE_CODES:
+            return AUTH
+        if "频繁" in str(data.get("message") or data.get("msg") or ""):
+            return RATE_LIMITED
+        return None
+
+    def delay(self, retry: int, kind: str, rng: random.Random) -> float:
+        """第 retry 次重试（从 0 开始）前的等待时间"""
+        base = self.base * (self.throttle_factor if kind == RATE_LIMITED else 1.0)
+        return rng.uniform(0, min(self.cap, base * 2 ** retry))
+
+
+# 各接口的重试策略，按最长前缀匹配
+POLICIES: Dict[str, RetryPolicy] = {
+    "https://music.163.com": RetryPolicy(),
+    "https://interface.music.163.com": RetryPolicy(),
+    # 评分由 Signer 按账号节奏处理限流和 5xx（重发前先查询任务状态），这里只重试建立连接失败
+    "https://interface.music.163.com/weapi/music/partner/work/evaluate": RetryPolicy(
+        attempts=2, retry_on=(TRANSIENT,), idempotent=False
+    ),
+    "https://interface.music.163.com/weapi/partner/resource/interact/report": RetryPolicy(idempotent=False),
+    # 登录失败过多会触发风控，最多重试一次
+    "https://music.163.com/weapi/login/cellphone": RetryPolicy(attempts=2, retry_on=(TRANSIENT,), idempotent=False),
+    "https://ncma-web.vercel.app": RetryPolicy(attempts=2, base=2.0, budget=30.0, retry_on=(TRANSIENT,)),
+    "https://api.github.com": RetryPolicy(attempts=3, base=1.0, budget=30.0),
+}
+DEFAULT_POLICY = RetryPolicy()
+
+
+def policy_for(url: str) -> RetryPolicy:
+    """按最长前缀匹配接口的重试策略"""
+    best, policy = -1, DEFAULT_POLICY
+    for prefix, value in POLICIES.items():
+        if url.startswith(prefix) and len(prefix) > best:
+            best, policy = len(prefix), value
+    return policy
+
+
+class CircuitBreaker:
+    """按主机的熔断器
+
+    主机连续 threshold 次出现网络错误或 5xx 后打开，之后 reset_timeout 秒内的请求
+    直接抛出 CircuitOpenError，不再占用连接和等待超时；到期后放行一个探测请求，
+    成功则关闭，失败则重新计时。限流和业务错误不计入失败。
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Optional[Callable[[], float]] = None):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock or monotonic
+        self._lock = threading.Lock()
+        # 主机 -> [连续失败次数, 打开时间, 是否有探测请求在途]
+        self._hosts: Dict[str, list] = {}
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlsplit(url).netloc or url
+
+    def _state(self, host: str) -> list:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts.setdefault(host, [0, None, False])
+        return state
+
+    def is_open(self, url: str) -> bool:
+        """主机的熔断器是否打开且尚未到探测时间"""
+        with self._lock:
+            opened = self._state(self._host(url))[1]
+            return opened is not None and self.clock() - opened < self.reset_timeout
+
+    def check(self, url: str) -> None:
+        """熔断期间抛出 CircuitOpenError，不占用探测名额，用于在等待前提前放弃"""
+        if self.is_open(url):
+            raise CircuitOpenError(f"{self._host(url)} 连续请求失败，暂停访问")
+
+    def before(self, url: str) -> None:
+        """发送请求前检查，熔断期间抛出 CircuitOpenError"""
+        host = self._host(url)
+        with self._lock:
+            state = self._state(host)
+            if state[1] is None:
+                return
+            remaining = self.reset_timeout - (self.clock() - state[1])
+            if remaining <= 0 and not state[2]:
+                # 半开状态，只放行一个探测请求
+                state[2] = True
+                return
+        get_metrics().inc(CIRCUIT_REJECTED, host=host)
+        raise CircuitOpenError(f"{host} 连续请求失败，暂停访问 {max(0.0, remaining):.0f} 秒")
+
+    def release(self, url: str) -> None:
+        """请求因网络错误和 5xx 以外的原因失败，不计入结果，只归还探测名额"""
+        with self._lock:
+            self._state(self._host(url))[2] = False
+
+    def record(self, url: str, ok: bool) -> None:
+        """记录请求结果，ok 为 False 表示网络错误或 5xx"""
+        with self._lock:
+            state = self._state(self._host(url))
+            if ok:
+                state[:] = [0, None, False]
+                return
+            state[0] += 1
+            if state[2] or state[0] >= self.threshold:
+                state[1], state[2] = self.clock(), False
+
+
+_default_breaker: Optional[CircuitBreaker] = None
+_default_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """获取进程内共享的熔断器"""
+    global _default_breaker
+    if _default_breaker is None:
+        with _default_lock:
+            if _default_breaker is None:
+                _default_breaker = CircuitBreaker()
+    return _default_breaker
+
+
+def set_circuit_breaker(breaker: Optional[CircuitBreaker]) -> None:
+    """替换进程内共享的熔断器，传入 None 时恢复默认"""
+    global _default_breaker
+    with _default_lock:
+        _default_breaker = breaker
+
+
+class Retrier:
+    """按接口策略重试请求
+
+    send 每次调用发送一次请求；得到成功、不可重试的响应，或用完次数、预算时
+    返回最后一次响应，由调用方按原有逻辑处理业务错误。最后一次仍是异常时原样抛出。
+    """
+
+    def __init__(self, logger: Optional[Logger] = None, rng: Optional[random.Random] = None,
+                 sleep: Optional[Callable[[float], None]] = None):
+        self.logger = logger
+        self.rng = rng or random.Random()
+        self._sleep = sleep or clock_sleep
+
+    def _next(self, url: str, policy: RetryPolicy, retry: int, spent: float,
+              outcome) -> Optional[float]:
+        """判断是否重试，返回等待时间，不再重试时返回 None"""
+        if isinstance(outcome, Exception):
+            kind = policy.classify_error(outcome)
+        else:
+            kind = policy.classify_response(outcome)
+        if kind is None or kind not in policy.retry_on or retry + 1 >= policy.attempts:
+            return None
+
+        delay = policy.delay(retry, kind, self.rng)
+        if spent + delay > policy.budget:
+            return None
+        get_metrics().inc(RETRIES, endpoint=endpoint(url), kind=kind)
+        if self.logger is not None:
+            self.logger.info(f"请求 {endpoint(url)} 失败（{kind}），{delay:.1f} 秒后第 {retry + 1} 次重试")
+        return delay
+
+    def backoff(self, url: str, retry: int, kind: str = TRANSIENT) -> float:
+        """调用方确认结果后自行重发时的等待时间，与自动重试使用同一退避策略"""
+        delay = policy_for(url).delay(retry, kind, self.rng)
+        get_metrics().inc(RETRIES, endpoint=endpoint(url), kind=kind)
+        return delay
+
+    def call(self, url: str, send: Callable[[], requests.Response]) -> requests.Response:
+        policy, spent = policy_for(url), 0.0
+        for retry in range(policy.attempts):
+            try:
+                outcome = send()
+            except Exception as e:
+                outcome = e
+            delay = self._next(url, policy, retry, spent, outcome)
+            if delay is None:
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return outcome
+            spent += delay
+            get_metrics().inc(SLEEP_SECONDS, delay, reason="retry")
+            self._sleep(delay)
+        raise RuntimeError("重试次数必须大于 0")
+
+    async def call_async(self, url: str, send: Callable[[], Awaitable[requests.Response]]) -> requests.Response:
+        # asyncio 只有异步模式才需要，同步运行不必加载
+        import asyncio
+
+        policy, spent = policy_for(url), 0.0
+        for retry in range(policy.attempts):
+            try:
+                outcome = await send()
+            except Exception as e:
+                outcome = e
+            delay = self._next(url, policy, retry, spent, outcome)
+            if delay is None:
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return outcome
+            spent += delay
+            get_metrics().inc(SLEEP_SECONDS, delay, reason="retry")
+            await asyncio.sleep(delay)
+        raise RuntimeError("重试次数必须大于 0")
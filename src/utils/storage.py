@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只保证进程内互斥
+    fcntl = None
+
+# 本地状态目录，可通过环境变量 NCMP_STATE_DIR 指定
+DEFAULT_STATE_DIR = ".ncmp"
+
+
+def state_dir() -> str:
+    """获取本地状态目录，不存在时自动创建"""
+    path = os.environ.get("NCMP_STATE_DIR") or DEFAULT_STATE_DIR
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def state_path(name: str) -> str:
+    """获取状态目录下的文件路径"""
+    return os.path.join(state_dir(), name)
+
+
+class JsonStore:
+    """以 JSON 文件持久化的键值存储，写入时通过临时文件原子替换
+
+    每次写入都在文件锁内重新读取文件再修改，多个进程共用同一文件时不会覆盖彼此的写入。
+    """
+
+    def __init__(self, name: str, path: Optional[str] = None):
+        self.path = path or state_path(name)
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        if self._data is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as file:
+                    self._data = json.load(file)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(self._data, file, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """跨进程的排他锁，锁文件与数据文件分开，原子替换数据文件不影响加锁"""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def modify(self, change: Callable[[Dict[str, Any]], Any]) -> None:
+        """在文件锁内重新读取文件，应用修改后写回；change 返回 False 时不写入"""
+        with self._lock, self._file_lock():
+            self._data = None
+            if change(self._load()) is not False:
+                self._save()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._load().get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        self.modify(lambda data: data.__setitem__(key, value))
+
+    def update(self, values: Dict[str, Any]) -> None:
+        self.modify(lambda data: data.update(values))
+
+    def delete(self, key: str) -> None:
+        self.modify(lambda data: data.pop(key, None) is not None)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        with self._lock:
+            return iter(list(self._load().items()))
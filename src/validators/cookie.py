@@ -1,14 +1,77 @@
-from typing import Tuple
+import hashlib
+import time
+from typing import Callable, Dict, Optional, Tuple
 
 import requests
 
+from ..utils.clock import wall_time
+from ..utils.json_codec import response_json
 from ..utils.logger import Logger
+from ..utils.metrics import record_operation
+from ..utils.retry import AUTH_FAILURE_CODES
+from ..utils.storage import JsonStore
+
+
+def is_auth_failure(response: requests.Response) -> bool:
+    """响应是否表示 Cookie 已失效"""
+    if response.status_code in AUTH_FAILURE_CODES:
+        return True
+    try:
+        data = response_json(response)
+    except ValueError:
+        return False
+    return isinstance(data, dict) and data.get("code") in AUTH_FAILURE_CODES
+
+
+class ValidationCache:
+    """Cookie 验证结果的本地缓存
+
+    以 MUSIC_U 和 __csrf 的摘要为键保存有效期，不保存原始 Cookie。
+    """
+
+    def __init__(self, ttl: float, store: Optional[JsonStore] = None,
+                 clock: Callable[[], float] = wall_time):
+        self.ttl = ttl
+        self.store = store or JsonStore("cookie_validation.json")
+        self.clock = clock
+
+    @staticmethod
+    def key(music_u: str, csrf: str) -> str:
+        return hashlib.sha256(f"{music_u}\0{csrf}".encode("utf-8")).hexdigest()
+
+    def is_valid(self, key: str) -> bool:
+        """验证结果是否仍在有效期内"""
+        return (self.store.get(key) or 0) > self.clock()
+
+    def remember(self, key: str) -> None:
+        """记录一次成功的验证，顺便清理已过期的记录，整个过程只写一次文件
+
+        已有记录仍在有效期内且没有需要清理的记录时不写文件。
+        """
+        now = self.clock()
+
+        def change(data: Dict[str, float]) -> bool:
+            expired = [other for other, until in data.items() if until <= now]
+            if not expired and key in data:
+                return False
+            for other in expired:
+                del data[other]
+            data[key] = now + self.ttl
+            return True
+
+        self.store.modify(change)
+
+    def invalidate(self, key: str) -> None:
+        self.store.delete(key)
 
 
 class CookieValidator:
-    def __init__(self, session: requests.Session, logger: Logger):
+    def __init__(self, session: requests.Session, logger: Logger, ttl: float = 0.0,
+                 cache: Optional[ValidationCache] = None):
         self.session = session
         self.logger = logger
+        # ttl 大于 0 时，有效期内的运行跳过预检，由第一个真实请求检验登录状态
+        self.cache = cache or (ValidationCache(ttl) if ttl > 0 else None)
         self.check_urls = {
             "user_info": "https://music.163.com/api/nuser/account/get",
             "task_data": "https://interface.music.163.com/api/music/partner/daily/task/get"
@@ -16,6 +79,49 @@ class CookieValidator:
 
     def validate(self) -> Tuple[bool, str]:
         """验证Cookie是否有效"""
+        start = time.perf_counter()
+        key = self._cache_key()
+        if key is not None and self.cache.is_valid(key):
+            self._watch_auth_failures(key)
+            record_operation("validate", start, "cached")
+            return True, "Cookie有效（验证结果未过期，跳过预检）"
+            
+        is_valid, message = self._validate()
+        self._store_result(key, is_valid)
+        record_operation("validate", start, "ok" if is_valid else "failed")
+        return is_valid, message
+
+    def _cache_key(self) -> Optional[str]:
+        if self.cache is None or not self._check_cookie_exists():
+            return None
+        return self.cache.key(self.session.cookies.get("MUSIC_U"), self.session.cookies.get("__csrf"))
+
+    def _store_result(self, key: Optional[str], is_valid: bool) -> None:
+        if key is None:
+            return
+        if is_valid:
+            self.cache.remember(key)
+            self._watch_auth_failures(key)
+        else:
+            self.cache.invalidate(key)
+
+    def _watch_auth_failures(self, key: str) -> None:
+        """之后任一请求返回登录失效时清除缓存，下次运行重新预检"""
+        state = {"invalidated": False}
+
+        def check(response: requests.Response, *args, **kwargs) -> None:
+            if not state["invalidated"] and is_auth_failure(response):
+                state["invalidated"] = True
+                self.logger.warning("登录状态已失效，清除 Cookie 验证缓存")
+                self.cache.invalidate(key)
+
+        # 常驻模式下会话会被多次验证，只保留最新的检查
+        check.validation_cache = True
+        hooks = self.session.hooks["response"]
+        hooks[:] = [hook for hook in hooks if not getattr(hook, "validation_cache", False)]
+        hooks.append(check)
+
+    def _validate(self) -> Tuple[bool, str]:
         try:
             if not self._check_cookie_exists():
                 return False, "Cookie未正确设置"
@@ -40,10 +146,10 @@ class CookieValidator:
         
     def _check_user_info(self) -> bool:
         """检查用户信息是否有效"""
-        response = self.session.get(self.check_urls["user_info"]).json()
+        response = response_json(self.session.get(self.check_urls["user_info"]))
         return bool(response.get("code") == 200 and response.get("profile"))
         
     def _check_task_access(self) -> bool:
         """检查是否有任务访问权限"""
-        response = self.session.get(self.check_urls["task_data"]).json()
+        response = response_json(self.session.get(self.check_urls["task_data"]))
         return response.get("code") == 200 
\ No newline at end of file
@@ -0,0 +1,22 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.utils.clock import VirtualClock
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    """每个测试使用独立的本地状态目录"""
+    monkeypatch.setenv("NCMP_STATE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def clock():
+    """虚拟时钟，sleep 只推进时间"""
+    return VirtualClock()
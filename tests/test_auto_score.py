@@ -5,9 +5,8 @@ import sys
 # 添加项目根目录到 Python 路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import requests
-
 from src.utils.config import Config
+from src.utils.http import create_session
 from src.utils.logger import Logger
 from src.utils.notification import NotificationService
 from src.validators.cookie import CookieValidator
@@ -41,9 +40,10 @@ def test_cookie(config):
     """测试Cookie有效性"""
     try:
         logger = Logger()
-        session = requests.Session()
-        session.cookies.set("MUSIC_U", config.get("Cookie_MUSIC_U"))
-        session.cookies.set("__csrf", config.get("Cookie___csrf"))
+        session = create_session({
+            "MUSIC_U": config.get("Cookie_MUSIC_U"),
+            "__csrf": config.get("Cookie___csrf")
+        })
         
         print("\n验证Cookie...")
         validator = CookieValidator(session, logger)
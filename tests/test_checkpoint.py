@@ -0,0 +1,132 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.core.fleet import run_account
+from src.core.signer import Signer
+from src.mock.server import EVALUATE_PATH, EXTRA_PATH, MockPartnerApi, MockServer
+from src.utils.account import account_key
+from src.utils.checkpoint import DONE, PENDING, SKIPPED, CheckpointStore, set_checkpoint_store
+from src.utils.config import Config
+from src.utils.http import create_session
+from src.utils.logger import Logger
+from src.utils.rate_limiter import RateLimiter, get_rate_limiter, set_rate_limiter
+from src.utils.retry import CircuitBreaker, set_circuit_breaker
+
+ACCOUNT = {"name": "a", "Cookie_MUSIC_U": "music-u", "Cookie___csrf": "csrf", "wait_time_min": 0,
+           "wait_time_max": 0}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoint.db"))
+    set_checkpoint_store(store)
+    previous = get_rate_limiter()
+    set_rate_limiter(RateLimiter(host_rate=100, host_burst=100))
+    yield store
+    set_rate_limiter(previous)
+    set_checkpoint_store(None)
+    store.close()
+
+
+def test_store_records_actions(store):
+    """按幂等键记录动作状态，按日期区分，跳过的作品也算已处理"""
+    key = store.key("a", "t", 1, "sign")
+    assert key == store.key("a", "t", 1, "sign") != store.key("a", "t", 1, "sign", day="2000-01-01")
+
+    assert store.begin(key, "a", "t", 1, "sign")
+    assert store.status(key) == PENDING and not store.is_done(key)
+    store.finish(key, DONE, 200)
+    assert not store.begin(key, "a", "t", 1, "sign")
+
+    skipped = store.key("a", "t", 2, "sign")
+    store.begin(skipped, "a", "t", 2, "sign")
+    store.finish(skipped, SKIPPED, 405)
+    assert store.done_works("a", "sign") == {"1", "2"}
+    assert store.done_works("a", "sign", statuses=(DONE,)) == {"1"}
+
+    assert not store.is_day_complete("a")
+    store.mark_day_complete("a")
+    assert store.is_day_complete("a") and not store.is_day_complete("b")
+
+
+@pytest.mark.parametrize("applied", [True, False])
+def test_resume_after_interrupted_sign(store, applied):
+    """提交后中断的作品先查询任务状态：服务端已评分时不再提交，否则重新提交"""
+    api = MockPartnerApi(daily_count=1, extra_count=0)
+    account = api.account(ACCOUNT["Cookie_MUSIC_U"])
+    work = account.daily[0]
+    if applied:
+        account.scores[work["id"]] = 3
+
+    with MockServer(api):
+        session = create_session({"MUSIC_U": ACCOUNT["Cookie_MUSIC_U"], "__csrf": ACCOUNT["Cookie___csrf"]})
+        signer = Signer(session, account.task_id, Logger(), Config(ACCOUNT))
+        key = signer._begin_checkpoint(work)
+        assert signer.sign(work)
+
+    assert store.status(key) == DONE
+    assert api.snapshot().get(EVALUATE_PATH, {}).get("ok", 0) == (0 if applied else 1)
+
+
+@pytest.mark.parametrize("applied", [True, False])
+def test_sign_server_error_checks_status_before_resending(store, applied):
+    """评分接口返回 5xx 时不由重试器重发，先查询任务状态：已评分时不再提交"""
+    api = MockPartnerApi(daily_count=1, extra_count=0)
+    account = api.account(ACCOUNT["Cookie_MUSIC_U"])
+    work = account.daily[0]
+    evaluate, calls = api.routes[("POST", EVALUATE_PATH)], []
+
+    def flaky(*args):
+        calls.append(1)
+        if len(calls) > 1:
+            return evaluate(*args)
+        if applied:
+            evaluate(*args)
+        return 502, {"code": 502, "message": "Bad Gateway"}, {}
+
+    api.routes[("POST", EVALUATE_PATH)] = flaky
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0)
+    set_circuit_breaker(breaker)
+    try:
+        with MockServer(api):
+            session = create_session({"MUSIC_U": ACCOUNT["Cookie_MUSIC_U"], "__csrf": ACCOUNT["Cookie___csrf"]})
+            signer = Signer(session, account.task_id, Logger(), Config(ACCOUNT))
+            sleeps = []
+            signer.limiter.sleep = lambda seconds, reason="limiter": sleeps.append(reason)
+            records, record = [], breaker.record
+            breaker.record = lambda url, ok: (records.append((EVALUATE_PATH in url, ok)), record(url, ok))
+            assert signer.sign(work)
+    finally:
+        set_circuit_breaker(None)
+
+    assert len(calls) == (1 if applied else 2)
+    # 未确认的 5xx 重发前按退避等待；状态查询成功会清零失败计数，之后补记一次评分接口失败
+    assert sleeps.count("retry") == (0 if applied else 1)
+    expected = [(True, False), (False, True)] + ([] if applied else [(True, False), (True, True)])
+    assert records == expected
+    assert store.status(signer._checkpoint_key(work)) == DONE
+    assert account.scores.get(work["id"])
+
+
+def test_day_complete_requires_signed_daily_works(store):
+    """资源状态异常而跳过的每日任务不算完成，当天之后的运行不会直接跳过"""
+    api = MockPartnerApi(daily_count=2, extra_count=7, abnormal_works={1000})
+    with MockServer(api):
+        assert run_account(ACCOUNT)["success"]
+    assert not store.is_day_complete(account_key(ACCOUNT["Cookie_MUSIC_U"]))
+
+    other = dict(ACCOUNT, Cookie_MUSIC_U="music-u-2")
+    with MockServer(api):
+        result = run_account(other)
+        assert (result["daily"], result["extra"]) == (2, 7)
+        assert store.is_day_complete(account_key("music-u-2"))
+
+        # 标记完成后不再查询任务列表
+        queried = api.snapshot()[EXTRA_PATH]["ok"]
+        assert run_account(other)["success"]
+        assert api.snapshot()[EXTRA_PATH]["ok"] == queried
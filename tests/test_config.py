@@ -0,0 +1,76 @@
+import json
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.config import Config
+
+
+def test_accounts_env_alone(tmp_path, monkeypatch):
+    """只设置 ACCOUNTS 时从环境变量加载，不要求顶层 Cookie"""
+    for name in ("MUSIC_U", "CSRF"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("ACCOUNTS", json.dumps([
+        {"name": "a", "Cookie_MUSIC_U": "u1", "Cookie___csrf": "c1"},
+        {"name": "b", "Cookie_MUSIC_U": "u2", "Cookie___csrf": "c2", "score": 4}
+    ]))
+    monkeypatch.setenv("SCORE", "2")
+
+    config = Config(path=str(tmp_path / "missing.json"))
+    accounts = config.accounts()
+    assert [(a["name"], a["Cookie_MUSIC_U"], a["score"]) for a in accounts] == [("a", "u1", 2), ("b", "u2", 4)]
+    assert config.get("Cookie_MUSIC_U") is None
+
+
+def test_main_runs_each_env_account(tmp_path, monkeypatch):
+    """只设置 ACCOUNTS 时单账号入口逐个运行各账号，使用各自的 Cookie"""
+    import main
+    for name in ("MUSIC_U", "CSRF"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("ACCOUNTS", json.dumps([
+        {"name": "a", "Cookie_MUSIC_U": "u1", "Cookie___csrf": "c1"},
+        {"name": "b", "Cookie_MUSIC_U": "u2", "Cookie___csrf": "c2"}
+    ]))
+    config = Config(path=str(tmp_path / "missing.json"))
+    ran = []
+    monkeypatch.setattr(main, "get_config", lambda: config)
+    monkeypatch.setattr(main, "export_metrics", lambda: None)
+    monkeypatch.setattr(main, "run_account", lambda account, logger, notifier: ran.append(
+        (account.get("Cookie_MUSIC_U"), account.get("Cookie___csrf"))) or True)
+
+    main.main()
+    assert ran == [("u1", "c1"), ("u2", "c2")]
+
+
+def test_reload_if_changed(tmp_path, monkeypatch):
+    """文件修改后原地重新加载；新文件无效时保留原配置，再次修改后重新尝试"""
+    for name in ("ACCOUNTS", "MUSIC_U", "CSRF"):
+        monkeypatch.delenv(name, raising=False)
+    path = tmp_path / "setting.json"
+
+    def write(mtime, **settings):
+        path.write_text(json.dumps({"Cookie_MUSIC_U": "u1", "Cookie___csrf": "c1", **settings}), encoding="utf-8")
+        os.utime(path, ns=(mtime, mtime))
+
+    write(1_000_000_000, wait_time_min=5, wait_time_max=10)
+    config = Config(path=str(path))
+    assert not config.reload_if_changed()
+
+    write(2_000_000_000, wait_time_min=1, wait_time_max=2, score=4)
+    assert config.reload_if_changed()
+    assert (config.wait_time_min, config.wait_time_max, config.get("score")) == (1.0, 2.0, 4)
+    assert not config.reload_if_changed()
+
+    write(3_000_000_000, wait_time_min=9, wait_time_max=2)
+    with pytest.raises(ValueError):
+        config.reload_if_changed()
+    assert (config.wait_time_min, config.wait_time_max, config.get("score")) == (1.0, 2.0, 4)
+    assert not config.reload_if_changed()
+
+    write(4_000_000_000, wait_time_min=3, wait_time_max=4)
+    assert config.reload_if_changed()
+    assert (config.wait_time_min, config.wait_time_max) == (3.0, 4.0)
@@ -0,0 +1,83 @@
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.core import daemon as daemon_module
+from src.core.daemon import Daemon, Job, JobScheduler, daily_at, parse_time
+from src.utils.checkpoint import BEIJING
+from src.utils.config import Config
+from src.utils.logger import Logger
+from src.utils.notification import NotificationService
+
+
+NOW = datetime(2024, 5, 8, 10, 30, tzinfo=BEIJING)  # 周三
+
+
+def test_daily_plan():
+    """每日计划计算下一次运行时间，偏移后仍在当天时不顺延"""
+    assert daily_at(9, 0)(NOW) == datetime(2024, 5, 9, 9, 0, tzinfo=BEIJING)
+    assert daily_at(9, 0, timedelta(hours=2))(NOW) == datetime(2024, 5, 8, 11, 0, tzinfo=BEIJING)
+
+
+def test_scheduler_order_and_jitter():
+    """任务按到期时间取出，抖动不超过配置值"""
+    scheduler = JobScheduler(random.Random(1))
+    late = scheduler.add(Job("late", lambda: None, daily_at(12, 0), jitter=60), NOW)
+    early = scheduler.add(Job("early", lambda: None, daily_at(11, 0)), NOW)
+
+    assert timedelta() <= late - datetime(2024, 5, 8, 12, 0, tzinfo=BEIJING) <= timedelta(seconds=60)
+    assert [job.name for job in scheduler.pop_due(early)] == ["early"]
+    assert [job.name for job in scheduler.pop_due(late)] == ["late"]
+
+
+def test_parse_time():
+    assert parse_time("07:05") == (7, 5)
+    with pytest.raises(ValueError):
+        parse_time("25:00")
+
+
+class FakeRefreshTask:
+    """每个账号都需要刷新，登录得到以账号名区分的新 Cookie"""
+    executed = []
+
+    def __init__(self, logger, notifier, planner, account):
+        self.account = account
+        self.cookies = None
+
+    def check(self, cookies):
+        return True, "登录状态已失效"
+
+    def execute(self, credentials, update_secrets=True):
+        self.executed.append((self.account, credentials["netease_phone"], update_secrets))
+        self.cookies = {"Cookie_MUSIC_U": f"new_{self.account}", "Cookie___csrf": "new_csrf"}
+        return True
+
+
+def test_refreshed_cookies_per_account(monkeypatch):
+    """每个账号分别刷新，新 Cookie 用于该账号的会话，直到配置中的 Cookie 被修改"""
+    monkeypatch.setattr(daemon_module, "CookieRefreshTask", FakeRefreshTask)
+    FakeRefreshTask.executed = []
+    config = Config({"netease_phone": "top", "accounts": [
+        {"name": "a", "Cookie_MUSIC_U": "u1", "Cookie___csrf": "c1", "netease_phone": "138a"},
+        {"name": "b", "Cookie_MUSIC_U": "u2", "Cookie___csrf": "c2"}
+    ]})
+    logger = Logger(name="test")
+    daemon = Daemon(config, logger, NotificationService(config, logger))
+    a, b = config.accounts()
+    assert daemon._session(a).cookies.get("MUSIC_U") == "u1"
+
+    daemon._refresh_job()
+    # b 只有顶层凭据，无法确定属于哪个账号，不刷新；多账号不更新 GitHub Secrets
+    assert FakeRefreshTask.executed == [("a", "138a", False)]
+    assert daemon.sessions["a"].cookies.get("MUSIC_U") == "new_a"
+    assert daemon._session(a).cookies.get("MUSIC_U") == "new_a"
+    assert daemon._session(b).cookies.get("MUSIC_U") == "u2"
+
+    config.config_data["accounts"][0]["Cookie_MUSIC_U"] = "u3"
+    assert daemon._session(config.accounts()[0]).cookies.get("MUSIC_U") == "u3"
@@ -0,0 +1,80 @@
+import base64
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import requests
+from nacl.public import PrivateKey
+
+from src.utils.github import GitHubService
+from src.utils.logger import Logger
+from src.utils.storage import JsonStore
+
+
+class FakeGitHub:
+    """记录请求的 GitHub 接口替身"""
+
+    def __init__(self):
+        self.key = PrivateKey.generate()
+        self.calls = []
+
+    def _response(self, status: int, body: bytes = b"") -> requests.Response:
+        response = requests.Response()
+        response.status_code, response._content = status, body
+        return response
+
+    def get(self, url, **kwargs):
+        self.calls.append(("GET", url))
+        key = base64.b64encode(bytes(self.key.public_key)).decode()
+        return self._response(200, f'{{"key_id": "1", "key": "{key}"}}'.encode())
+
+    def put(self, url, **kwargs):
+        self.calls.append(("PUT", url.rsplit("/", 1)[-1]))
+        return self._response(204)
+
+
+@pytest.fixture
+def github(tmp_path, monkeypatch):
+    monkeypatch.setenv("GH_TOKEN", "token")
+    monkeypatch.setenv("GH_REPO", "owner/repo")
+    fake = FakeGitHub()
+    store = JsonStore("secrets.json", str(tmp_path / "secrets.json"))
+    return GitHubService(Logger(), session=fake, store=store), fake
+
+
+def test_unchanged_secrets_skip_key_fetch(github):
+    """值未变化的 secret 不再上传，全部未变化时也不获取公钥"""
+    service, fake = github
+    assert service.update_cookies({"MUSIC_U": "u1", "CSRF": "c1"})
+    assert sorted(fake.calls)[-2:] == [("PUT", "CSRF"), ("PUT", "MUSIC_U")]
+
+    # 新客户端（如下一次运行）没有公钥缓存，值未变化时仍不获取公钥
+    service = GitHubService(Logger(), session=fake, store=service.store)
+    fake.calls.clear()
+    assert service.update_cookies({"MUSIC_U": "u1", "CSRF": "c1"})
+    assert fake.calls == []
+
+    assert service.update_cookies({"MUSIC_U": "u2", "CSRF": "c1"})
+    assert [call[0] for call in fake.calls] == ["GET", "PUT"]
+
+
+def test_secret_hash_is_salted_per_install(tmp_path, github):
+    """摘要使用本机随机盐，不同安装对同一个值的摘要不同"""
+    service, _ = github
+    other = GitHubService(Logger(), session=FakeGitHub(), store=JsonStore("o.json", str(tmp_path / "o.json")))
+    assert service._secret_hash("owner/repo", "COOKIE_EXPIRES", "1700000000") \
+        != other._secret_hash("owner/repo", "COOKIE_EXPIRES", "1700000000")
+    assert service._secret_hash("owner/repo", "CSRF", "c") == service._secret_hash("owner/repo", "CSRF", "c")
+
+
+def test_public_keys_not_shared_between_clients(github):
+    """公钥缓存属于客户端，使用其他 Token 的客户端会重新获取"""
+    service, fake = github
+    service.update_cookies({"MUSIC_U": "u1"})
+    other = GitHubService(Logger(), session=fake, store=JsonStore("o.json", service.store.path + ".other"))
+    fake.calls.clear()
+    assert other.update_cookies({"MUSIC_U": "u1"})
+    assert [call[0] for call in fake.calls] == ["GET", "PUT"]
@@ -0,0 +1,85 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utils.clock import set_clock
+from src.utils.http import DEFAULT_TIMEOUT, TASK_ENDPOINTS, ClientAdapter, ResponseCache, create_session, timeout_for
+from src.utils.retry import CircuitBreaker
+
+SIGN_URL = "https://interface.music.163.com/weapi/music/partner/work/evaluate"
+DAILY_URL = "https://interface.music.163.com/api/music/partner/daily/task/get"
+
+
+def response(body: bytes = b'{"code": 200}', status: int = 200) -> requests.Response:
+    result = requests.Response()
+    result.status_code, result._content = status, body
+    return result
+
+
+class RecordingTransport(HTTPAdapter):
+    """记录发送参数并返回空响应的传输层"""
+
+    def __init__(self, **kwargs):
+        self.timeouts = []
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.timeouts.append(kwargs.get("timeout"))
+        response = requests.Response()
+        response.status_code, response._content, response.url = 200, b'{"code": 200}', request.url
+        return response
+
+
+class RecordingAdapter(ClientAdapter, RecordingTransport):
+    pass
+
+
+def test_timeout_longest_prefix():
+    """按最长前缀匹配接口的默认超时，未知主机使用全局默认值"""
+    assert timeout_for(DAILY_URL) == (3.05, 10)
+    assert timeout_for(SIGN_URL) == (3.05, 15)
+    assert timeout_for("https://ncma-web.vercel.app/login/cellphone") == (5, 30)
+    assert timeout_for("https://example.com/") == DEFAULT_TIMEOUT
+
+
+def test_adapter_applies_default_timeout():
+    """未指定超时的请求使用接口默认超时，显式指定时保持不变"""
+    adapter = RecordingAdapter(breaker=CircuitBreaker())
+    session = create_session(adapters={"https://": adapter})
+    session.get("https://music.163.com/api/nuser/account/get")
+    session.post(SIGN_URL)
+    session.post(SIGN_URL, timeout=1)
+
+    assert adapter.timeouts == [(3.05, 10), (3.05, 15), 1]
+
+
+def test_response_cache_ttl_and_invalidation(clock):
+    """只缓存业务码为 200 的响应，按接口有效期过期，评分后按前缀失效"""
+    set_clock(clock)
+    try:
+        cache = ResponseCache({DAILY_URL: 60, TASK_ENDPOINTS[1]: 60})
+        cache.put(DAILY_URL, response())
+        cache.put(DAILY_URL, response(), params={"page": 2})
+        cache.put(TASK_ENDPOINTS[1], response(b'{"code": 301}'))
+        cache.put(SIGN_URL, response())
+
+        assert cache.get(DAILY_URL) is not None
+        assert cache.get(DAILY_URL, {"page": 2}) is not None
+        assert cache.get(DAILY_URL, {"page": 3}) is None
+        assert cache.get(TASK_ENDPOINTS[1]) is None
+        assert cache.get(SIGN_URL) is None
+
+        clock.advance(60)
+        assert cache.get(DAILY_URL) is None
+
+        cache.put(DAILY_URL, response())
+        cache.put(DAILY_URL, response(), params={"page": 2})
+        cache.invalidate(*TASK_ENDPOINTS)
+        assert cache.get(DAILY_URL) is None and cache.get(DAILY_URL, {"page": 2}) is None
+    finally:
+        set_clock(None)
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只在真正加密、发信或更新 Secret 时才需要的模块
+LAZY_MODULES = ("Crypto", "nacl", "smtplib", "email.mime")
+
+# 项目自身模块的导入耗时预算（微秒），留出足够余量以免在慢机器上误报
+OWN_BUDGET_US = 100_000
+
+
+def importtime(module: str) -> Dict[str, Tuple[int, int]]:
+    """用 python -X importtime 记录导入入口模块时加载的模块：名称 -> (自身耗时, 累计耗时)"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stderr
+
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+@pytest.mark.parametrize("entry", ["main", "refresh_cookie"])
+def test_entry_import_graph(entry):
+    """入口模块不预先加载加密、NaCl 和邮件模块，项目自身的导入耗时在预算内"""
+    modules = importtime(entry)
+    assert entry in modules
+
+    eager = sorted(name for name in modules if name.startswith(LAZY_MODULES))
+    assert not eager, f"{entry} 导入时加载了 {eager}"
+
+    own = {name: times[0] for name, times in modules.items() if name.startswith("src.")}
+    slowest = sorted(own.items(), key=lambda item: item[1], reverse=True)[:5]
+    assert sum(own.values()) < OWN_BUDGET_US, f"{entry} 导入耗时超出预算，最慢的模块: {slowest}"
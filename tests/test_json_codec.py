@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.mock.server import MockPartnerApi
+from src.utils.json_codec import JsonCodec, OrjsonCodec, set_json_codec
+
+PAYLOADS = [
+    {"workId": 1, "score": "3", "comment": "好听", "csrf_token": "abc"},
+    {"name": "作品\n\t\"引号\"\\ \u0001  ", "tags": ["3-A-1"], "ok": True, "none": None},
+    {"big": 2 ** 70, "float": 1.5, "nested": {"列表": [1, 2, 3]}},
+    {1: "非字符串键", None: 0.1, "small": -2 ** 63},
+]
+
+
+@pytest.fixture
+def orjson_codec():
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        pytest.skip("未安装 orjson")
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_backends_dump_identical_bytes(payload, orjson_codec):
+    """两种后端序列化结果逐字节一致，且与 json.dumps 的默认格式相同，weapi 发送的明文不变"""
+    expected = json.dumps(payload).encode("utf-8")
+    assert JsonCodec().dumps_bytes(payload) == expected
+    assert orjson_codec.dumps_bytes(payload) == expected
+    assert orjson_codec.loads(expected) == JsonCodec().loads(expected)
+
+
+@pytest.mark.parametrize("backend", [JsonCodec, OrjsonCodec])
+def test_weapi_roundtrip(backend):
+    """使用任一后端加密的参数都能被解密"""
+    try:
+        set_json_codec(backend())
+    except ImportError:
+        pytest.skip("未安装 orjson")
+    try:
+        api = MockPartnerApi(key_bits=1024)
+        codec = api.codec()
+        for payload in PAYLOADS[:2]:
+            assert api.decrypt(codec.encrypt(payload)) == payload
+        assert [api.decrypt(p) for p in codec.encrypt_many(PAYLOADS[:2])] == PAYLOADS[:2]
+    finally:
+        set_json_codec(None)
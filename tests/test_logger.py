@@ -0,0 +1,69 @@
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.logger import ContextFilter, DeferredQueueHandler, JsonFormatter, _env_level, log_context
+
+
+def queue_logger(name: str):
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    handler.addFilter(ContextFilter())
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger, records
+
+
+def test_context_follows_record_to_listener():
+    """上下文字段在产生日志的线程中写入记录，后台线程格式化时上下文早已退出"""
+    logger, records = queue_logger("ncmp.test.context")
+
+    def worker():
+        with log_context(account="张三", work=1001):
+            logger.info("评分 %s 成功", 1001)
+
+    with log_context(account="李四", phase="daily"):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        logger.info("完成")
+
+    lines = [json.loads(JsonFormatter().format(records.get_nowait())) for _ in range(2)]
+    assert records.empty()
+    assert lines[0]["account"] == "张三" and lines[0]["work"] == 1001 and "phase" not in lines[0]
+    assert lines[0]["message"] == "评分 1001 成功"
+    assert lines[1]["account"] == "李四" and lines[1]["phase"] == "daily" and "work" not in lines[1]
+
+
+def test_mutable_args_snapshot_on_enqueue():
+    """可变参数在入队时格式化，之后的修改不会出现在日志中；不可变参数仍推迟格式化"""
+    logger, records = queue_logger("ncmp.test.snapshot")
+    data = {"workId": 1001}
+    logger.debug("请求数据: %s", data)
+    logger.debug("作品 %s", 1001)
+    data["workId"] = 2002
+
+    snapshot, deferred = records.get_nowait(), records.get_nowait()
+    assert snapshot.args is None and snapshot.getMessage() == "请求数据: {'workId': 1001}"
+    assert deferred.args == (1001,) and deferred.getMessage() == "作品 1001"
+
+
+def test_invalid_env_level_falls_back_to_info(monkeypatch, caplog):
+    """NCMP_LOG_LEVEL 无法识别时回退到 INFO 并给出警告，合法的级别名不区分大小写"""
+    monkeypatch.setenv("NCMP_LOG_LEVEL", "verbose")
+    with caplog.at_level(logging.WARNING, logger="src.utils.logger"):
+        assert _env_level(logging.DEBUG) == logging.INFO
+    assert "NCMP_LOG_LEVEL=VERBOSE" in caplog.text
+
+    monkeypatch.setenv("NCMP_LOG_LEVEL", "debug")
+    assert _env_level(logging.INFO) == logging.DEBUG
+    monkeypatch.delenv("NCMP_LOG_LEVEL")
+    assert _env_level(logging.WARNING) == logging.WARNING
@@ -0,0 +1,46 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.metrics import HTTP_RESPONSES, HTTP_SECONDS, SLEEP_SECONDS, MetricsRegistry
+
+
+def registry(status: int, seconds: float) -> MetricsRegistry:
+    metrics = MetricsRegistry()
+    metrics.inc(HTTP_RESPONSES, endpoint="a/b", status=status)
+    metrics.inc(SLEEP_SECONDS, 2.5, reason="pace")
+    metrics.observe(HTTP_SECONDS, seconds, endpoint="a/b", method="GET")
+    return metrics
+
+
+def test_merge_snapshots():
+    """多进程导出的快照合并后，计数器相加、直方图分桶逐个相加"""
+    merged = registry(200, 0.02)
+    merged.merge(registry(200, 3.0).snapshot())
+    merged.merge(registry(503, 0.02).snapshot())
+
+    responses = {dict(labels)["status"]: value for labels, value in merged.counter_values(HTTP_RESPONSES).items()}
+    assert responses == {"200": 2.0, "503": 1.0}
+    assert sum(merged.counter_values(SLEEP_SECONDS).values()) == 7.5
+
+    histogram = next(iter(merged.histograms(HTTP_SECONDS).values()))
+    assert histogram.count == 3 and abs(histogram.sum - 3.04) < 1e-9
+    assert histogram.quantile(0.5) == 0.025 and histogram.quantile(0.95) == 5.0
+
+
+def test_prometheus_text_format():
+    """导出带命名空间、HELP/TYPE 行和累计分桶的文本格式，标签值转义"""
+    metrics = registry(200, 0.02)
+    metrics.inc(HTTP_RESPONSES, endpoint='x"y', status=200)
+    lines = metrics.to_prometheus().splitlines()
+
+    assert "# TYPE ncmp_http_responses_total counter" in lines
+    assert 'ncmp_http_responses_total{endpoint="a/b",status="200"} 1' in lines
+    assert 'ncmp_http_responses_total{endpoint="x\\"y",status="200"} 1' in lines
+    assert "# TYPE ncmp_http_request_duration_seconds histogram" in lines
+    assert 'ncmp_http_request_duration_seconds_bucket{endpoint="a/b",method="GET",le="0.01"} 0' in lines
+    assert 'ncmp_http_request_duration_seconds_bucket{endpoint="a/b",method="GET",le="0.025"} 1' in lines
+    assert 'ncmp_http_request_duration_seconds_bucket{endpoint="a/b",method="GET",le="+Inf"} 1' in lines
+    assert 'ncmp_http_request_duration_seconds_count{endpoint="a/b",method="GET"} 1' in lines
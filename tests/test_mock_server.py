@@ -0,0 +1,72 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mock.loadgen import run_load
+from src.mock.server import EVALUATE_PATH, WEAPI_LOGIN_PATH, MockPartnerApi, MockServer
+from src.utils.auth import PROXY, AuthService
+from src.utils.http import create_session
+from src.utils.logger import Logger
+from src.utils.rate_limiter import RateLimiter
+
+
+def test_weapi_roundtrip():
+    """模拟服务能解密 weapi 请求参数"""
+    api = MockPartnerApi(key_bits=1024)
+    payload = {"workId": 1, "score": "3", "csrf_token": "abc"}
+    assert api.decrypt(api.codec().encrypt(payload)) == payload
+
+
+def test_load_generator():
+    """多个模拟账号完整走完每日任务和额外任务"""
+    api = MockPartnerApi(daily_count=3, extra_count=9)
+    report = run_load(accounts=3, workers=3, api=api, limiter=RateLimiter(host_rate=100, host_burst=100))
+
+    assert report["succeeded"] == 3
+    assert report["server"][EVALUATE_PATH]["ok"] == 3 * (3 + 7)
+    for result in report["results"]:
+        assert (result["daily"], result["extra"]) == (3, 7)
+
+
+def test_abnormal_injection():
+    """资源状态异常的作品被跳过，不影响执行结果"""
+    api = MockPartnerApi(daily_count=2, extra_count=0, abnormal_rate=1.0)
+    report = run_load(accounts=1, workers=1, api=api, limiter=RateLimiter(host_rate=100, host_burst=100))
+
+    assert report["succeeded"] == 1
+    assert report["server"][EVALUATE_PATH]["abnormal"] == 2
+
+
+def test_login_proxy():
+    """登录代理返回可用的 Cookie"""
+    with MockServer(MockPartnerApi()):
+        success, cookies = AuthService(Logger(), create_session(), backend=PROXY).login("13800000000", password="secret")
+
+    assert success
+    assert cookies["Cookie_MUSIC_U"] and cookies["Cookie___csrf"]
+
+
+def test_native_login():
+    """直接登录从响应 Cookie 中取得 MUSIC_U、__csrf 和过期时间，与代理登录结果一致"""
+    api = MockPartnerApi()
+    with MockServer(api):
+        auth = AuthService(Logger(), create_session())
+        success, cookies = auth.login("13800000000", password="secret")
+        _, proxied = AuthService(Logger(), create_session(), backend=PROXY).login("13800000000", password="secret")
+
+    assert success and cookies == proxied
+    assert auth.expires is not None
+    assert api.snapshot()[WEAPI_LOGIN_PATH]["ok"] == 1
+    assert not auth.session.cookies.get("MUSIC_U")
+
+
+def test_native_login_falls_back_to_proxy():
+    """直接登录失败时改用登录代理"""
+    api = MockPartnerApi()
+    del api.routes[("POST", WEAPI_LOGIN_PATH)]
+    with MockServer(api):
+        success, cookies = AuthService(Logger(), create_session()).login("13800000000", md5_password="0" * 32)
+
+    assert success and cookies["Cookie_MUSIC_U"]
@@ -0,0 +1,135 @@
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.clock import set_clock
+from src.utils.config import Config
+from src.utils.logger import Logger
+from src.utils.notification import SSL, TLS, NotificationService, Outbox, SmtpMailer
+
+
+class FakeConnection:
+    def __init__(self, fail_after=None):
+        self.sent = []
+        self.fail_after = fail_after
+
+    def send_message(self, msg):
+        if self.fail_after is not None and len(self.sent) >= self.fail_after:
+            raise OSError("连接被重置")
+        self.sent.append(msg)
+
+    def quit(self):
+        pass
+
+
+class FakeMailer(SmtpMailer):
+    """只有 working 中的连接方式能连通的发送器，broken 中的连接方式发送一封后断开"""
+
+    def __init__(self, working, broken=(), **kwargs):
+        super().__init__("smtp.example.com", 465, "me@example.com", "secret", Logger(name="test"), **kwargs)
+        self.working = working
+        self.attempts = []
+        # 每种连接方式复用同一个连接对象，便于检查各自发出的邮件
+        self.connections = {transport: FakeConnection(1 if transport in broken else None) for transport in (SSL, TLS)}
+
+    @property
+    def connection(self):
+        return self.connections[self.attempts[-1]] if self.attempts else self.connections[SSL]
+
+    def _open(self, transport):
+        self.attempts.append(transport)
+        if transport not in self.working:
+            raise OSError(f"{transport} 不可用")
+        return self.connections[transport]
+
+
+@pytest.fixture(autouse=True)
+def transports():
+    SmtpMailer._transports.clear()
+    yield
+    SmtpMailer._transports.clear()
+
+
+def service(mailer, **settings):
+    settings.update(Cookie_MUSIC_U="music_u", Cookie___csrf="csrf", notify_email="me@example.com",
+                    email_password="secret")
+    return NotificationService(Config(settings), Logger(name="test"), mailer)
+
+
+def test_outbox_digest():
+    """重复通知只保留一条，单条通知原样发送，多条合并为一封"""
+    outbox = Outbox()
+    outbox.add("账号 A", "Cookie 失效")
+    outbox.add("账号 A", "Cookie 失效")
+    assert Outbox.digest(outbox.drain()) == ("账号 A", "Cookie 失效")
+
+    outbox.add("账号 A", "Cookie 失效")
+    outbox.add("账号 B", "评分失败")
+    subject, content = Outbox.digest(outbox.drain())
+    assert subject == "网易云音乐合伙人 - 2 条通知"
+    assert content == "【账号 A】\nCookie 失效\n\n【账号 B】\n评分失败"
+    assert len(outbox) == 0
+
+
+def test_batch_sends_one_digest():
+    """批次内的通知在结束时合并为一封邮件"""
+    mailer = FakeMailer({SSL})
+    notifier = service(mailer)
+    with notifier.batch():
+        assert notifier.send_notification("账号 A", "Cookie 失效")
+        assert notifier.send_notification("账号 B", "评分失败")
+        assert mailer.connection.sent == []
+
+    assert [msg["Subject"] for msg in mailer.connection.sent] == ["网易云音乐合伙人 - 2 条通知"]
+
+
+def test_window_flushes_inside_batch(clock):
+    """等待超过合并窗口后，下一条通知触发发送"""
+    mailer = FakeMailer({SSL})
+    notifier = service(mailer, notify_window=60)
+    set_clock(clock)
+    try:
+        with notifier.batch():
+            notifier.send_notification("账号 A", "Cookie 失效")
+            clock.advance(61)
+            notifier.send_notification("账号 B", "评分失败")
+            assert len(mailer.connection.sent) == 1
+            notifier.send_notification("账号 C", "评分失败")
+    finally:
+        set_clock(None)
+
+    assert [msg["Subject"] for msg in mailer.connection.sent] == ["网易云音乐合伙人 - 2 条通知", "账号 C"]
+
+
+def test_remembered_transport(state_dir):
+    """SSL 失败后改用 TLS，之后的发送器（包括新进程）直接使用 TLS"""
+    first = FakeMailer({TLS})
+    assert first.send([]) == TLS
+    assert first.attempts == [SSL, TLS]
+
+    second = FakeMailer({TLS})
+    assert second.send([]) == TLS
+    assert second.attempts == [TLS]
+
+    # 新进程没有内存中的记录，从状态文件读取
+    SmtpMailer._transports.clear()
+    restarted = FakeMailer({SSL, TLS})
+    assert restarted.send([]) == TLS
+    assert restarted.attempts == [TLS]
+
+
+def test_send_failure_falls_back_to_other_transport(state_dir):
+    """SSL 登录成功但发送中断时，改用 TLS 重发未发送的邮件，之后直接使用 TLS"""
+    mailer = FakeMailer({SSL, TLS}, broken={SSL})
+    assert mailer.send(["第一封", "第二封", "第三封"]) == TLS
+    assert mailer.attempts == [SSL, TLS]
+    assert mailer.connections[SSL].sent == ["第一封"]
+    assert mailer.connections[TLS].sent == ["第二封", "第三封"]
+
+    again = FakeMailer({SSL, TLS}, broken={SSL})
+    assert again.send(["第四封"]) == TLS
+    assert again.attempts == [TLS]
@@ -0,0 +1,90 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.outcomes import HOUR, RETENTION, OutcomeCache
+from src.mock.loadgen import run_load
+from src.mock.server import EVALUATE_PATH, MockPartnerApi
+from src.utils.rate_limiter import RateLimiter
+from src.utils.storage import JsonStore
+
+
+def task(work_id):
+    return {"completed": False, "work": {"id": work_id, "name": f"Song {work_id}", "authorName": "歌手"}}
+
+
+def result(work_id, success=True, skipped=False, message="", kind="extra", responded=True):
+    return {"kind": kind, "work_id": work_id, "name": "", "success": success, "skipped": skipped,
+            "message": message, "responded": responded}
+
+
+def test_rank_skips_abnormal_and_prefers_successful(tmp_path, clock):
+    """资源状态异常的作品在有效期内被跳过，其余按成功率排序"""
+    cache = OutcomeCache(ttl=HOUR, store=JsonStore("o.json", str(tmp_path / "o.json")), clock=clock.time)
+    cache.record([result(1, skipped=True, message="资源状态异常"), result(2, success=False, message="超时"),
+                  result(3), result(3)])
+
+    assert [t["work"]["id"] for t in cache.rank([task(i) for i in (1, 2, 4, 3)])] == [3, 4, 2]
+    assert cache.entry(1)["error"] == "资源状态异常"
+
+    # 过期后重新参与排序，但排在没有失败记录的作品之后
+    clock.advance(HOUR)
+    assert not cache.is_blocked(1)
+    assert [t["work"]["id"] for t in cache.rank([task(1), task(4)])] == [4, 1]
+
+
+def test_processes_merge_outcomes(tmp_path, clock):
+    """共用同一文件的多个缓存（如车队的各个进程）累加彼此的结果，过期记录一次写入内清理"""
+    path = str(tmp_path / "o.json")
+    first = OutcomeCache(store=JsonStore("o.json", path), clock=clock.time)
+    second = OutcomeCache(store=JsonStore("o.json", path), clock=clock.time)
+    first.record([result(1)])
+    clock.advance(RETENTION / 2)
+    # second 在 first 下一次写入前已经读取过文件
+    second.record([result(2)])
+    first.record([result(2, success=False, message="超时")])
+    second.record([result(3, skipped=True, message="资源状态异常")])
+
+    merged = OutcomeCache(store=JsonStore("o.json", path), clock=clock.time)
+    assert {key: (entry.get("ok", 0), entry.get("failed", 0)) for key, entry in merged.store.items()} == {
+        "1": (1, 0), "2": (1, 1), "3": (0, 1)
+    }
+
+    saves = []
+    save = merged.store._save
+    merged.store._save = lambda: saves.append(1) or save()
+    clock.advance(RETENTION / 2)
+    merged.record([result(4)])
+    assert len(saves) == 1
+    assert sorted(key for key, _ in merged.store.items()) == ["2", "3", "4"]
+
+
+def test_record_ignores_daily_and_unanswered_failures(tmp_path, clock):
+    """每日任务和没有得到评分接口响应的失败不计入作品的成功率"""
+    cache = OutcomeCache(store=JsonStore("o.json", str(tmp_path / "o.json")), clock=clock.time)
+    cache.record([result(1, success=False, message="熔断", responded=False),
+                  result(2, success=False, message="评分失败", kind="daily"),
+                  result(3, success=False, message="评分失败: 参数错误")])
+
+    assert cache.entry(1) == {} and cache.entry(2) == {}
+    assert cache.entry(3)["failed"] == 1
+    assert cache.success_rate(1) == 0.5
+
+
+def test_abnormal_extra_works_do_not_use_quota():
+    """资源状态异常的额外任务不计入配额，下一次运行直接跳过"""
+    # 模拟账号 mock-001 的额外任务ID从 1500 开始
+    abnormal = {1500, 1501, 1502}
+    limiter = RateLimiter(host_rate=100, host_burst=100)
+
+    api = MockPartnerApi(daily_count=0, extra_count=12, abnormal_works=abnormal)
+    report = run_load(accounts=1, workers=1, api=api, limiter=limiter)
+    assert report["results"][0]["extra"] == 7
+    assert report["server"][EVALUATE_PATH] == {"ok": 7, "abnormal": 3}
+
+    api = MockPartnerApi(daily_count=0, extra_count=12, abnormal_works=abnormal)
+    report = run_load(accounts=1, workers=1, api=api, limiter=limiter)
+    assert report["results"][0]["extra"] == 7
+    assert report["server"][EVALUATE_PATH] == {"ok": 7}
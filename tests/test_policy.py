@@ -0,0 +1,58 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.core.policy import ScoringPolicy, get_policy
+from src.utils.config import Config
+
+
+def work(work_id, name, author="歌手", **extra):
+    return {"id": work_id, "name": name, "authorName": author, **extra}
+
+
+def test_default_strategy():
+    """没有规则时与原评分策略一致：含英文用高一档评分"""
+    policy = ScoringPolicy(("3", "4"))
+    assert policy.decide_many([work(1, "晴天"), work(2, "Sunny"), work(3, "晴天", "Jay")]) == [
+        ("3", "3-A-1"), ("4", "4-A-1"), ("4", "4-A-1")
+    ]
+
+
+def test_rules_in_order():
+    """规则按顺序匹配，第一条命中的规则生效"""
+    policy = ScoringPolicy(("3", "4"), [
+        {"keyword": ["伴奏", "demo"], "score": 2},
+        {"author": "歌手A", "language": "chinese", "score": 4, "tags": "4-B-2"},
+        {"tag": "摇滚", "score": 1},
+    ])
+    assert policy.decide(work(1, "晴天 (Demo)", "歌手A")) == ("2", "2-A-1")
+    assert policy.decide(work(2, "晴天", "歌手A")) == ("4", "4-B-2")
+    assert policy.decide(work(3, "晴天", tags=[{"name": "摇滚"}])) == ("1", "1-A-1")
+    assert policy.decide(work(4, "晴天")) == ("3", "3-A-1")
+
+
+def test_memoized_and_shared():
+    """决策按作品缓存，评分配置相同的账号共用同一个策略"""
+    base = {"Cookie_MUSIC_U": "u", "Cookie___csrf": "c", "score": 2}
+    policy = get_policy(Config(base))
+    assert get_policy(Config({**base, "Cookie_MUSIC_U": "other"})) is policy
+    assert get_policy(Config({**base, "score": 3})) is not policy
+
+    works = [work(10, "晴天"), work(11, "Sunny")]
+    policy.decide_many(works)
+    misses = policy.misses
+    assert policy.decide_many(works) == [("2", "2-A-1"), ("3", "3-A-1")]
+    assert policy.misses == misses
+
+
+def test_invalid_rules():
+    with pytest.raises(ValueError):
+        ScoringPolicy(("3", "4"), [{"score": 3}])
+    with pytest.raises(ValueError):
+        ScoringPolicy(("3", "4"), [{"language": "french", "score": 3}])
+    with pytest.raises(ValueError):
+        Config({"Cookie_MUSIC_U": "u", "Cookie___csrf": "c", "score_rules": {"keyword": "x"}})
@@ -0,0 +1,74 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.clock import set_clock
+from src.utils.rate_limiter import RateLimiter
+from src.utils.retry import Retrier
+
+SIGN_URL = "https://interface.music.163.com/weapi/music/partner/work/evaluate"
+DAILY_URL = "https://interface.music.163.com/api/music/partner/daily/task/get"
+
+
+def limiter(clock, **kwargs):
+    return RateLimiter(clock=clock.monotonic, sleep=clock.sleep, **kwargs)
+
+
+def test_aimd_rate_adjustment(clock):
+    """成功时线性提高速率，限流时成倍降低，且不超出上下限"""
+    rates = limiter(clock, host_rate=1.0, min_rate=0.2, max_rate=1.25, increase=0.1, decrease=0.5)
+    rates.on_success(SIGN_URL)
+    rates.on_success(SIGN_URL)
+    assert abs(rates.rate(SIGN_URL) - 1.2) < 1e-9
+    rates.on_success(SIGN_URL)
+    assert rates.rate(SIGN_URL) == 1.25
+
+    rates.on_throttled(SIGN_URL)
+    assert rates.rate(SIGN_URL) == 0.625
+    for _ in range(5):
+        rates.on_throttled(SIGN_URL)
+    assert rates.rate(SIGN_URL) == 0.2
+
+    # 同一主机的不同接口共用一个令牌桶
+    assert rates.rate(DAILY_URL) == 0.2
+
+
+def test_host_bucket_queues_callers(clock):
+    """突发容量用完后，并发的调用方按速率依次排队"""
+    rates = limiter(clock, host_rate=2.0, host_burst=2.0)
+    assert [rates.reserve(DAILY_URL) for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+
+    clock.advance(1.0)
+    assert rates.reserve(DAILY_URL) == 0.5
+
+    # 降速后的等待时间按新速率计算
+    rates.on_throttled(DAILY_URL)
+    assert rates.reserve(DAILY_URL) == 2.0
+
+
+def test_account_pace(clock):
+    """账号每次评分前等待 interval 秒，连续预占时依次排队，不同账号互不影响"""
+    rates = limiter(clock)
+    assert rates.reserve_pace("a", 15.0) == 15.0
+    assert rates.reserve_pace("a", 15.0) == 30.0
+    assert rates.reserve_pace("b", 15.0) == 15.0
+
+    clock.advance(40.0)
+    assert rates.pace("a", 15.0) == 15.0
+    assert clock.monotonic() == 55.0
+
+
+def test_defaults_follow_clock_replaced_later(clock):
+    """在 set_clock 之前创建的限流器和重试器，等待时也只推进替换后的虚拟时钟"""
+    rates = RateLimiter(host_rate=1.0, host_burst=0.0)
+    retrier = Retrier()
+    set_clock(clock)
+    try:
+        rates.acquire(DAILY_URL)
+        rates.acquire(DAILY_URL)
+        retrier._sleep(5.0)
+    finally:
+        set_clock(None)
+    assert clock.monotonic() == 7.0
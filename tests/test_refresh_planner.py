@@ -0,0 +1,108 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.refresh_planner import DAY, DEFAULT_LIFETIME, RefreshPlanner
+from src.core.tasks.cookie_refresh import CookieRefreshTask
+from src.utils.auth import parse_cookie_expiry
+from src.utils.logger import Logger
+from src.utils.storage import JsonStore
+
+
+def planner(tmp_path, clock, spread=0.0):
+    return RefreshPlanner(margin=3 * DAY, spread=spread, store=JsonStore("state.json", str(tmp_path / "state.json")),
+                          clock=clock.time)
+
+
+def test_refresh_near_expiry_or_after_auth_failure(tmp_path, clock):
+    """只在临近过期或登录失效后刷新"""
+    plan = planner(tmp_path, clock)
+    assert plan.should_refresh("a")[0]
+
+    plan.record_login("a", expires=clock.time() + 15 * DAY)
+    clock.advance(11 * DAY)
+    assert not plan.should_refresh("a")[0]
+    clock.advance(1.5 * DAY)
+    assert plan.should_refresh("a")[0]
+
+    plan.record_login("a", expires=clock.time() + 15 * DAY)
+    plan.record_auth_failure("a")
+    assert plan.should_refresh("a") == (True, "登录状态已失效")
+
+
+def test_fleet_refreshes_are_spread(tmp_path, clock):
+    """同时登录的多个账号，刷新时间在错开窗口内分散"""
+    plan = planner(tmp_path, clock, spread=DAY)
+    accounts = [f"account-{i}" for i in range(20)]
+    for account in accounts:
+        plan.record_login(account, expires=clock.time() + 15 * DAY)
+
+    due = [entry[0] for entry in plan.plan(accounts)]
+    latest = clock.time() + 12 * DAY
+    assert all(latest - DAY <= t <= latest for t in due)
+    assert max(due) - min(due) > DAY / 2
+
+
+def test_parse_cookie_expiry():
+    assert parse_cookie_expiry("__csrf=y; Path=/, MUSIC_U=x; Expires=Tue, 01 Jan 2030 00:00:00 GMT; Path=/") == 1893456000
+    assert parse_cookie_expiry("MUSIC_U=x; Path=/;;__csrf=y; Max-Age=10") is None
+
+
+
+def test_estimate_expiry_from_first_validation(tmp_path, clock):
+    """没有签发和过期记录时，按首次验证通过的时间估算，不会每次检查都要求刷新"""
+    plan = planner(tmp_path, clock)
+    plan.record_valid("a")
+    first = clock.time()
+    clock.advance(DAY)
+    plan.record_valid("a")
+    assert plan.expires_at("a") == first + DEFAULT_LIFETIME
+    assert not plan.should_refresh("a")[0]
+
+    clock.advance(DEFAULT_LIFETIME - 3 * DAY - DAY)
+    assert plan.should_refresh("a") == (True, "Cookie 即将过期")
+
+class FakeAuth:
+    expires = None
+
+    def login(self, phone, password=None, md5_password=None):
+        return True, {"Cookie_MUSIC_U": "new_u", "Cookie___csrf": "new_csrf"}
+
+
+class FakeGitHub:
+    def __init__(self):
+        self.updated = []
+
+    def update_cookies(self, secrets):
+        self.updated.append(secrets)
+        return True
+
+
+def refresh_task(tmp_path, clock, github=None):
+    task = CookieRefreshTask(Logger(name="test"), planner=planner(tmp_path, clock), github_service=github)
+    task.auth_service = FakeAuth()
+    return task
+
+
+def test_refresh_without_github_token(tmp_path, clock, monkeypatch):
+    """没有 GH_TOKEN 时仍然登录并记录，只跳过更新 Secrets"""
+    monkeypatch.delenv("GH_TOKEN", raising=False)
+    task = refresh_task(tmp_path, clock)
+    assert task.execute({"netease_phone": "13800000000", "netease_md5_password": "md5"})
+    assert task.cookies["Cookie_MUSIC_U"] == "new_u"
+    assert task.github_service is None
+    assert task.planner.state("default")["issued"] == clock.time()
+
+
+def test_cookie_expires_always_written(tmp_path, clock):
+    """未能获取过期时间时，COOKIE_EXPIRES 按签发时间加默认有效期写入"""
+    github = FakeGitHub()
+    assert refresh_task(tmp_path, clock, github).execute({"netease_phone": "13800000000", "netease_password": "pw"})
+    assert github.updated[0]["COOKIE_EXPIRES"] == str(int(clock.time() + DEFAULT_LIFETIME))
+
+    task = refresh_task(tmp_path, clock, github)
+    task.auth_service.expires = clock.time() + 10 * DAY
+    assert task.execute({"netease_phone": "13800000000", "netease_password": "pw"})
+    assert github.updated[1]["COOKIE_EXPIRES"] == str(int(clock.time() + 10 * DAY))
@@ -0,0 +1,151 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from src.mock.server import DAILY_PATH, MockPartnerApi, MockServer
+from src.utils.http import ClientAdapter, create_session
+from src.utils.retry import CircuitBreaker, CircuitOpenError, Retrier, set_circuit_breaker
+
+SIGN_URL = "https://interface.music.163.com/weapi/music/partner/work/evaluate"
+DAILY_URL = "https://interface.music.163.com/api/music/partner/daily/task/get"
+
+
+def response(status: int, body: bytes = b'{"code": 200}') -> requests.Response:
+    result = requests.Response()
+    result.status_code = status
+    result._content = body
+    return result
+
+
+def sender(*outcomes):
+    """依次返回给定响应或抛出给定异常的请求函数"""
+    outcomes = list(outcomes)
+    calls = []
+
+    def send():
+        calls.append(1)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return send, calls
+
+
+def test_retry_transient_and_throttled():
+    """网络错误、5xx 和“频繁”按退避重试，业务错误直接返回"""
+    sleeps = []
+    retrier = Retrier(sleep=sleeps.append)
+    send, calls = sender(requests.ConnectionError("reset"), response(200, '{"code": 400, "message": "操作频繁"}'.encode()),
+                         response(200))
+    assert retrier.call(DAILY_URL, send).status_code == 200
+    assert len(calls) == 3 and len(sleeps) == 2
+
+    send, calls = sender(response(200, b'{"code": 301}'), response(200))
+    assert retrier.call(DAILY_URL, send).json()["code"] == 301
+    assert len(calls) == 1
+
+
+def test_no_retry_after_read_timeout_on_sign():
+    """评分不是幂等请求，读取超时后不重试"""
+    retrier = Retrier(sleep=lambda seconds: None)
+    send, calls = sender(requests.ReadTimeout("timeout"), response(200))
+    with pytest.raises(requests.ReadTimeout):
+        retrier.call(SIGN_URL, send)
+    assert len(calls) == 1
+
+
+def test_no_retry_after_disconnect_on_sign():
+    """评分请求发出后连接中断时不重试；建立连接失败时请求没有发出，可以重试"""
+    retrier = Retrier(sleep=lambda seconds: None)
+    aborted = requests.ConnectionError(ProtocolError("Connection aborted.", ConnectionResetError("reset")))
+    send, calls = sender(aborted, response(200))
+    with pytest.raises(requests.ConnectionError):
+        retrier.call(SIGN_URL, send)
+    assert len(calls) == 1
+
+    refused = requests.ConnectionError(MaxRetryError(None, SIGN_URL, NewConnectionError(None, "refused")))
+    send, calls = sender(refused, response(200))
+    assert retrier.call(SIGN_URL, send).status_code == 200
+    assert len(calls) == 2
+
+    send, calls = sender(requests.ConnectTimeout("connect timeout"), response(200))
+    assert retrier.call(SIGN_URL, send).status_code == 200
+    assert len(calls) == 2
+
+
+def test_no_retry_after_server_error_on_sign():
+    """评分可能已被处理，5xx 交给评分流程查询状态后再决定是否重发；查询接口照常重试"""
+    retrier = Retrier(sleep=lambda seconds: None)
+    send, calls = sender(response(502), response(200))
+    assert retrier.call(SIGN_URL, send).status_code == 502
+    assert len(calls) == 1
+
+    send, calls = sender(response(502), response(200))
+    assert retrier.call(DAILY_URL, send).status_code == 200
+    assert len(calls) == 2
+
+
+def test_circuit_breaker_opens_and_probes():
+    """连续失败后熔断，到期后只放行一个探测请求，成功则恢复"""
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=3, reset_timeout=10, clock=lambda: now[0])
+    for _ in range(3):
+        breaker.before(DAILY_URL)
+        breaker.record(DAILY_URL, False)
+    with pytest.raises(CircuitOpenError):
+        breaker.before(SIGN_URL)
+    breaker.before("https://music.163.com/api/nuser/account/get")
+
+    now[0] = 10.0
+    breaker.before(DAILY_URL)
+    with pytest.raises(CircuitOpenError):
+        breaker.before(DAILY_URL)
+    breaker.record(DAILY_URL, True)
+    breaker.before(DAILY_URL)
+
+
+def test_outage_fails_fast():
+    """接口持续返回 5xx 时熔断，之后的请求不再发出"""
+    api = MockPartnerApi()
+    api.routes[("GET", DAILY_PATH)] = lambda *args: (503, {"code": 503, "message": "维护中"}, {})
+    set_circuit_breaker(CircuitBreaker(threshold=3, reset_timeout=60))
+    try:
+        with MockServer(api):
+            session = create_session({"MUSIC_U": "u", "__csrf": "c"}, rate_limited=False)
+            session.retrier = Retrier(sleep=lambda seconds: None)
+            assert session.get(DAILY_URL).status_code == 503
+            with pytest.raises(CircuitOpenError):
+                session.get(DAILY_URL)
+    finally:
+        set_circuit_breaker(None)
+
+
+class BrokenTransport(requests.adapters.HTTPAdapter):
+    def send(self, request, **kwargs):
+        raise ValueError("响应无法解析")
+
+
+class BrokenAdapter(ClientAdapter, BrokenTransport):
+    """发送时抛出网络错误以外异常的适配器"""
+
+
+def test_probe_released_after_other_errors():
+    """探测请求因网络错误以外的异常失败时归还名额，下一个请求可以继续探测"""
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=1, reset_timeout=10, clock=lambda: now[0])
+    breaker.record(DAILY_URL, False)
+    now[0] = 10.0
+
+    session = requests.Session()
+    session.mount("https://", BrokenAdapter(breaker=breaker))
+    with pytest.raises(ValueError):
+        session.get(DAILY_URL)
+    breaker.before(DAILY_URL)
+    breaker.record(DAILY_URL, True)
+    assert not breaker.is_open(DAILY_URL)
@@ -0,0 +1,117 @@
+import os
+import sys
+import threading
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.scheduler import DAILY, EXTRA, PacedExecutor, WorkQueue
+from src.utils.logger import Logger
+from src.utils.retry import CircuitOpenError
+
+
+def task(work_id):
+    return {"completed": False, "work": {"id": work_id, "name": f"Song {work_id}", "authorName": "歌手"}}
+
+
+class FakeSigner:
+    """按作品ID返回预设结果的评分器，结果为异常时抛出"""
+
+    def __init__(self, results=None, on_sign=None):
+        self.results = results or {}
+        self.on_sign = on_sign
+        self.signed = []
+
+    def plan(self, works):
+        pass
+
+    def is_signed(self, work):
+        return False
+
+    def prepare(self, work, is_extra=False):
+        return {"work": work["id"]}
+
+    def sign(self, work, is_extra=False, prepared=None):
+        if self.on_sign is not None:
+            self.on_sign(work)
+        self.signed.append(work["id"])
+        result = self.results.get(work["id"], True)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_duplicates_and_priority():
+    """同一作品只入队一次，每日任务先于额外任务出队"""
+    queue = WorkQueue()
+    assert queue.add_extra([task(3), task(1), task(3)]) == 2
+    assert queue.add_daily([task(1), task(2), task(2)]) == 1
+    assert len(queue) == 3
+
+    items = [queue.pop() for _ in range(3)]
+    assert [(item.kind, item.work["id"]) for item in items] == [(DAILY, 2), (EXTRA, 3), (EXTRA, 1)]
+    assert queue.pop() is None
+
+
+def test_in_flight_extra_counts_toward_quota():
+    """配额被出队未完成的额外任务占满时暂停出队，失败后释放给下一个候选"""
+    queue = WorkQueue(extra_limit=7)
+    queue.add_extra([task(1), task(2), task(3)], completed_count=6)
+    assert queue.extra_quota == 1
+
+    first = queue.pop()
+    assert queue.pop() is None and len(queue) == 2
+
+    queue.complete(first, success=False)
+    second = queue.pop()
+    assert second.work["id"] == 2
+
+    queue.complete(second, success=True)
+    assert queue.extra_done == 1
+    assert queue.pop() is None
+
+
+def test_executor_fills_quota_after_failures():
+    """失败和资源状态异常的额外任务不计入配额，由后面的候选补上"""
+    queue = WorkQueue(extra_limit=2)
+    queue.add_daily([task(1)])
+    queue.add_extra([task(2), task(3), task(4), task(5)])
+    signer = FakeSigner({2: RuntimeError("评分失败"), 3: False})
+
+    outcomes = PacedExecutor(signer, Logger(), report=lambda work: None).run(queue)
+
+    assert signer.signed == [1, 2, 3, 4, 5]
+    assert [(o["work_id"], o["success"], o["skipped"]) for o in outcomes] == [
+        (1, True, False), (2, False, False), (3, True, True), (4, True, False), (5, True, False)
+    ]
+    assert queue.extra_done == 2
+
+
+def test_executor_prefetches_next_report():
+    """当前作品评分期间，下一个额外任务的听歌上报已在后台进行"""
+    reported = threading.Event()
+    seen = []
+
+    def on_sign(work):
+        if work["id"] == 1:
+            seen.append(reported.wait(5))
+
+    queue = WorkQueue()
+    queue.add_extra([task(1), task(2)])
+    PacedExecutor(FakeSigner(on_sign=on_sign), Logger(),
+                  report=lambda work: work["id"] == 2 and reported.set()).run(queue)
+
+    assert seen == [True]
+
+
+def test_executor_stops_on_circuit_open():
+    """接口熔断时停止处理剩余作品"""
+    queue = WorkQueue()
+    queue.add_daily([task(1), task(2), task(3)])
+    signer = FakeSigner({2: CircuitOpenError("熔断")})
+
+    outcomes = PacedExecutor(signer, Logger()).run(queue)
+
+    assert signer.signed == [1, 2]
+    assert [o["success"] for o in outcomes] == [True, False]
+    assert outcomes[-1]["message"] == "熔断"
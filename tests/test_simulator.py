@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mock.server import MockPartnerApi
+from src.mock.simulator import simulate
+from src.utils.clock import Clock, VirtualClock, get_clock
+from src.utils.rate_limiter import RateLimiter
+
+
+def test_virtual_clock_paces_without_sleeping():
+    """账号节奏等待只推进虚拟时钟"""
+    clock = VirtualClock()
+    limiter = RateLimiter(clock=clock.monotonic, sleep=clock.sleep)
+    start = time.perf_counter()
+    for _ in range(10):
+        limiter.pace("account", 15.0)
+
+    assert clock.monotonic() == 150.0
+    assert time.perf_counter() - start < 1.0
+
+
+def run(seed: int = 1):
+    api = MockPartnerApi(daily_count=2, extra_count=9, seed=seed)
+    return simulate(accounts=20, concurrency=5, api=api, seed=seed)
+
+
+def test_simulated_fleet_is_fast_and_reproducible():
+    """模拟按真实节奏走完所有账号，虚拟耗时远大于实际耗时，相同种子的时间线相同"""
+    report = run()
+
+    assert report["succeeded"] == 20
+    assert report["signed"] == 20 * (2 + 7)
+    # 每个账号 9 次评分，每次至少间隔 15 秒
+    assert report["account_seconds"]["p50"] >= 9 * 15
+    assert report["makespan"] > 50 * report["real_seconds"]
+    assert report["makespan"] == run()["makespan"]
+    assert type(get_clock()) is Clock
@@ -0,0 +1,55 @@
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mock.server import ACCOUNT_PATH, MockPartnerApi, MockServer
+from src.utils.http import create_session
+from src.utils.logger import Logger
+from src.utils.storage import JsonStore
+from src.validators.cookie import CookieValidator, ValidationCache
+
+
+def test_cached_validation_skips_preflight():
+    """有效期内跳过预检，之后的请求返回登录失效时清除缓存"""
+    api = MockPartnerApi()
+    cookies = {"MUSIC_U": "cached-user", "__csrf": "csrf"}
+    cache = ValidationCache(ttl=3600)
+    key = cache.key(cookies["MUSIC_U"], cookies["__csrf"])
+
+    with MockServer(api):
+        assert CookieValidator(create_session(cookies), Logger(), cache=cache).validate()[0]
+        requests_made = api.snapshot()[ACCOUNT_PATH]["ok"]
+        assert cache.is_valid(key)
+
+        session = create_session(cookies)
+        is_valid, message = CookieValidator(session, Logger(), cache=cache).validate()
+        assert is_valid and "跳过预检" in message
+        assert api.snapshot()[ACCOUNT_PATH]["ok"] == requests_made
+
+        # 服务端认为未登录时返回业务码 301
+        session.cookies.set("MUSIC_U", None)
+        session.get("https://music.163.com/api/nuser/account/get")
+
+    assert not cache.is_valid(key)
+
+
+def test_remember_writes_once_and_skips_unchanged(tmp_path, clock):
+    """记录和清理过期记录只写一次文件；已有有效记录且无需清理时不写文件"""
+    cache = ValidationCache(ttl=60, store=JsonStore("v.json", str(tmp_path / "v.json")), clock=clock.time)
+    saves = []
+    save = cache.store._save
+    cache.store._save = lambda: saves.append(1) or save()
+
+    cache.remember("a")
+    cache.remember("a")
+    assert len(saves) == 1
+
+    clock.advance(30)
+    cache.remember("b")
+    clock.advance(30)
+    cache.remember("c")
+    assert len(saves) == 3
+    assert dict(cache.store.items()) == {"b": clock.time() + 30, "c": clock.time() + 60}
+    assert not cache.is_valid("a") and cache.is_valid("b")
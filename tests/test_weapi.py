@@ -0,0 +1,87 @@
+import os
+import sys
+import threading
+
+# 添加项目根目录到 Python 路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from src.core.weapi import WeapiCodec
+from src.mock.server import MockPartnerApi
+from src.utils.clock import set_clock
+
+
+@pytest.fixture(scope="module")
+def api():
+    return MockPartnerApi()
+
+
+def codec(api, **kwargs) -> WeapiCodec:
+    """使用模拟服务公钥的编解码器，加密结果可由 api.decrypt 解密"""
+    return WeapiCodec(format(api.key.e, "x"), format(api.key.n, "x"), **kwargs)
+
+
+def payload(i: int) -> dict:
+    return {"workId": str(1000 + i), "score": "3", "comment": "好听", "csrf_token": "abc"}
+
+
+def test_roundtrip(api):
+    """加密结果可被服务端解密为原始数据"""
+    weapi = codec(api)
+    assert api.decrypt(weapi.encrypt(payload(1))) == payload(1)
+    assert [api.decrypt(form) for form in weapi.encrypt_many([payload(2), payload(3)])] == [payload(2), payload(3)]
+
+
+def test_rotate_after_max_uses(api):
+    """同一密钥最多使用 max_uses 次，期间 encSecKey 复用；批量加密按条数计数"""
+    weapi = codec(api, max_uses=3, max_age=0)
+    keys = [weapi.encrypt(payload(i))["encSecKey"] for i in range(4)]
+    assert keys[0] == keys[1] == keys[2] != keys[3]
+
+    batch = weapi.encrypt_many([payload(i) for i in range(3)])
+    assert {form["encSecKey"] for form in batch} == {keys[3]}
+    assert weapi.encrypt(payload(9))["encSecKey"] not in (keys[0], keys[3])
+
+
+def test_rotate_after_max_age(api, clock):
+    """密钥存活 max_age 秒后轮换"""
+    weapi = codec(api, max_uses=0, max_age=600)
+    set_clock(clock)
+    try:
+        first = weapi.encrypt(payload(1))["encSecKey"]
+        clock.advance(599)
+        assert weapi.encrypt(payload(2))["encSecKey"] == first
+        clock.advance(1)
+        second = weapi.encrypt(payload(3))["encSecKey"]
+        assert second != first
+        assert api.decrypt(weapi.encrypt(payload(4))) == payload(4)
+    finally:
+        set_clock(None)
+
+
+def test_encrypt_many_matches_encrypt(api):
+    """同一密钥下批量加密与逐个加密的结果相同"""
+    weapi = codec(api, max_uses=0, max_age=0)
+    payloads = [payload(i) for i in range(5)]
+    assert weapi.encrypt_many(payloads) == [weapi.encrypt(p) for p in payloads]
+    assert weapi.encrypt_many([]) == []
+
+
+def test_concurrent_checkout(api):
+    """多线程共用一个编解码器时，每个密钥恰好使用 max_uses 次，所有结果都能正确解密"""
+    weapi = codec(api, max_uses=10, max_age=0)
+    forms = [None] * 200
+
+    def worker(offset: int) -> None:
+        for i in range(offset, len(forms), 8):
+            forms[i] = weapi.encrypt(payload(i))
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [api.decrypt(form) for form in forms] == [payload(i) for i in range(len(forms))]
+    assert len({form["encSecKey"] for form in forms}) == len(forms) // 10